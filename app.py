@@ -12,7 +12,14 @@ from data_loader import load_and_concatenate_team_stats
 from data_loader import get_next_seven_days_games
 from data_loader import get_team_roster, get_player_game_logs
 from data_loader import load_matchup_rollup_from_cache
+from data_loader import load_slate
 from classes import NBATeamRosters
+from schedule_store import get_schedule_store
+from feature_store import PlayerFeatureStore, get_feature_store
+from game_day_pipeline import PREVIOUS_SEASON, CURRENT_SEASON
+from league_context import get_league_context
+from projections import matchup_table_from_team_table, slate_games, tagged_players_table
+from prediction_cache import get_prediction_cache, cached_team_totals, cached_player_points
 import courtMap 
 from courtMap import get_shooting_splits_by_distance, generate_shot_chart
 
@@ -45,9 +52,7 @@ next_seven_days = [(datetime.datetime.now() + datetime.timedelta(days=i)).strfti
 # Function to load and filter today's games
 def get_todays_games(schedule_file):
     try:
-        schedule_df = pd.read_csv(schedule_file)
-        schedule_df['Game Date'] = pd.to_datetime(schedule_df['Game Date']).dt.strftime('%Y-%m-%d')
-        todays_games = schedule_df[schedule_df['Game Date'] == today]
+        todays_games = get_schedule_store(schedule_file).games_on(today)
         return todays_games
     except FileNotFoundError:
         st.error("Schedule file not found. Please ensure 'nbaSchedule2425.csv' is in the correct folder.")
@@ -63,11 +68,55 @@ def load_cached_stats(today_game_dir, team_type, team_abbr, season_type, stats_t
     for file_name in os.listdir(today_game_dir):
         if file_pattern in file_name:
             st.write(f"Loading data from: {file_name}")
-            return cache_manager.load_cached_data(file_name, today)
+            return cache_manager.load_path(os.path.join(today_game_dir, file_name))
 
     st.write(f"No cached file found for pattern: {file_pattern}")
     return pd.DataFrame()
 
+# Seasons the Player Analyzer can show, in the 'YYYY-YY' format the API and feature store use
+player_seasons = ["2024-25", "2023-24", "2022-23", "2021-22"]
+
+def player_stat_summary(player_features, player_logs, stat):
+    """
+    Summary statistics of one stat for the Player Analyzer: from the feature store where it has
+    them, else computed from the game logs (e.g., a stat the store does not track).
+
+    Args:
+        player_features (dict): The player's row of the feature store (may be empty).
+        player_logs (pd.DataFrame): The player's game logs, newest first as the API returns them.
+        stat (str): The box score stat.
+
+    Returns:
+        dict: MEAN, MEDIAN, MODE, SD, L5, L10, L20, HOME_MEAN and AWAY_MEAN; None where the logs
+              have no games to compute it from.
+    """
+    values = player_logs.sort_values('GAME_DATE')[stat].astype(float) if stat in player_logs.columns else pd.Series(dtype=float)
+    home = player_logs['MATCHUP'].str.contains(' vs. ') if 'MATCHUP' in player_logs.columns else pd.Series(False, index=player_logs.index)
+    mode = values.mode()
+    from_logs = {
+        "MEAN": values.mean(),
+        "MEDIAN": values.median(),
+        "MODE": mode.iloc[0] if not mode.empty else None,
+        "SD": values.std(),
+        "L5": values.tail(5).mean(),
+        "L10": values.tail(10).mean(),
+        "L20": values.tail(20).mean(),
+        "HOME_MEAN": values[home.reindex(values.index, fill_value=False)].mean(),
+        "AWAY_MEAN": values[~home.reindex(values.index, fill_value=False)].mean(),
+    }
+    summary = {}
+    for name, fallback in from_logs.items():
+        feature = f"{stat}_SEASON_{name}" if name in ("MEAN", "MEDIAN", "MODE", "SD") else f"{stat}_{name}"
+        value = player_features.get(feature)
+        if value is None or pd.isna(value):
+            value = fallback
+        summary[name] = None if value is None or pd.isna(value) else float(value)
+    return summary
+
+def format_stat(value):
+    """Formats a summary statistic, 'n/a' if it could not be computed."""
+    return "n/a" if value is None else f"{value:.2f}"
+
 # Display the next 7 days of games under Schedule
 if option == "Schedule":
     st.title("Game Schedule")
@@ -100,6 +149,9 @@ elif option == "Matchup Analyzer":
     
     if not todays_games.empty:
         st.write("### Today's Matchups:")
+
+        # Load every cached frame for today in one parallel pass
+        slate = load_slate(today)
         
         # Create a tab for each game
         game_tabs = st.tabs([f"{game['Home Team Abbreviation']} vs. {game['Visiting Team Abbreviation']}" for _, game in todays_games.iterrows()])
@@ -122,11 +174,11 @@ elif option == "Matchup Analyzer":
 
                     # Load and display consolidated team stats for home and away teams
                     st.write(f"### {home_team} Team Stats")
-                    home_consolidated_stats = load_and_concatenate_team_stats(today, "home", home_team)
+                    home_consolidated_stats = slate.consolidated_team_stats(game_id, "home")
                     st.dataframe(home_consolidated_stats)
                 
                     st.write(f"### {away_team} Team Stats")
-                    away_consolidated_stats = load_and_concatenate_team_stats(today, "away", away_team)
+                    away_consolidated_stats = slate.consolidated_team_stats(game_id, "away")
                     st.dataframe(away_consolidated_stats)
 
                 # Player Stats tab
@@ -135,19 +187,19 @@ elif option == "Matchup Analyzer":
 
                     # Load and display home team player stats (previous and current seasons)
                     st.write(f"### {home_team} Player Stats (2023-2024)")
-                    home_previous_player_stats = load_player_stats(today, "home", home_team, "prev")
+                    home_previous_player_stats = slate.player_stats(game_id, "home", "prev")
                     st.dataframe(home_previous_player_stats)
                     
                     st.write(f"### {home_team} Player Stats (2024-2025)")
-                    home_current_player_stats = load_player_stats(today, "home", home_team, "curr")
+                    home_current_player_stats = slate.player_stats(game_id, "home", "curr")
                     st.dataframe(home_current_player_stats)
                     
                     st.write(f"### {away_team} Player Stats (2023-2024)")
-                    away_previous_player_stats = load_player_stats(today, "away", away_team, "prev")
+                    away_previous_player_stats = slate.player_stats(game_id, "away", "prev")
                     st.dataframe(away_previous_player_stats)
                     
                     st.write(f"### {away_team} Player Stats (2024-2025)")
-                    away_current_player_stats = load_player_stats(today, "away", away_team, "curr")
+                    away_current_player_stats = slate.player_stats(game_id, "away", "curr")
                     st.dataframe(away_current_player_stats)
 
     else:
@@ -164,7 +216,7 @@ elif option == "Player Analyzer":
         if not team_roster.empty:
             selected_player = st.selectbox("Select a Player", team_roster['PLAYER'])
             player_id = team_roster[team_roster['PLAYER'] == selected_player]['PLAYER_ID'].values[0]
-            season = st.selectbox("Select Season", ["2024", "2023", "2022", "2021"])
+            season = st.selectbox("Select Season", player_seasons)
             # Statistic selector (now placed with other selectors)
             stat_options = ["PTS", "AST", "REB", "FG3M", "BLK", "STL", "FTM", "PF", "PFD", "TOV"]
             selected_stat = st.selectbox("Select Statistic", stat_options)
@@ -172,6 +224,16 @@ elif option == "Player Analyzer":
             if st.button("Analyze Player"):
                 # Fetch game logs for the selected player and season
                 player_logs = get_player_game_logs(nba_data, player_id, season)
+                if player_logs.empty:
+                    st.warning(f"No games for {selected_player} in {season}")
+                    st.stop()
+
+                # Fold any new games into the player's precomputed features
+                feature_store = PlayerFeatureStore(season)
+                if feature_store.update(player_id, player_logs):
+                    feature_store.save()
+                player_features = feature_store.player(player_id) or {}
+                summary = player_stat_summary(player_features, player_logs, selected_stat)
 
                 # Create tabs for Plot, Statistics, and Game Logs Dataframe
                 tab1, tab2, tab3 = st.tabs(["Plot Analysis", "Game Logs Dataframe", "Season Comparison"])
@@ -180,15 +242,15 @@ elif option == "Player Analyzer":
                 with tab1:
 
                     
-                    # Calculate mean and standard deviation for the selected stat
-                    mean_stat = player_logs[selected_stat].mean()
-                    std_dev_stat = player_logs[selected_stat].std()
+                    # Mean for the selected stat, from the feature store or the logs
+                    mean_stat = summary["MEAN"]
 
                     # Plot selected stat over time
                     st.write(f"### {selected_stat} per Game Over Time")
                     plt.figure(figsize=(10, 6))
                     plt.plot(player_logs['GAME_DATE'], player_logs[selected_stat], marker='o', color='b', label=f'{selected_stat} per Game')
-                    plt.axhline(mean_stat, color='r', linestyle='--', label=f'Average {selected_stat}')
+                    if mean_stat is not None:
+                        plt.axhline(mean_stat, color='r', linestyle='--', label=f'Average {selected_stat}')
                     plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%b %d'))
                     plt.gca().xaxis.set_major_locator(mdates.WeekdayLocator(interval=1))
                     plt.gcf().autofmt_xdate(rotation=45)
@@ -201,37 +263,42 @@ elif option == "Player Analyzer":
 
                     st.write(f"### Statistics for {selected_stat}")
                     
-                    # Calculate basic statistics
-                    mean_stat = player_logs[selected_stat].mean()
-                    median_stat = player_logs[selected_stat].median()
-                    mode_stat = player_logs[selected_stat].mode()[0] if not player_logs[selected_stat].mode().empty else None
-                    stdev_stat = player_logs[selected_stat].std()
+                    # Basic statistics, precomputed in the feature store
+                    median_stat = summary["MEDIAN"]
+                    mode_stat = summary["MODE"]
+                    stdev_stat = summary["SD"]
                 
-                    # Frequency of deviations within standard deviations with point ranges
+                    # Frequency of deviations within standard deviations with point ranges (needs 2+ games)
                     st.write("### Frequency of Deviations from Mean with Point Ranges")
-                    std_dev_ranges = [(0, 0.5), (0.5, 1), (1, 1.5), (1.5, 2), (2, 2.5), (2.5, 3)]
-                    freq_within_std_dev = {
-                        f'Between {low} SD and {high} SD': [
-                            player_logs[
-                                (player_logs[selected_stat].sub(mean_stat).abs() > low * stdev_stat) &
-                                (player_logs[selected_stat].sub(mean_stat).abs() <= high * stdev_stat)
-                            ].shape[0],
-                            f"{(low * stdev_stat):.2f} to {(high * stdev_stat):.2f} {selected_stat}"
-                        ]
-                        for low, high in std_dev_ranges
-                    }
-                    
-                    # Convert dictionary to DataFrame and rename columns
-                    freq_df = pd.DataFrame.from_dict(freq_within_std_dev, orient='index', columns=['Games Count', 'Range in Points'])
-                    freq_df.index.name = 'Standard Deviation Range'
-                    st.dataframe(freq_df)
+                    if mean_stat is not None and stdev_stat is not None:
+                        std_dev_ranges = [(0, 0.5), (0.5, 1), (1, 1.5), (1.5, 2), (2, 2.5), (2.5, 3)]
+                        freq_within_std_dev = {
+                            f'Between {low} SD and {high} SD': [
+                                player_logs[
+                                    (player_logs[selected_stat].sub(mean_stat).abs() > low * stdev_stat) &
+                                    (player_logs[selected_stat].sub(mean_stat).abs() <= high * stdev_stat)
+                                ].shape[0],
+                                f"{(low * stdev_stat):.2f} to {(high * stdev_stat):.2f} {selected_stat}"
+                            ]
+                            for low, high in std_dev_ranges
+                        }
+                        
+                        # Convert dictionary to DataFrame and rename columns
+                        freq_df = pd.DataFrame.from_dict(freq_within_std_dev, orient='index', columns=['Games Count', 'Range in Points'])
+                        freq_df.index.name = 'Standard Deviation Range'
+                        st.dataframe(freq_df)
+                    else:
+                        st.write("Not enough games to compute a standard deviation.")
                 
                     # Display stats summary
                     st.write("### Summary Statistics")
-                    st.write(f"Mean {selected_stat}: {mean_stat:.2f}")
-                    st.write(f"Median {selected_stat}: {median_stat:.2f}")
-                    st.write(f"Mode {selected_stat}: {mode_stat:.2f}")
-                    st.write(f"Standard Deviation of {selected_stat}: {stdev_stat:.2f}")
+                    st.write(f"Mean {selected_stat}: {format_stat(mean_stat)}")
+                    st.write(f"Median {selected_stat}: {format_stat(median_stat)}")
+                    st.write(f"Mode {selected_stat}: {format_stat(mode_stat)}")
+                    st.write(f"Standard Deviation of {selected_stat}: {format_stat(stdev_stat)}")
+                    st.write(f"Last 5 / 10 / 20 games: {format_stat(summary['L5'])} / "
+                             f"{format_stat(summary['L10'])} / {format_stat(summary['L20'])}")
+                    st.write(f"Home / Away mean: {format_stat(summary['HOME_MEAN'])} / {format_stat(summary['AWAY_MEAN'])}")
 
                                 # Game Logs Dataframe tab
                 with tab2:
@@ -241,10 +308,10 @@ elif option == "Player Analyzer":
                 # Tab 3: Season Comparison
                 with tab3:
                     st.header("Season Comparison")
-                    seasons_to_compare = st.multiselect("Select Seasons for Comparison", ["2024", "2023", "2022", "2021"], default=["2024", "2023"])
+                    seasons_to_compare = st.multiselect("Select Seasons for Comparison", player_seasons, default=[CURRENT_SEASON, PREVIOUS_SEASON])
                     
                     # Fetch the game logs for the current season to determine the number of games played
-                    current_season_logs = get_player_game_logs(nba_data, player_id, "2024")
+                    current_season_logs = get_player_game_logs(nba_data, player_id, CURRENT_SEASON)
                     games_played = len(current_season_logs)
                     
                     # Comparison data
@@ -460,4 +527,25 @@ elif option == "Player Matchup Analyzer":
                             st.write(f"No data available for {name}.")
 
                 except Exception as e:
-                    st.error(f"Error fetching shooting splits data: {e}")
\ No newline at end of file
+                    st.error(f"Error fetching shooting splits data: {e}")
+
+# Projections for today's games, reused from the prediction cache when their inputs are unchanged
+elif option == "Matchup Predictor":
+    st.title("Matchup Predictor")
+    st.write("Projected team totals and player points for today's games.")
+
+    slate = load_slate(today)
+    if len(slate) == 0:
+        st.write("No cached stats for today's games.")
+    else:
+        prediction_cache = get_prediction_cache("app")
+        league_context = get_league_context(PREVIOUS_SEASON, today)
+
+        st.subheader("Team Totals")
+        team_totals = cached_team_totals(matchup_table_from_team_table(slate_games(slate), league_context), prediction_cache)
+        st.dataframe(team_totals)
+
+        st.subheader("Player Points")
+        players = tagged_players_table(slate, league_context=league_context)
+        features = get_feature_store(PREVIOUS_SEASON, player_ids=players['PLAYER_ID']).features(players['PLAYER_ID'])
+        st.dataframe(cached_player_points(players, prediction_cache, features=features))
@@ -0,0 +1,145 @@
+# backfill.py
+"""
+Populates cached_data/ for every game in a date range. All dates are planned into one
+dependency graph, so teams, rosters, career stats and league-wide metrics shared by several
+days are fetched once, and every call goes through one global rate limiter. Current-season
+stats are only pulled for today's games (see plan_backfill).
+
+Usage:
+    python backfill.py --start 2024-10-22 --end 2024-10-31 --workers 4 --calls-per-minute 6
+"""
+
+import argparse
+import datetime
+import time
+from cache_manager import CacheManager
+from game_day_pipeline import Watermarks, build_game_day_pipeline, PREVIOUS_SEASON, CURRENT_SEASON
+from pipeline import Checkpoint, Pipeline, RateLimiter, FAILED, UPSTREAM_FAILED
+from planner import plan_calls, print_plan
+
+
+class BackfillProgress:
+    """
+    Prints throughput (cached artifacts per minute) and an ETA as the backfill runs.
+    An artifact is one saved team or player stats entry for one game.
+    """
+    def __init__(self, report_every=10):
+        self.report_every = report_every
+        self.start = time.perf_counter()
+        self.done = 0
+        self.failed = 0
+        self.total = None
+
+    def __call__(self, name, status, actions):
+        if not name.startswith("save("):
+            return
+        if status in (FAILED, UPSTREAM_FAILED):
+            self.failed += 1
+        else:
+            self.done += 1
+        if self.total is None:
+            self.total = sum(1 for task_name, action in actions.items() if task_name.startswith("save(") and action != "skip")
+        finished = self.done + self.failed
+        if finished % self.report_every == 0 or finished == self.total:
+            print(self.report(self.total))
+
+    def report(self, total):
+        """
+        Returns a one-line progress summary.
+        """
+        minutes = (time.perf_counter() - self.start) / 60
+        rate = self.done / minutes if minutes > 0 else 0.0
+        remaining = max(total - self.done - self.failed, 0)
+        eta = f"{remaining / rate:.1f} min" if rate > 0 else "unknown"
+        return (f"[backfill] {self.done}/{total} artifacts ({self.failed} failed), "
+                f"{rate:.1f} artifacts/min, ETA {eta}")
+
+
+def plan_backfill(nba_data, cache_manager, start_date, end_date, limiter, pipeline,
+                  previous_season=PREVIOUS_SEASON, current_season=CURRENT_SEASON, watermarks=None, delta=False,
+                  today=None):
+    """
+    Adds the tasks for every game between start_date and end_date (inclusive) to one pipeline.
+
+    The current-season endpoints return stats as of the day they are called, not as of a game
+    date, so current-season stats are only pulled for today's games. For any other date they
+    would include games played after it (or miss games played before it) and be cached as wrong.
+
+    Args:
+        today (str, optional): Today's date in 'YYYY-MM-DD' format (defaults to the system date).
+
+    Returns:
+        pd.DataFrame: The games in the range.
+    """
+    today = today or datetime.date.today().strftime('%Y-%m-%d')
+    games = nba_data.schedule_store.games_between(start_date, end_date)
+    is_today = games['Game Date'] == today
+    # League-wide tasks without dependents always run, so a build is only added for games it has
+    if (~is_today).any():
+        print(f"Pulling only previous-season stats for the {games.loc[~is_today, 'Game Date'].nunique()} "
+              f"days other than today")
+        build_game_day_pipeline(nba_data, cache_manager, games[~is_today], previous_season, None,
+                                limiter=limiter, pipeline=pipeline)
+    if is_today.any():
+        build_game_day_pipeline(nba_data, cache_manager, games[is_today], previous_season, current_season,
+                                limiter=limiter, pipeline=pipeline, watermarks=watermarks, delta=delta)
+    return games
+
+
+def run_backfill(start_date, end_date, workers=4, calls_per_minute=6, schedule_file="nbaSchedule2425.csv",
+                 resume=False, delta=False):
+    """
+    Backfills the cache for a date range.
+
+    Args:
+        start_date (str): First date in 'YYYY-MM-DD' format.
+        end_date (str): Last date in 'YYYY-MM-DD' format.
+        workers (int): Number of tasks run at the same time.
+        calls_per_minute (float): Global API request budget.
+        schedule_file (str): The schedule CSV.
+        resume (bool): If True, continue an interrupted backfill of the same range.
+        delta (bool): If True, carry forward today's current-season stats of teams that have not played.
+
+    Returns:
+        dict: The pipeline result (see Pipeline.run).
+    """
+    from classes import NBATeamRosters
+
+    nba_data = NBATeamRosters(season="2024")
+    nba_data.load_schedule(schedule_file)
+    limiter = RateLimiter(calls_per_minute)
+    watermarks = Watermarks()
+    pipeline = Pipeline(workers, checkpoint=Checkpoint(f"backfill_{start_date}_{end_date}", resume=resume))
+
+    with CacheManager(write_behind=True) as cache_manager:
+        games = plan_backfill(nba_data, cache_manager, start_date, end_date, limiter, pipeline,
+                              watermarks=watermarks, delta=delta)
+        teams = set(games['Home Team Abbreviation']) | set(games['Visiting Team Abbreviation'])
+        print(f"Backfilling {len(games)} games on {games['Game Date'].nunique()} days "
+              f"({len(teams)} teams, {len(pipeline.tasks)} tasks)")
+
+        plan = plan_calls(pipeline)
+        print_plan(plan, limiter)
+        result = pipeline.run(on_task_done=BackfillProgress(), actions=plan["actions"])
+        failed_writes = cache_manager.flush()
+        for filepath, error in failed_writes:
+            print(f"Failed to cache {filepath}: {error}")
+        if not failed_writes:
+            watermarks.save()
+
+    print(f"API calls by endpoint: {dict(limiter.calls)}")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the cache for a range of game dates.")
+    parser.add_argument("--start", required=True, help="First game date (YYYY-MM-DD).")
+    parser.add_argument("--end", required=True, help="Last game date (YYYY-MM-DD).")
+    parser.add_argument("--workers", type=int, default=4, help="Number of tasks run at the same time.")
+    parser.add_argument("--calls-per-minute", type=float, default=6, help="Global API request budget.")
+    parser.add_argument("--schedule-file", default="nbaSchedule2425.csv", help="Schedule CSV.")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted backfill of the same range.")
+    parser.add_argument("--delta", action="store_true", help="Carry forward current-season stats of teams that have not played.")
+    args = parser.parse_args()
+    run_backfill(args.start, args.end, workers=args.workers, calls_per_minute=args.calls_per_minute,
+                 schedule_file=args.schedule_file, resume=args.resume, delta=args.delta)
@@ -0,0 +1,358 @@
+# backtest.py
+"""
+Replays the projection models over a range of past game dates and scores them against what
+actually happened. Each day only sees data available before tip-off: the team and player
+frames cached for that date, and the season's player logs from games played before it.
+Current-season frames counting more games than the team had played before the date were
+pulled after tip-off, so they are dropped. Actual points come from the league game log of
+the season (every team and player game in one call), cached as a league table; pass --fetch
+to download it.
+
+Days run in a process pool and all results are written to one columnar report
+(Parquet, or CSV when pyarrow is not installed).
+
+Usage:
+    python backtest.py --start 2024-10-22 --end 2025-04-13 --model team_totals --workers 8
+    python backtest.py --start 2024-10-22 --end 2024-10-31 --model player_points --fetch
+"""
+
+import os
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from cache_keys import CacheKey, PLAYER_GAME_LOG, PLAYER_STATS, TEAM_GAME_LOG, TEAM_STATS, normalize_game_id
+from data_loader import get_cache_manager, load_player_logs_table, load_slate
+from feature_store import parse_log_dates
+from game_day_pipeline import CURRENT_SEASON
+from projections import matchup_table_from_slate, project_team_totals, tagged_players_table, project_player_points
+from schedule_store import get_schedule_store, season_for_dates
+
+try:
+    import pyarrow  # noqa: F401 (only needed to write Parquet reports)
+except ImportError:
+    pyarrow = None
+
+MODELS = ("team_totals", "player_points")
+BACKTEST_DIR = "backtests"
+
+# Columns of the report, team rows have no Player_ID
+REPORT_COLUMNS = ["Model", "Game Date", "Game ID", "Side", "Team", "Player_ID", "Player_Name",
+                  "Projected", "Actual", "Error", "Abs Error"]
+
+
+def load_league_game_log(season=CURRENT_SEASON, player_or_team="T", cache_dir="cached_data", nba_data=None,
+                         through_date=None):
+    """
+    Loads the cached league game log of a season, fetching it through nba_data if it is not
+    cached or does not reach through_date.
+
+    Args:
+        season (str): The season in 'YYYY-YY' format.
+        player_or_team (str): 'T' for one row per team game, 'P' for one row per player game.
+        cache_dir (str): The base directory for cached data.
+        nba_data (NBATeamRosters, optional): Used to fetch the log.
+        through_date (str, optional): Last game date in 'YYYY-MM-DD' format the log must cover.
+
+    Returns:
+        pd.DataFrame: The game log, empty if it is not cached and cannot be fetched.
+    """
+    key = CacheKey.league_table(season, TEAM_GAME_LOG if player_or_team == "T" else PLAYER_GAME_LOG)
+    game_log = get_cache_manager(cache_dir).load(key)
+    stale = game_log is None or (through_date is not None and game_log["GAME_DATE"].max() < through_date)
+    if stale and nba_data is not None:
+        game_log = nba_data.get_league_game_log(season, player_or_team, through_date=through_date)
+    return game_log if game_log is not None else pd.DataFrame()
+
+
+def load_actuals(season=CURRENT_SEASON, player_or_team="T", cache_dir="cached_data", nba_data=None,
+                 through_date=None):
+    """
+    Builds the table of actual points from the league game log of a season.
+
+    Args:
+        season (str): The season in 'YYYY-YY' format.
+        player_or_team (str): 'T' for team points, 'P' for player points.
+        cache_dir, nba_data, through_date: As load_league_game_log.
+
+    Returns:
+        pd.DataFrame: One row per team or player game with Game ID, Game Date, Team, Player_ID
+                      (NaN for team rows) and PTS.
+    """
+    columns = ["Game ID", "Game Date", "Team", "Player_ID", "PTS"]
+    game_log = load_league_game_log(season, player_or_team, cache_dir, nba_data, through_date)
+    if game_log.empty:
+        return pd.DataFrame(columns=columns)
+
+    return pd.DataFrame({
+        "Game ID": game_log["GAME_ID"].map(normalize_game_id),
+        "Game Date": pd.to_datetime(game_log["GAME_DATE"]).dt.strftime("%Y-%m-%d"),
+        "Team": game_log["TEAM_ABBREVIATION"],
+        "Player_ID": game_log["PLAYER_ID"].astype("int64") if "PLAYER_ID" in game_log.columns else np.nan,
+        "PTS": game_log["PTS"].astype(float),
+    }, columns=columns)
+
+
+def season_of(game_date):
+    """
+    Returns the season ('YYYY-YY') a game date ('YYYY-MM-DD') belongs to.
+    """
+    return season_for_dates(pd.Series([pd.Timestamp(game_date)])).iloc[0]
+
+
+def last_game_date(schedule_store, season, through_date):
+    """
+    Returns the date of the season's last scheduled game on or before through_date: the
+    latest game a league game log can hold when it is up to date for through_date.
+
+    Args:
+        schedule_store (ScheduleStore): The schedule.
+        season (str): The season in 'YYYY-YY' format.
+        through_date (str): The date in 'YYYY-MM-DD' format.
+
+    Returns:
+        str: The game date in 'YYYY-MM-DD' format, or None if no game was scheduled by then.
+    """
+    dates = schedule_store.games["Game Date"]
+    dates = dates[(season_for_dates(dates) == season) & (dates <= pd.Timestamp(through_date))]
+    return dates.max().strftime("%Y-%m-%d") if not dates.empty else None
+
+
+def games_played_before(team_actuals, game_date):
+    """
+    Returns {team: games played before game_date} from the team rows of load_actuals.
+    """
+    return team_actuals[team_actuals["Game Date"] < game_date].groupby("Team").size().to_dict()
+
+
+def drop_late_frames(slate, games_before):
+    """
+    Drops the current-season frames of every side whose team or player stats count more games
+    than the team had played before the slate's date: those were pulled after tip-off.
+
+    Args:
+        slate (GameSlate): The loaded slate, changed in place.
+        games_before (dict): {team: games played before the slate's date}.
+
+    Returns:
+        list: 'game_id side team' of every side dropped.
+    """
+    dropped = []
+    for game_id in slate.game_ids():
+        for side, entry in slate.games[game_id].items():
+            team_abbr = entry["team"]
+            played = []
+            team_stats = entry[TEAM_STATS].get("curr")
+            if team_stats is not None and "GP" in team_stats.columns:
+                played += list(team_stats["GP"])
+            players = entry[PLAYER_STATS].get("curr")
+            if players is not None and "GP" in players.columns:
+                # Traded players' 'TOT' rows count games with other teams too
+                own_team = players["TEAM_ABBREVIATION"] == team_abbr if "TEAM_ABBREVIATION" in players.columns else True
+                played += list(players.loc[own_team, "GP"])
+            if played and np.nanmax(played) > games_before.get(team_abbr, 0):
+                entry[TEAM_STATS]["curr"] = pd.DataFrame()
+                entry[PLAYER_STATS]["curr"] = pd.DataFrame()
+                dropped.append(f"{game_id} {side} {team_abbr}")
+    if dropped:
+        print(f"{slate.game_date}: dropped current-season frames pulled after tip-off for {', '.join(dropped)}")
+    return dropped
+
+
+def _score(projections, actuals, keys):
+    """
+    Joins projections with actual points on keys and adds the error columns.
+    """
+    scored = projections.merge(actuals, on=keys, how="left")
+    scored["Error"] = scored["Projected"] - scored["Actual"]
+    scored["Abs Error"] = scored["Error"].abs()
+    return scored
+
+
+def backtest_day(game_date, model, day_actuals, cache_dir="cached_data", logs_season=None,
+                 season_type="prev", games_before=None):
+    """
+    Runs one model for one game date using only pre-tip-off data, and scores it.
+
+    Args:
+        game_date (str): The game date in 'YYYY-MM-DD' format.
+        model (str): 'team_totals' or 'player_points'.
+        day_actuals (pd.DataFrame): The rows of load_actuals for this date (team rows for
+                                    'team_totals', player rows for 'player_points').
+        cache_dir (str): The base directory for cached data.
+        logs_season (str, optional): Season of the player logs the player model averages
+                                     (defaults to the season of game_date).
+        season_type (str): 'prev' or 'curr' team and player stats.
+        games_before (dict, optional): {team: games played before game_date}, required for
+                                       'curr' to drop frames pulled after tip-off.
+
+    Returns:
+        pd.DataFrame: Report rows (REPORT_COLUMNS) for the day, empty if nothing is cached.
+    """
+    slate = load_slate(game_date, cache_dir=cache_dir)
+    if len(slate) == 0:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+    if season_type == "curr":
+        drop_late_frames(slate, games_before or {})
+
+    if model == "team_totals":
+        totals = project_team_totals(matchup_table_from_slate(slate, season_type))
+        projections = pd.concat([
+            pd.DataFrame({"Game ID": totals["Game ID"], "Side": side, "Team": totals[team_column],
+                          "Projected": totals[f"{label} Team Total"]})
+            for side, team_column, label in (("home", "Home Team Abbreviation", "Home"),
+                                             ("away", "Visiting Team Abbreviation", "Away"))
+        ], ignore_index=True)
+        team_actuals = day_actuals[["Game ID", "Team", "PTS"]].rename(columns={"PTS": "Actual"})
+        scored = _score(projections, team_actuals, ["Game ID", "Team"])
+        scored["Player_ID"] = np.nan
+        scored["Player_Name"] = None
+
+    elif model == "player_points":
+        players = tagged_players_table(slate, season_type)
+        player_logs = load_player_logs_table(players["PLAYER_ID"], logs_season or season_of(game_date), cache_dir=cache_dir)
+        # Only games played before this date were known at tip-off
+        if not player_logs.empty:
+            player_logs = player_logs[parse_log_dates(player_logs) < pd.Timestamp(game_date)]
+        points = project_player_points(players, player_logs)
+        projections = points[["Game ID", "Side", "Team", "Player_ID", "Player_Name"]].assign(
+            Projected=points["Expected_Points"])
+        player_actuals = day_actuals[["Game ID", "Player_ID", "PTS"]].rename(columns={"PTS": "Actual"})
+        scored = _score(projections, player_actuals, ["Game ID", "Player_ID"])
+
+    else:
+        raise ValueError(f"Unknown model {model!r}, expected one of {MODELS}")
+
+    scored["Model"] = model
+    scored["Game Date"] = game_date
+    return scored[REPORT_COLUMNS]
+
+
+def summarize(report):
+    """
+    Summarizes a backtest report by model: rows scored, MAE, RMSE and bias. Rows without a
+    projection (e.g., dropped late frames) or an actual are not scored.
+
+    Returns:
+        pd.DataFrame: One row per model.
+    """
+    scored = report.dropna(subset=["Projected", "Actual"])
+    return scored.groupby("Model").agg(
+        Rows=("Error", "size"),
+        MAE=("Abs Error", "mean"),
+        RMSE=("Error", lambda errors: float(np.sqrt((errors ** 2).mean()))),
+        Bias=("Error", "mean"),
+    ).reset_index()
+
+
+def write_report(report, path):
+    """
+    Writes the report as Parquet, or as CSV next to it when pyarrow is not installed.
+
+    Returns:
+        str: The path written.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if pyarrow is not None:
+        report.to_parquet(path, index=False)
+        return path
+    path = os.path.splitext(path)[0] + ".csv"
+    report.to_csv(path, index=False)
+    return path
+
+
+def run_backtest(start_date, end_date, model="team_totals", workers=None, cache_dir="cached_data",
+                 schedule_file="nbaSchedule2425.csv", logs_season=None, actuals_season=None, season_type="prev",
+                 output_dir=BACKTEST_DIR, nba_data=None):
+    """
+    Backtests a model over every game date between start_date and end_date (inclusive).
+
+    Args:
+        start_date (str): First date in 'YYYY-MM-DD' format.
+        end_date (str): Last date in 'YYYY-MM-DD' format.
+        model (str): 'team_totals' or 'player_points'.
+        workers (int, optional): Number of worker processes (defaults to the CPU count).
+        cache_dir (str): The base directory for cached data.
+        schedule_file (str): The schedule CSV.
+        logs_season (str, optional): Season of the player logs the player model averages
+                                     (defaults to the backtested season).
+        actuals_season (str, optional): The backtested season, whose league game log holds the
+                                        actual results (defaults to the season of start_date).
+        season_type (str): 'prev' or 'curr' team and player stats.
+        output_dir (str): Directory the report is written to.
+        nba_data (NBATeamRosters, optional): Used to fetch the league game log if it is not
+                                             cached or does not reach the last game scheduled
+                                             by end_date.
+
+    Returns:
+        tuple: (report DataFrame, path of the written report)
+
+    Raises:
+        ValueError: If there are no actual results for the date range.
+    """
+    start = time.perf_counter()
+    actuals_season = actuals_season or season_of(start_date)
+    logs_season = logs_season or actuals_season
+    schedule_store = get_schedule_store(schedule_file)
+    games = schedule_store.games_between(start_date, end_date)
+    game_dates = sorted(games["Game Date"].unique())
+    # A log is only out of date if it misses a game that was scheduled, not an off day or the offseason
+    through_date = last_game_date(schedule_store, actuals_season, end_date)
+    team_actuals = load_actuals(actuals_season, "T", cache_dir, nba_data, through_date=through_date)
+    actuals = team_actuals if model == "team_totals" else load_actuals(actuals_season, "P", cache_dir, nba_data,
+                                                                        through_date=through_date)
+    actuals = actuals[actuals["Game Date"].between(start_date, end_date)]
+    if actuals.empty:
+        raise ValueError(f"No actual results for {actuals_season} between {start_date} and {end_date} in "
+                         f"{cache_dir}, run with --fetch to download the league game log")
+    if season_type == "curr" and team_actuals.empty:
+        raise ValueError(f"No team game log for {actuals_season}, needed to drop frames pulled after tip-off")
+    actuals_by_date = dict(tuple(actuals.groupby("Game Date")))
+    print(f"Backtesting {model} on {len(game_dates)} days ({len(games)} games), "
+          f"{len(actuals)} actual {'team' if model == 'team_totals' else 'player'} games loaded")
+
+    frames = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(backtest_day, game_date, model, actuals_by_date.get(game_date, actuals.iloc[0:0]), cache_dir,
+                            logs_season, season_type, games_played_before(team_actuals, game_date)): game_date
+            for game_date in game_dates
+        }
+        for future in as_completed(futures):
+            game_date = futures[future]
+            try:
+                frames.append(future.result())
+            except Exception as e:
+                print(f"Backtest failed for {game_date}: {e}")
+
+    frames = [frame for frame in frames if not frame.empty]
+    report = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=REPORT_COLUMNS)
+    report = report.sort_values(["Game Date", "Game ID", "Side"], kind="stable").reset_index(drop=True)
+
+    path = write_report(report, os.path.join(output_dir, f"backtest_{model}_{start_date}_{end_date}.parquet"))
+    print(f"Wrote {len(report)} rows to {path} in {time.perf_counter() - start:.1f}s")
+    print(summarize(report).to_string(index=False))
+    return report, path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest a projection model over a range of game dates.")
+    parser.add_argument("--start", required=True, help="First game date (YYYY-MM-DD).")
+    parser.add_argument("--end", required=True, help="Last game date (YYYY-MM-DD).")
+    parser.add_argument("--model", choices=MODELS, default="team_totals", help="Model to backtest.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes.")
+    parser.add_argument("--cache-dir", default="cached_data", help="Cache directory.")
+    parser.add_argument("--schedule-file", default="nbaSchedule2425.csv", help="Schedule CSV.")
+    parser.add_argument("--season-type", choices=["prev", "curr"], default="prev", help="Team and player stats to project from.")
+    parser.add_argument("--output-dir", default=BACKTEST_DIR, help="Directory the report is written to.")
+    parser.add_argument("--fetch", action="store_true", help="Fetch the league game log if it is not cached or out of date.")
+    args = parser.parse_args()
+
+    nba_data = None
+    if args.fetch:
+        from classes import NBATeamRosters
+        nba_data = NBATeamRosters(season="2024")
+    run_backtest(args.start, args.end, model=args.model, workers=args.workers, cache_dir=args.cache_dir,
+                 schedule_file=args.schedule_file, season_type=args.season_type, output_dir=args.output_dir,
+                 nba_data=nba_data)
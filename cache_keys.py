@@ -0,0 +1,302 @@
+# cache_keys.py
+
+import os
+import re
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+# Entities stored in the cache
+TEAM_STATS = "team_stats"
+PLAYER_STATS = "player_stats"
+PLAYER_LOGS = "player_logs"
+MATCHUP_ROLLUP = "matchup_rollup"
+# League-wide tables from one API call per season (e.g., every team's dashboard)
+LEAGUE_TABLE = "league_table"
+# League tables from the league game log, one row per team game or per player game
+TEAM_GAME_LOG = "team_game_log"
+PLAYER_GAME_LOG = "player_game_log"
+# Tables computed from the cached data (feature stores, league contexts, predictions, ...)
+DERIVED = "derived"
+ENTITIES = (TEAM_STATS, PLAYER_STATS, PLAYER_LOGS, MATCHUP_ROLLUP, LEAGUE_TABLE, DERIVED)
+
+# Season types used in per-game file names
+SEASON_TYPES = ("prev", "curr")
+SIDES = ("home", "away")
+
+# Folder for data that never changes once a season is over, partitioned by season
+SEASON_STORE_DIR = "seasons"
+
+# Folder for league-wide tables, partitioned by season
+LEAGUE_DIR = "league"
+
+# Per-date folders are named after the game date
+DATE_DIR_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def normalize_game_id(game_id):
+    """
+    Normalizes a game ID so '0022400061', 22400061 and '22400061' all map to '22400061'.
+    """
+    if game_id is None:
+        return None
+    game_id = str(game_id).strip()
+    return str(int(game_id)) if game_id.isdigit() else game_id
+
+
+def season_from_season_id(season_id):
+    """
+    Converts an NBA API SEASON_ID (e.g., '22023') to 'YYYY-YY' format (e.g., '2023-24').
+    """
+    start_year = int(str(season_id)[-4:])
+    return f"{start_year}-{str(start_year + 1)[-2:]}"
+
+
+@dataclass(frozen=True)
+class CacheKey:
+    """
+    Identifies one cached artifact. Storage paths are generated from the key here and
+    nowhere else, so a write and the matching read always agree on the file name.
+
+    Attributes:
+        entity (str): One of 'team_stats', 'player_stats', 'player_logs', 'matchup_rollup', 'league_table', 'derived'.
+        season (str): The season in 'YYYY-YY' format (e.g., '2023-24').
+        season_type (str): 'prev' or 'curr' for per-game team and player stats.
+        game_id (str): The game ID (normalized, without leading zeros).
+        game_date (str): The game date in 'YYYY-MM-DD' format.
+        player_id (int): The player's ID (player logs only).
+        team_abbr (str): The team abbreviation (e.g., 'BOS').
+        side (str): 'home' or 'away'.
+        table (str): The kind of league or derived table (e.g., 'team_stats', 'league_context').
+        name (str): The derived table's name within its kind (e.g., '2023-24').
+    """
+    entity: str
+    season: Optional[str] = None
+    season_type: Optional[str] = None
+    game_id: Optional[str] = None
+    game_date: Optional[str] = None
+    player_id: Optional[int] = None
+    team_abbr: Optional[str] = None
+    side: Optional[str] = None
+    table: Optional[str] = None
+    name: Optional[str] = None
+
+    def __post_init__(self):
+        if self.entity not in ENTITIES:
+            raise ValueError(f"Unknown cache entity '{self.entity}'. Expected one of {ENTITIES}.")
+        if self.season_type is not None and self.season_type not in SEASON_TYPES:
+            raise ValueError(f"Unknown season type '{self.season_type}'. Expected 'prev' or 'curr'.")
+        if self.side is not None and self.side not in SIDES:
+            raise ValueError(f"Unknown side '{self.side}'. Expected 'home' or 'away'.")
+        object.__setattr__(self, "game_id", normalize_game_id(self.game_id))
+        if self.player_id is not None:
+            object.__setattr__(self, "player_id", int(self.player_id))
+
+    @classmethod
+    def team_stats(cls, game_date, game_id, side, team_abbr, season_type, season=None):
+        """
+        Key for the merged team stats of one team in one game.
+        """
+        return cls(TEAM_STATS, season=season, season_type=season_type, game_id=game_id,
+                   game_date=game_date, team_abbr=team_abbr, side=side)
+
+    @classmethod
+    def player_stats(cls, game_date, game_id, side, team_abbr, season_type, season=None):
+        """
+        Key for the player stats of one team's roster in one game.
+        """
+        return cls(PLAYER_STATS, season=season, season_type=season_type, game_id=game_id,
+                   game_date=game_date, team_abbr=team_abbr, side=side)
+
+    @classmethod
+    def season_team_stats(cls, season, team_abbr):
+        """
+        Key for a team's merged team stats in the season-partitioned immutable store.
+        """
+        return cls(TEAM_STATS, season=season, team_abbr=team_abbr)
+
+    @classmethod
+    def season_player_stats(cls, season, team_abbr):
+        """
+        Key for a team's player stats in the season-partitioned immutable store.
+        """
+        return cls(PLAYER_STATS, season=season, team_abbr=team_abbr)
+
+    @classmethod
+    def player_logs(cls, player_id, season, game_date=None, game_id=None):
+        """
+        Key for one player's game logs for a season. The game date and game ID are only
+        used to find logs written under the older per-game naming schemes.
+        """
+        return cls(PLAYER_LOGS, season=season, game_id=game_id, game_date=game_date, player_id=player_id)
+
+    @classmethod
+    def matchup_rollup(cls, season):
+        """
+        Key for the league-wide MatchupsRollup (Totals, Regular Season) of a season.
+        """
+        return cls(MATCHUP_ROLLUP, season=season)
+
+    @classmethod
+    def league_table(cls, season, table, game_date=None):
+        """
+        Key for a league-wide table of a season (e.g., league_table('2023-24', 'team_stats')),
+        as of game_date for a season still in progress.
+        """
+        return cls(LEAGUE_TABLE, season=season, game_date=game_date, table=table)
+
+    @classmethod
+    def derived(cls, table, name):
+        """
+        Key for a table computed from other cache entries, e.g. derived('features', '2023-24').
+        """
+        return cls(DERIVED, table=table, name=name)
+
+    def _require(self, *fields):
+        missing = [field for field in fields if getattr(self, field) is None]
+        if missing:
+            raise ValueError(f"Cache key for '{self.entity}' is missing {', '.join(missing)}.")
+
+    def is_season_scoped(self):
+        """
+        True for team or player stats keyed only by season and team (the immutable store).
+        """
+        return self.entity in (TEAM_STATS, PLAYER_STATS) and self.game_id is None and self.game_date is None
+
+    def season_store_key(self):
+        """
+        Returns the immutable season-store key holding the data of a per-game 'prev' key.
+        
+        Returns:
+            CacheKey: The season-scoped key, or None if this key is not previous-season stats.
+        """
+        if self.entity not in (TEAM_STATS, PLAYER_STATS) or self.season_type != "prev":
+            return None
+        self._require("season", "team_abbr")
+        return CacheKey(self.entity, season=self.season, team_abbr=self.team_abbr)
+
+    def _game_prefix(self):
+        return f"game_{self.game_id}_{self.side}_team_{self.team_abbr}_{self.season_type}"
+
+    def relpath(self):
+        """
+        Returns the canonical storage path, relative to the cache directory.
+
+        Returns:
+            str: The relative path of the cache file.
+        """
+        if self.is_season_scoped():
+            self._require("season", "team_abbr")
+            return os.path.join(SEASON_STORE_DIR, self.season, self.entity, f"{self.team_abbr}.joblib")
+        if self.entity == TEAM_STATS:
+            self._require("game_date", "game_id", "side", "team_abbr", "season_type")
+            return os.path.join(self.game_date, f"{self._game_prefix()}_team_stats.joblib")
+        if self.entity == PLAYER_STATS:
+            self._require("game_date", "game_id", "side", "team_abbr", "season_type")
+            return os.path.join(self.game_date, f"{self._game_prefix()}.joblib")
+        if self.entity == PLAYER_LOGS:
+            self._require("player_id", "season")
+            return os.path.join("player_logs", self.season, f"{self.player_id}.joblib")
+        if self.entity == LEAGUE_TABLE:
+            self._require("season", "table")
+            suffix = f"_{self.game_date}" if self.game_date else ""
+            return os.path.join(LEAGUE_DIR, self.season, f"{self.table}{suffix}.joblib")
+        if self.entity == DERIVED:
+            self._require("table", "name")
+            return os.path.join(DERIVED, self.table, f"{self.name}.joblib")
+        self._require("season")
+        return os.path.join("previous_seasons", f"matchup_rollup_{self.season}_Totals_Regular Season.joblib")
+
+    def legacy_relpaths(self):
+        """
+        Returns the relative paths this artifact may have been written to by older code,
+        in the order they should be tried after the canonical path.
+
+        Returns:
+            list: Relative paths of legacy cache files.
+        """
+        canonical = self.relpath()
+        legacy = [canonical + ".joblib"]
+        if self.entity == PLAYER_LOGS:
+            if self.game_date and self.game_id:
+                base = os.path.join(self.game_date, f"game_{self.game_id}_player_{self.player_id}_logs.joblib")
+                legacy += [base + ".joblib", base]
+            if self.game_date:
+                legacy += [
+                    os.path.join(self.game_date, f"player_{self.player_id}_logs_{self.season}.joblib"),
+                    os.path.join(self.game_date, "player_logs", f"player_{self.player_id}_logs_{self.game_date}.joblib"),
+                ]
+        elif self.entity == MATCHUP_ROLLUP:
+            legacy.append(f"matchups_rollup_{self.season.replace('-', '_')}.joblib")
+        return legacy
+
+    def as_dict(self):
+        """
+        Returns the key fields as a dictionary.
+        """
+        return asdict(self)
+
+
+# Patterns for every file name layout found in the cache directory
+_GAME_FILE_RE = re.compile(
+    r"^game_(?P<game_id>\d+)_(?P<side>home|away)_team_(?P<team_abbr>[A-Za-z]+)_(?P<season_type>prev|curr)"
+    r"(?P<team_stats>_team_stats)?\.joblib(?:\.joblib)?$"
+)
+_GAME_LOGS_RE = re.compile(r"^game_(?P<game_id>\d+)_player_(?P<player_id>\d+)_logs\.joblib(?:\.joblib)?$")
+_SEASON_LOGS_RE = re.compile(r"^player_(?P<player_id>\d+)_logs_(?P<season>\d{4}-\d{2})\.joblib$")
+_DATED_LOGS_RE = re.compile(r"^player_(?P<player_id>\d+)_logs_(?P<log_date>\d{4}-\d{2}-\d{2})\.joblib$")
+_CANONICAL_LOGS_RE = re.compile(r"^(?P<player_id>\d+)\.joblib$")
+_ROLLUP_RE = re.compile(r"^matchup_rollup_(?P<season>\d{4}-\d{2})_Totals_Regular Season\.joblib$")
+_LEGACY_ROLLUP_RE = re.compile(r"^matchups_rollup_(?P<start>\d{4})_(?P<end>\d{2})\.joblib$")
+_SEASON_STORE_RE = re.compile(r"^(?P<team_abbr>[A-Za-z]+)\.joblib$")
+_LEAGUE_TABLE_RE = re.compile(r"^(?P<table>[a-z_]+?)(?:_(?P<game_date>\d{4}-\d{2}-\d{2}))?\.joblib$")
+
+
+def parse_cache_path(relpath):
+    """
+    Parses a cache file path (canonical or legacy) back into a CacheKey.
+    Player logs written without a season in the name come back with season=None;
+    the season has to be read from the frame's SEASON_ID in that case.
+
+    Args:
+        relpath (str): A path relative to the cache directory.
+
+    Returns:
+        CacheKey: The parsed key, or None if the path is not a recognized cache file.
+    """
+    parts = relpath.replace("\\", "/").split("/")
+    name = parts[-1]
+    parent = parts[-2] if len(parts) > 1 else None
+    game_date = next((part for part in reversed(parts[:-1]) if DATE_DIR_RE.match(part)), None)
+
+    match = _GAME_FILE_RE.match(name)
+    if match:
+        entity = TEAM_STATS if match.group("team_stats") else PLAYER_STATS
+        return CacheKey(entity, season_type=match.group("season_type"), game_id=match.group("game_id"),
+                        game_date=game_date, team_abbr=match.group("team_abbr").upper(), side=match.group("side"))
+    match = _GAME_LOGS_RE.match(name)
+    if match:
+        return CacheKey.player_logs(match.group("player_id"), None, game_date=game_date, game_id=match.group("game_id"))
+    match = _SEASON_LOGS_RE.match(name)
+    if match:
+        return CacheKey.player_logs(match.group("player_id"), match.group("season"), game_date=game_date)
+    match = _DATED_LOGS_RE.match(name)
+    if match:
+        return CacheKey.player_logs(match.group("player_id"), None, game_date=game_date)
+    match = _CANONICAL_LOGS_RE.match(name)
+    if match and len(parts) >= 3 and parts[-3] == "player_logs":
+        return CacheKey.player_logs(match.group("player_id"), parent)
+    match = _SEASON_STORE_RE.match(name)
+    if match and len(parts) >= 4 and parts[-4] == SEASON_STORE_DIR and parent in (TEAM_STATS, PLAYER_STATS):
+        return CacheKey(parent, season=parts[-3], team_abbr=match.group("team_abbr").upper())
+    match = _LEAGUE_TABLE_RE.match(name)
+    if match and len(parts) >= 3 and parts[-3] == LEAGUE_DIR:
+        return CacheKey.league_table(parent, match.group("table"), match.group("game_date"))
+    if len(parts) >= 3 and parts[-3] == DERIVED and name.endswith(".joblib"):
+        return CacheKey.derived(parent, name[:-len(".joblib")])
+    match = _ROLLUP_RE.match(name)
+    if match:
+        return CacheKey.matchup_rollup(match.group("season"))
+    match = _LEGACY_ROLLUP_RE.match(name)
+    if match:
+        return CacheKey.matchup_rollup(f"{match.group('start')}-{match.group('end')}")
+    return None
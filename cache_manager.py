@@ -1,40 +1,277 @@
 import os
+import atexit
+import queue
+import shutil
+import threading
+import time
 import joblib
+from cache_metrics import CacheMetrics
+import pandas as pd
+from cache_keys import CacheKey, PLAYER_LOGS, DATE_DIR_RE, season_from_season_id, parse_cache_path
+
+# Sentinel placed on the write queue to stop the background writer thread
+_STOP_WRITER = object()
+
+# Field marking a cache entry that only points at another entry (e.g., the season store)
+CACHE_REF_FIELD = "__cache_ref__"
+
+# Version of the on-disk entry layout. Every entry is written as an envelope dict holding
+# the version, the cache key it was written under and the data itself. Files without an
+# envelope are version 0 (written before versioning). They are read as they are and only
+# rewritten by cache_migrate.py, never on read.
+SCHEMA_VERSION = 1
+SCHEMA_FIELD = "__schema_version__"
+
+# Marker file recording the schema version the whole cache directory was migrated to
+SCHEMA_MARKER_FILE = ".schema_version"
+
+
+def normalize_legacy_data(data):
+    """
+    Converts data written by older versions of the pull into its current form.
+    Placeholder frames with an 'etc...' column (written when a team had no current season
+    stats yet) become empty DataFrames.
+    
+    Args:
+        data: The data loaded from a version 0 cache file.
+    
+    Returns:
+        The normalized data.
+    """
+    if isinstance(data, pd.DataFrame) and "etc..." in data.columns:
+        return pd.DataFrame()
+    return data
+
+
+def wrap_cache_entry(data, key=None):
+    """
+    Wraps data in the versioned envelope that is written to disk.
+    
+    Args:
+        data: The data to cache.
+        key (CacheKey, optional): The key the data is cached under.
+    
+    Returns:
+        dict: The envelope.
+    """
+    return {SCHEMA_FIELD: SCHEMA_VERSION, "key": key.as_dict() if key is not None else None, "data": data}
+
+
+def unwrap_cache_entry(entry):
+    """
+    Splits an entry loaded from disk into its schema version and data.
+    
+    Args:
+        entry: The object loaded with joblib.
+    
+    Returns:
+        tuple: (schema_version, data). Entries without an envelope are version 0.
+    """
+    if isinstance(entry, dict) and SCHEMA_FIELD in entry:
+        return entry[SCHEMA_FIELD], entry["data"]
+    return 0, entry
+
+
+def read_schema_marker(cache_dir):
+    """
+    Returns the schema version recorded for a cache directory (0 if never migrated).
+    """
+    marker_path = os.path.join(cache_dir, SCHEMA_MARKER_FILE)
+    if not os.path.exists(marker_path):
+        return 0
+    with open(marker_path) as f:
+        return int(f.read().strip() or 0)
+
+
+def write_schema_marker(cache_dir, version=SCHEMA_VERSION):
+    """
+    Records the schema version a cache directory has been migrated to.
+    """
+    with open(os.path.join(cache_dir, SCHEMA_MARKER_FILE), "w") as f:
+        f.write(str(version))
+
 
 class CacheManager:
     """
     Class for handling caching of data using joblib, organized by game date.
     """
-    def __init__(self, cache_dir="cached_data"):
+    def __init__(self, cache_dir="cached_data", write_behind=False, max_pending_writes=32, metrics=None):
         """
         Initializes the CacheManager.
         
         Args:
             cache_dir (str): Base directory for caching.
+            write_behind (bool): If True, cache writes are queued and written to disk by a
+                                 background thread instead of blocking the caller.
+            max_pending_writes (int): Maximum number of queued writes in write-behind mode.
+                                      Callers block once the queue is full (backpressure).
+            metrics (CacheMetrics, optional): Collector for hit/miss/write statistics.
+                                              A new one is created if not given.
         """
         self.cache_dir = cache_dir
         # Create the base cache directory if it doesn't exist
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
+            write_schema_marker(self.cache_dir)
+        elif read_schema_marker(self.cache_dir) < SCHEMA_VERSION:
+            print(f"Cache directory {self.cache_dir} uses an older layout and is read through legacy names. "
+                  f"Run 'python cache_migrate.py --cache-dir {self.cache_dir}' to migrate it.")
+
+        self.metrics = metrics if metrics is not None else CacheMetrics()
+        self.write_behind = write_behind
+        self._write_queue = None
+        self._writer_thread = None
+        self._write_errors = []
+        # Entries queued but not yet on disk, so reads see writes made earlier in the run
+        self._pending_writes = {}
+        self._pending_lock = threading.Lock()
+        # Legacy per-date player log files, {player_id: {path: season or None}}, scanned on first use
+        self._legacy_logs = None
+        self._legacy_logs_lock = threading.Lock()
+        if write_behind:
+            self._write_queue = queue.Queue(maxsize=max_pending_writes)
+            self._writer_thread = threading.Thread(target=self._drain_write_queue, name="cache-writer", daemon=True)
+            self._writer_thread.start()
+            # Make sure everything queued is on disk before the interpreter exits
+            atexit.register(self.close)
+
+    def _key_for_path(self, filepath):
+        """
+        Parses a file path inside the cache directory back into its CacheKey (or None).
+        """
+        return parse_cache_path(os.path.relpath(filepath, self.cache_dir))
+
+    def is_canonical_path(self, filepath):
+        """
+        True if the file sits at the canonical path of the key parsed from its name.
+        
+        Args:
+            filepath (str): The path of a file inside the cache directory.
+        
+        Returns:
+            bool: False for legacy names and files that are not cache entries.
+        """
+        key = self._key_for_path(filepath)
+        try:
+            return key is not None and os.path.normpath(self.path_for(key)) == os.path.normpath(filepath)
+        except ValueError:
+            return False
+
+    def _write_file(self, data, filepath, key=None):
+        """
+        Writes the data to the given path in the versioned envelope, creating the parent
+        directory if needed. The file is written to a temporary name and then renamed,
+        so a crash never leaves a half-written cache file behind.
+        """
+        directory = os.path.dirname(filepath)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        start = time.perf_counter()
+        # Unique per process and thread, so concurrent writers never share a temporary file
+        temp_path = f"{filepath}.tmp{os.getpid()}_{threading.get_ident()}"
+        joblib.dump(wrap_cache_entry(data, key or self._key_for_path(filepath)), temp_path)
+        os.replace(temp_path, filepath)
+        self.metrics.record(filepath, "write", time.perf_counter() - start, os.path.getsize(filepath))
+
+    def _drain_write_queue(self):
+        """
+        Background loop that writes queued cache entries to disk in order.
+        """
+        while True:
+            item = self._write_queue.get()
+            try:
+                if item is _STOP_WRITER:
+                    return
+                data, filepath, key = item
+                self._write_file(data, filepath, key)
+                print(f"Data cached as {os.path.basename(filepath)} in {os.path.dirname(filepath)}")
+            except Exception as e:
+                print(f"Error writing cache file {item[1]}: {e}")
+                self._write_errors.append((item[1], e))
+            finally:
+                if item is not _STOP_WRITER:
+                    with self._pending_lock:
+                        if self._pending_writes.get(item[1]) is item[0]:
+                            del self._pending_writes[item[1]]
+                self._write_queue.task_done()
+
+    def _submit_write(self, data, filepath, key=None):
+        """
+        Writes the data immediately, or queues it when write-behind mode is enabled.
+        Blocks when the write queue is full so memory use stays bounded.
+        """
+        if self._write_queue is not None and self._writer_thread.is_alive():
+            with self._pending_lock:
+                self._pending_writes[filepath] = data
+            self._write_queue.put((data, filepath, key))
+        else:
+            self._write_file(data, filepath, key)
+            print(f"Data cached as {os.path.basename(filepath)} in {os.path.dirname(filepath)}")
+
+    def flush(self):
+        """
+        Blocks until every queued cache write has been written to disk.
+        
+        Returns:
+            list: (filepath, exception) tuples for writes that failed since the last flush.
+        """
+        if self._write_queue is not None:
+            self._write_queue.join()
+        errors, self._write_errors = self._write_errors, []
+        return errors
+
+    def _load_file(self, filepath):
+        """
+        Loads a cache file, returning a still-queued write for that path if there is one.
+        
+        Returns:
+            The loaded data, or None if the file does not exist.
+        """
+        start = time.perf_counter()
+        with self._pending_lock:
+            if filepath in self._pending_writes:
+                self.metrics.record(filepath, "hit", time.perf_counter() - start)
+                return self._pending_writes[filepath]
+        if os.path.exists(filepath):
+            version, data = unwrap_cache_entry(joblib.load(filepath))
+            self.metrics.record(filepath, "hit", time.perf_counter() - start, os.path.getsize(filepath))
+            if version < SCHEMA_VERSION:
+                data = normalize_legacy_data(data)
+            return data
+        self.metrics.record(filepath, "miss", time.perf_counter() - start)
+        return None
+
+    def close(self):
+        """
+        Flushes pending writes and stops the background writer thread.
+        """
+        if self._write_queue is None:
+            return
+        self.flush()
+        if self._writer_thread.is_alive():
+            self._write_queue.put(_STOP_WRITER)
+            self._writer_thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def cache_data(self, data, filename, game_date):
         """
         Caches the given data using joblib, organized by game date.
+        In write-behind mode the write is queued and this returns immediately.
         
         Args:
             data: The data to be cached (DataFrame, dict, etc.)
             filename (str): The name of the file to save the data in.
             game_date (str): The game date in 'YYYY-MM-DD' format.
         """
-        # Create a directory for the specific game date
+        # Save the data using joblib inside the directory for the specific game date
         game_date_dir = os.path.join(self.cache_dir, game_date)
-        if not os.path.exists(game_date_dir):
-            os.makedirs(game_date_dir)
-
-        # Save the data using joblib
         filepath = os.path.join(game_date_dir, f"{filename}.joblib")
-        joblib.dump(data, filepath)
-        print(f"Data cached as {filename}.joblib in {game_date_dir}")
+        self._submit_write(data, filepath)
 
     def load_cached_data(self, filename, game_date):
         """
@@ -50,11 +287,10 @@ class CacheManager:
         game_date_dir = os.path.join(self.cache_dir, game_date)
         filepath = os.path.join(game_date_dir, f"{filename}.joblib")
         
-        if os.path.exists(filepath):
-            return joblib.load(filepath)
-        else:
+        data = self._follow_reference(self._load_file(filepath))
+        if data is None:
             print(f"Cached file {filename}.joblib not found in {game_date_dir}.")
-            return None
+        return data
 
     def clear_cache(self, game_date=None):
         """
@@ -64,26 +300,216 @@ class CacheManager:
             game_date (str, optional): The game date to clear, in 'YYYY-MM-DD' format.
                                        If None, clears the entire cache directory.
         """
+        # Let queued writes land first so they are not recreated after the clear
+        self.flush()
         if game_date:
             # Delete the folder for the specific game date
             game_date_dir = os.path.join(self.cache_dir, game_date)
             if os.path.exists(game_date_dir):
-                for file in os.listdir(game_date_dir):
-                    file_path = os.path.join(game_date_dir, file)
-                    os.remove(file_path)
-                os.rmdir(game_date_dir)
+                shutil.rmtree(game_date_dir)
                 print(f"Cleared cache for game date {game_date}.")
             else:
                 print(f"No cached data found for game date {game_date}.")
         else:
-            # Clear all cached data
-            for subdir in os.listdir(self.cache_dir):
-                subdir_path = os.path.join(self.cache_dir, subdir)
-                for file in os.listdir(subdir_path):
-                    os.remove(os.path.join(subdir_path, file))
-                os.rmdir(subdir_path)
+            # Clear all cached data, including nested folders such as player_logs/<season>
+            for entry in os.listdir(self.cache_dir):
+                entry_path = os.path.join(self.cache_dir, entry)
+                if os.path.isdir(entry_path):
+                    shutil.rmtree(entry_path)
+                else:
+                    os.remove(entry_path)
             print(f"Cleared all cached data.")
 
+    def path_for(self, key):
+        """
+        Returns the canonical file path for a cache key.
+        
+        Args:
+            key (CacheKey): The cache key.
+        
+        Returns:
+            str: The path of the cache file inside the cache directory.
+        """
+        return os.path.join(self.cache_dir, key.relpath())
+
+    def resolve(self, key):
+        """
+        Returns the path holding the data for a cache key: the canonical path, or else the
+        first file written under a legacy name. Legacy files are only read here; they are
+        moved to the canonical path by cache_migrate.py.
+        
+        Args:
+            key (CacheKey): The cache key.
+        
+        Returns:
+            str: The path of the existing cache file, or None if it is not cached.
+        """
+        canonical = self.path_for(key)
+        with self._pending_lock:
+            if canonical in self._pending_writes:
+                return canonical
+        if os.path.exists(canonical):
+            return canonical
+        legacy = self.find_legacy(key)
+        return legacy[0] if legacy else None
+
+    def find_legacy(self, key):
+        """
+        Finds files written for a cache key under the names older code used. Player logs
+        cached per game date are found without the date, from a scan of the date folders.
+        
+        Args:
+            key (CacheKey): The cache key.
+        
+        Returns:
+            list: Paths of existing legacy files for the key.
+        """
+        candidates = [os.path.join(self.cache_dir, relpath) for relpath in key.legacy_relpaths()]
+        found = [filepath for filepath in candidates if os.path.exists(filepath)]
+        if key.entity == PLAYER_LOGS:
+            found += [filepath for filepath in self._legacy_player_logs(key.player_id, key.season)
+                      if filepath not in found]
+        return found
+
+    def _legacy_player_logs(self, player_id, season):
+        """
+        Paths of a player's logs for a season cached under the per-date names. Files named
+        without a season are matched on the SEASON_ID of their logs, read once.
+        """
+        with self._legacy_logs_lock:
+            if self._legacy_logs is None:
+                self._legacy_logs = self._scan_legacy_player_logs()
+            files = self._legacy_logs.get(player_id, {})
+            for filepath, file_season in files.items():
+                if file_season is None and os.path.exists(filepath):
+                    _, logs = unwrap_cache_entry(joblib.load(filepath))
+                    if isinstance(logs, pd.DataFrame) and not logs.empty and "SEASON_ID" in logs.columns:
+                        files[filepath] = season_from_season_id(logs["SEASON_ID"].iloc[0])
+            return [filepath for filepath, file_season in files.items()
+                    if file_season == season and os.path.exists(filepath)]
+
+    def _scan_legacy_player_logs(self):
+        """
+        Scans the date folders (and their player_logs subfolders) for player log files.
+        
+        Returns:
+            dict: {player_id: {path: season, or None if the file name has no season}}
+        """
+        index = {}
+        for name in sorted(os.listdir(self.cache_dir)):
+            game_date_dir = os.path.join(self.cache_dir, name)
+            if not DATE_DIR_RE.match(name) or not os.path.isdir(game_date_dir):
+                continue
+            folders = [game_date_dir, os.path.join(game_date_dir, PLAYER_LOGS)]
+            for folder in folders:
+                if not os.path.isdir(folder):
+                    continue
+                for file_name in sorted(os.listdir(folder)):
+                    filepath = os.path.join(folder, file_name)
+                    key = self._key_for_path(filepath)
+                    if key is not None and key.entity == PLAYER_LOGS:
+                        index.setdefault(key.player_id, {})[filepath] = key.season
+        return index
+
+    def exists(self, key):
+        """
+        Checks whether the data for a cache key is cached (or queued to be written).
+        """
+        return self.resolve(key) is not None
+
+    def save(self, key, data):
+        """
+        Caches the data under the canonical path for the key.
+        
+        Args:
+            key (CacheKey): The cache key.
+            data: The data to be cached (DataFrame, dict, etc.)
+        """
+        self._submit_write(data, self.path_for(key), key)
+
+    def load(self, key):
+        """
+        Loads the data for a cache key from its canonical path, or from a legacy file if the
+        cache directory has not been migrated yet.
+        
+        Args:
+            key (CacheKey): The cache key.
+        
+        Returns:
+            The loaded data, or None if it is not cached.
+        """
+        return self._follow_reference(self._load_file(self.resolve(key) or self.path_for(key)))
+
+    def load_path(self, filepath, follow_references=True):
+        """
+        Loads a cache file by path, following reference entries to the data they point at.
+        
+        Args:
+            filepath (str): The path of the cache file.
+            follow_references (bool): If False, a reference entry is returned as it is stored
+                                      (a dict with CACHE_REF_FIELD), e.g. to skip it.
+        
+        Returns:
+            The loaded data, or None if the file does not exist.
+        """
+        data = self._load_file(filepath)
+        return self._follow_reference(data) if follow_references else data
+
+    def _follow_reference(self, data):
+        """
+        Returns the referenced entry's data if the loaded data is a reference entry.
+        """
+        if isinstance(data, dict) and CACHE_REF_FIELD in data:
+            return self._load_file(os.path.join(self.cache_dir, data[CACHE_REF_FIELD]))
+        return data
+
+    def save_snapshot(self, key, data, version, signature=None):
+        """
+        Writes a derived table (see CacheKey.derived) to disk right away, even in write-behind
+        mode, together with the version of its layout and the signature of its sources.
+        
+        Args:
+            key (CacheKey): The derived table's key.
+            data: The table.
+            version (int): Version of the table's layout, bumped by the code that builds it.
+            signature (optional): Anything identifying the sources it was built from.
+        """
+        self._write_file({"version": version, "signature": signature, "data": data}, self.path_for(key), key)
+
+    def load_snapshot(self, key, version, signature=None):
+        """
+        Loads a derived table written by save_snapshot.
+        
+        Args:
+            key (CacheKey): The derived table's key.
+            version (int): The layout version the caller expects.
+            signature (optional): The signature of the current sources.
+        
+        Returns:
+            The table, or None if it is not cached, was written with another version or
+            was built from sources that have changed since.
+        """
+        filepath = self.path_for(key)
+        try:
+            snapshot = self._load_file(filepath)
+        except Exception as e:
+            print(f"Error loading {filepath}: {e}")
+            return None
+        if not isinstance(snapshot, dict) or snapshot.get("version") != version or snapshot.get("signature") != signature:
+            return None
+        return snapshot["data"]
+
+    def save_reference(self, key, target_key):
+        """
+        Caches a small entry under key that points at the data stored under target_key,
+        so per-date entries can reuse season-level data without copying it.
+        
+        Args:
+            key (CacheKey): The key to write the reference under.
+            target_key (CacheKey): The key holding the actual data.
+        """
+        self._submit_write({CACHE_REF_FIELD: target_key.relpath()}, self.path_for(key), key)
+
     def load_team_stats(self, team_abbr, season, game_date, game_id, home_or_away):
         """
         Loads the cached team stats for a given team, season, and game date.
@@ -98,61 +524,53 @@ class CacheManager:
         Returns:
             pd.DataFrame: The cached team stats DataFrame, or None if not found.
         """
-        game_date_dir = os.path.join(self.cache_dir, game_date)
-        file_name = f"game_{game_id}_{home_or_away}_team_{team_abbr}_prev.joblib"
-        file_path = os.path.join(game_date_dir, file_name)
-        
-        if os.path.exists(file_path):
-            print(f"Loading cached team stats for {team_abbr} ({season}) from {file_name}")
-            return joblib.load(file_path)
+        key = CacheKey.player_stats(game_date, game_id, home_or_away, team_abbr, "prev", season)
+        team_stats = self.load(key)
+        if team_stats is not None:
+            print(f"Loading cached team stats for {team_abbr} ({season}) from {os.path.basename(key.relpath())}")
         else:
             print(f"No cached team stats found for {team_abbr} ({season})")
-            return None
+        return team_stats
     
-    def cache_player_logs(self, player_logs, player_id, season, log_dir):
+    def cache_player_logs(self, player_logs, player_id, season):
         """
-        Caches player game logs in the specified directory.
+        Caches player game logs for a season under 'player_logs/<season>/<player_id>.joblib',
+        the same location load_player_logs reads from.
         Args:
             player_logs (pd.DataFrame): The player game logs DataFrame.
             player_id (int): The player's ID.
             season (str): The season in 'YYYY-YY' format.
-            log_dir (str): The directory where logs should be cached.
         """
-        file_name = f"player_{player_id}_logs_{season}.joblib"
-        file_path = os.path.join(log_dir, file_name)
-        joblib.dump(player_logs, file_path)
-        print(f"Cached logs for player {player_id} in {file_name}.")
+        self.save(CacheKey.player_logs(player_id, season), player_logs)
 
-    def cache_player_game_logs(self, player_logs, player_id, game_date):
+    def cache_player_game_logs(self, player_logs, player_id, game_date, season=None):
         """
-        Caches player game logs in the appropriate game date folder within 'player_logs'.
+        Caches player game logs fetched for a game date. The logs are stored per season,
+        so they are shared by every game date that needs them.
         
         Args:
             player_logs (DataFrame): The player's game logs.
             player_id (int): The player's ID.
             game_date (str): The date of the game in 'YYYY-MM-DD' format.
+            season (str, optional): The season in 'YYYY-YY' format. Read from the logs'
+                                    SEASON_ID column if not given.
         """
-        # Create the folder structure inside the game date folder
-        game_date_dir = os.path.join(self.cache_dir, game_date)
-        logs_dir = os.path.join(game_date_dir, "player_logs")
-        
-        # Create the logs subfolder if it doesn't exist
-        if not os.path.exists(logs_dir):
-            os.makedirs(logs_dir)
-        
-        # Cache the player logs as a joblib file
-        filename = f"player_{player_id}_logs_{game_date}.joblib"
-        filepath = os.path.join(logs_dir, filename)
-        joblib.dump(player_logs, filepath)
-        print(f"Player logs cached for Player ID {player_id} on {game_date} as {filename}")
-
+        if season is None:
+            season = season_from_season_id(player_logs['SEASON_ID'].iloc[0])
+        self.save(CacheKey.player_logs(player_id, season, game_date=game_date), player_logs)
 
-    def load_player_logs(self, player_id, season):
+    def load_player_logs(self, player_id, season, game_date=None, game_id=None):
         """
         Loads cached player logs for a given player and season.
+        
+        Args:
+            player_id (int): The player's ID.
+            season (str): The season in 'YYYY-YY' format.
+            game_date (str, optional): Game date the logs are loaded for (recorded on the key).
+            game_id (str, optional): Game ID the logs are loaded for (recorded on the key).
+        
+        Returns:
+            pd.DataFrame: The cached logs, or None if not found.
         """
-        file_path = os.path.join(f"cached_data/player_logs/{season}/{player_id}.joblib")
-        if os.path.exists(file_path):
-            return joblib.load(file_path)
-        return None
+        return self.load(CacheKey.player_logs(player_id, season, game_date=game_date, game_id=game_id))
 
@@ -0,0 +1,208 @@
+# cache_metrics.py
+
+import json
+import bisect
+import threading
+from cache_keys import ENTITIES, parse_cache_path
+
+try:
+    from prometheus_client import CollectorRegistry, generate_latest, start_http_server
+    from prometheus_client.core import CounterMetricFamily, HistogramMetricFamily
+except ImportError:
+    CollectorRegistry = None
+
+# Key categories tracked separately so cache policy can be tuned per data type: one per
+# cache entity, plus 'other' for files that are not cache entries
+CATEGORIES = list(ENTITIES) + ["other"]
+
+# Operations that are timed
+OPERATIONS = ["hit", "miss", "write"]
+
+# Upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float("inf")]
+
+
+def categorize_cache_path(filepath):
+    """
+    Maps a cache file path or filename to one of the tracked key categories.
+
+    Args:
+        filepath (str): The cache file path or filename.
+
+    Returns:
+        str: The entity of the parsed cache key (e.g., 'team_stats', 'league_table'), or 'other'.
+    """
+    key = parse_cache_path(filepath)
+    return key.entity if key is not None else "other"
+
+
+class _LatencyHistogram:
+    """
+    Fixed-bucket latency histogram (cumulative counts are derived on export).
+    """
+    def __init__(self):
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def cumulative_buckets(self):
+        cumulative = []
+        running = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.bucket_counts):
+            running += count
+            cumulative.append(("+Inf" if bound == float("inf") else str(bound), running))
+        return cumulative
+
+
+class CacheMetrics:
+    """
+    Thread-safe counters and latency histograms for cache hits, misses and writes,
+    split by key category.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Clears all recorded counters and histograms.
+        """
+        with self._lock:
+            self._counts = {(category, op): 0 for category in CATEGORIES for op in OPERATIONS}
+            self._bytes = {(category, direction): 0 for category in CATEGORIES for direction in ("read", "written")}
+            self._latency = {(category, op): _LatencyHistogram() for category in CATEGORIES for op in OPERATIONS}
+
+    def record(self, filepath, operation, seconds, num_bytes=0):
+        """
+        Records a single cache operation.
+
+        Args:
+            filepath (str): The cache file path the operation touched.
+            operation (str): 'hit', 'miss' or 'write'.
+            seconds (float): How long the operation took.
+            num_bytes (int): Bytes read (hits) or written (writes).
+        """
+        category = categorize_cache_path(filepath)
+        with self._lock:
+            self._counts[(category, operation)] += 1
+            self._latency[(category, operation)].observe(seconds)
+            if operation == "hit":
+                self._bytes[(category, "read")] += num_bytes
+            elif operation == "write":
+                self._bytes[(category, "written")] += num_bytes
+
+    def hit_ratio(self, category=None):
+        """
+        Returns the hit ratio for one category, or across all categories if None.
+
+        Returns:
+            float: hits / (hits + misses), or None if there were no lookups.
+        """
+        categories = [category] if category else CATEGORIES
+        with self._lock:
+            hits = sum(self._counts[(c, "hit")] for c in categories)
+            misses = sum(self._counts[(c, "miss")] for c in categories)
+        lookups = hits + misses
+        return hits / lookups if lookups else None
+
+    def snapshot(self):
+        """
+        Returns all metrics as a plain dictionary keyed by category.
+
+        Returns:
+            dict: {category: {'hits', 'misses', 'writes', 'hit_ratio', 'bytes_read',
+                   'bytes_written', 'latency': {operation: {...}}}}
+        """
+        with self._lock:
+            result = {}
+            for category in CATEGORIES:
+                hits = self._counts[(category, "hit")]
+                misses = self._counts[(category, "miss")]
+                latency = {}
+                for op in OPERATIONS:
+                    histogram = self._latency[(category, op)]
+                    latency[op] = {
+                        "count": histogram.count,
+                        "sum_seconds": histogram.total,
+                        "mean_seconds": histogram.total / histogram.count if histogram.count else None,
+                        "buckets": dict(histogram.cumulative_buckets()),
+                    }
+                result[category] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "writes": self._counts[(category, "write")],
+                    "hit_ratio": hits / (hits + misses) if hits + misses else None,
+                    "bytes_read": self._bytes[(category, "read")],
+                    "bytes_written": self._bytes[(category, "written")],
+                    "latency": latency,
+                }
+            return result
+
+    def to_json(self, path=None, indent=2):
+        """
+        Dumps the metrics snapshot as JSON.
+
+        Args:
+            path (str, optional): If given, the JSON is also written to this file.
+            indent (int): JSON indentation.
+
+        Returns:
+            str: The JSON document.
+        """
+        document = json.dumps(self.snapshot(), indent=indent)
+        if path:
+            with open(path, "w") as f:
+                f.write(document)
+        return document
+
+    def collect(self):
+        """
+        prometheus_client collector hook that yields the current metric families.
+        """
+        snapshot = self.snapshot()
+        operations = CounterMetricFamily("bball_cache_operations", "Cache operations by category and result", labels=["category", "operation"])
+        transferred = CounterMetricFamily("bball_cache_bytes", "Bytes read from and written to the cache", labels=["category", "direction"])
+        latency = HistogramMetricFamily("bball_cache_latency_seconds", "Cache operation latency", labels=["category", "operation"])
+        for category, stats in snapshot.items():
+            operations.add_metric([category, "hit"], stats["hits"])
+            operations.add_metric([category, "miss"], stats["misses"])
+            operations.add_metric([category, "write"], stats["writes"])
+            transferred.add_metric([category, "read"], stats["bytes_read"])
+            transferred.add_metric([category, "written"], stats["bytes_written"])
+            for op, histogram in stats["latency"].items():
+                latency.add_metric([category, op], list(histogram["buckets"].items()), histogram["sum_seconds"])
+        yield operations
+        yield transferred
+        yield latency
+
+    def _registry(self):
+        if CollectorRegistry is None:
+            raise ImportError("prometheus_client is required for Prometheus export.")
+        registry = CollectorRegistry()
+        registry.register(self)
+        return registry
+
+    def to_prometheus(self):
+        """
+        Renders the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics text.
+        """
+        return generate_latest(self._registry()).decode("utf-8")
+
+    def start_prometheus_server(self, port=8000, addr="0.0.0.0"):
+        """
+        Serves the metrics on http://<addr>:<port>/metrics from a background thread.
+
+        Args:
+            port (int): The port to listen on.
+            addr (str): The address to bind.
+        """
+        start_http_server(port, addr=addr, registry=self._registry())
+        print(f"Serving cache metrics on http://{addr}:{port}/metrics")
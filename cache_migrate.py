@@ -0,0 +1,180 @@
+# cache_migrate.py
+"""
+Rewrites an existing cache directory into the current schema in one pass:
+legacy file names are moved to their canonical CacheKey paths, placeholder frames are
+normalized and every entry is written in the versioned envelope. Player stats frames are
+then consolidated and tagged (see player_tags.py).
+
+Usage:
+    python cache_migrate.py --cache-dir cached_data --workers 8
+    python cache_migrate.py --dry-run
+"""
+
+import os
+import argparse
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import joblib
+import pandas as pd
+from cache_keys import CacheKey, PLAYER_LOGS, parse_cache_path, season_from_season_id
+from cache_manager import (SCHEMA_VERSION, SCHEMA_MARKER_FILE, normalize_legacy_data, unwrap_cache_entry,
+                           wrap_cache_entry, write_schema_marker)
+from player_tags import normalize_cached_player_stats
+
+# Folders in the cache directory that hold other data
+NON_CACHE_DIRS = ("schedule", "checkpoints", "watermarks")
+
+
+def _read_entry(filepath):
+    """
+    Loads a cache file and returns (schema_version, normalized data).
+    """
+    version, data = unwrap_cache_entry(joblib.load(filepath))
+    if version < SCHEMA_VERSION:
+        data = normalize_legacy_data(data)
+    return version, data
+
+
+def _resolve_key(cache_dir, relpath):
+    """
+    Parses a cache file path into its full key. Player logs stored without a season in the
+    file name get their season from the frame's SEASON_ID column.
+
+    Returns:
+        CacheKey: The key, or None if the file is not a recognized cache entry.
+    """
+    key = parse_cache_path(relpath)
+    if key is None or key.entity != PLAYER_LOGS or key.season is not None:
+        return key
+    _, logs = _read_entry(os.path.join(cache_dir, relpath))
+    if not isinstance(logs, pd.DataFrame) or logs.empty or "SEASON_ID" not in logs.columns:
+        return None
+    return CacheKey.player_logs(key.player_id, season_from_season_id(logs["SEASON_ID"].iloc[0]),
+                                game_date=key.game_date, game_id=key.game_id)
+
+
+def plan_migration(cache_dir):
+    """
+    Scans the cache directory and groups every cache file by the canonical path it belongs at.
+
+    Args:
+        cache_dir (str): The cache directory.
+
+    Returns:
+        tuple: ({canonical relpath: (CacheKey, [source relpaths])}, [unrecognized relpaths])
+    """
+    groups = defaultdict(list)
+    keys = {}
+    unrecognized = []
+    for root, dirs, files in os.walk(cache_dir):
+        # Schedule snapshots, checkpoints and watermarks are not cache entries
+        if root == cache_dir:
+            dirs[:] = [name for name in dirs if name not in NON_CACHE_DIRS]
+        for file_name in files:
+            if file_name == SCHEMA_MARKER_FILE or ".tmp" in file_name:
+                continue
+            relpath = os.path.relpath(os.path.join(root, file_name), cache_dir)
+            key = _resolve_key(cache_dir, relpath)
+            if key is None:
+                unrecognized.append(relpath)
+                continue
+            target = key.relpath()
+            groups[target].append(relpath)
+            keys[target] = key
+    return {target: (keys[target], sorted(sources)) for target, sources in groups.items()}, unrecognized
+
+
+def _size(data):
+    return len(data) if isinstance(data, pd.DataFrame) else 0
+
+
+def migrate_group(cache_dir, target, key, sources, dry_run=False):
+    """
+    Migrates every source file of one canonical path. When several legacy files map to the
+    same key (e.g., the same player's logs cached for two games), the largest frame is kept.
+
+    Args:
+        cache_dir (str): The cache directory.
+        target (str): The canonical relative path.
+        key (CacheKey): The key of the target.
+        sources (list): Relative paths of the files to migrate into the target.
+        dry_run (bool): If True, only report what would change.
+
+    Returns:
+        dict: Summary with 'target', 'rewritten' and 'removed' entries.
+    """
+    best_data, best_version = None, None
+    for relpath in sources:
+        version, data = _read_entry(os.path.join(cache_dir, relpath))
+        if best_data is None or _size(data) > _size(best_data):
+            best_data, best_version = data, version
+
+    stale_sources = [relpath for relpath in sources if relpath != target]
+    needs_rewrite = best_version < SCHEMA_VERSION or stale_sources
+    if dry_run:
+        return {"target": target, "rewritten": bool(needs_rewrite), "removed": stale_sources}
+
+    if needs_rewrite:
+        target_path = os.path.join(cache_dir, target)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        temp_path = f"{target_path}.tmp{os.getpid()}"
+        joblib.dump(wrap_cache_entry(best_data, key), temp_path)
+        os.replace(temp_path, target_path)
+    for relpath in stale_sources:
+        os.remove(os.path.join(cache_dir, relpath))
+    return {"target": target, "rewritten": bool(needs_rewrite), "removed": stale_sources}
+
+
+def migrate_cache(cache_dir="cached_data", workers=None, dry_run=False):
+    """
+    Migrates the whole cache directory to the current schema, in parallel.
+
+    Args:
+        cache_dir (str): The cache directory.
+        workers (int, optional): Number of worker processes (defaults to the CPU count).
+        dry_run (bool): If True, only report what would change.
+
+    Returns:
+        dict: Counts of 'rewritten', 'removed', 'unrecognized' and 'tagged' files.
+    """
+    start = time.perf_counter()
+    groups, unrecognized = plan_migration(cache_dir)
+    print(f"Found {sum(len(sources) for _, sources in groups.values())} cache files for {len(groups)} keys")
+
+    rewritten = removed = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(migrate_group, cache_dir, target, key, sources, dry_run)
+                   for target, (key, sources) in groups.items()]
+        for future in as_completed(futures):
+            result = future.result()
+            rewritten += result["rewritten"]
+            removed += len(result["removed"])
+            for relpath in result["removed"]:
+                print(f"{'Would move' if dry_run else 'Moved'} {relpath} -> {result['target']}")
+
+    if not dry_run:
+        # Remove folders emptied by moving legacy files out of them
+        for root, dirs, files in os.walk(cache_dir, topdown=False):
+            if root != cache_dir and not os.listdir(root):
+                os.rmdir(root)
+        write_schema_marker(cache_dir)
+
+    for relpath in unrecognized:
+        print(f"Skipped unrecognized file {relpath}")
+    print(f"{'Would rewrite' if dry_run else 'Rewrote'} {rewritten} entries and "
+          f"{'would remove' if dry_run else 'removed'} {removed} legacy files "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    # Frames cached before ingest-time tagging are consolidated and tagged once here
+    tagged = 0 if dry_run else normalize_cached_player_stats(cache_dir)
+    return {"rewritten": rewritten, "removed": removed, "unrecognized": len(unrecognized), "tagged": tagged}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate the cache directory to the current schema.")
+    parser.add_argument("--cache-dir", default="cached_data", help="Cache directory to migrate.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes.")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing anything.")
+    args = parser.parse_args()
+    migrate_cache(args.cache_dir, workers=args.workers, dry_run=args.dry_run)
@@ -10,6 +10,8 @@ import requests
 import re
 import time
 from cache_manager import CacheManager
+from cache_keys import CacheKey, PLAYER_STATS, TEAM_GAME_LOG, PLAYER_GAME_LOG
+from schedule_store import get_schedule_store
 import os
 
 
@@ -26,6 +28,7 @@ from nba_api.stats.endpoints import teamestimatedmetrics, playerestimatedmetrics
 from nba_api.stats.endpoints import teamdashboardbygeneralsplits
 from nba_api.stats.endpoints import teaminfocommon
 from nba_api.stats.endpoints import PlayerVsPlayer, matchupsrollup
+from nba_api.stats.endpoints import leaguedashteamstats, leaguegamelog, leaguedashplayerstats
 
 pause_time = 10
 
@@ -42,17 +45,21 @@ class NBATeamRosters:
         self.rosters = {}
         self.standings_df = None
         self.schedule_df = None
+        self.schedule_store = None
         self.player_stats = {}
         self.fetch_teams()
         self.cache_manager = CacheManager()
     
     def load_schedule(self, csv_path):
         """
-        Loads the NBA schedule from a CSV file into the class.
+        Loads the NBA schedule from a CSV file into the class. The CSV is parsed once into the
+        schedule store and reused until the file changes.
         Args:
             csv_path (str): The file path to the schedule CSV file.
         """
-        self.schedule_df = pd.read_csv(csv_path)
+        self.schedule_store = get_schedule_store(csv_path)
+        # Copy so add_team_ids_to_schedule doesn't modify the shared store frame
+        self.schedule_df = self.schedule_store.full_schedule().copy()
         print(f"Schedule loaded: {len(self.schedule_df)} games")
     
     def get_full_schedule(self):
@@ -77,7 +84,9 @@ class NBATeamRosters:
         Returns:
             pd.DataFrame: Filtered DataFrame with the team's games (both home and away).
         """
-        if self.schedule_df is not None:
+        if self.schedule_store is not None:
+            return self.schedule_store.games_for_team(team_abbr)
+        elif self.schedule_df is not None:
             # Filter games where the team is either the home or visiting team
             filtered_schedule = self.schedule_df[
                 (self.schedule_df['Home Team Abbreviation'] == team_abbr) | 
@@ -88,6 +97,24 @@ class NBATeamRosters:
             print("Schedule DataFrame not loaded.")
             return None
     
+    def get_schedule_context(self, game_id, team_abbr=None):
+        """
+        Returns rest days, back-to-back, games-in-last-N-days and home/road streak context for a game.
+        
+        Args:
+            game_id (str or int): The game ID.
+            team_abbr (str, optional): If given, only that team's context is returned.
+        
+        Returns:
+            dict: The team's context, or {'home': ..., 'away': ...} for both teams; None if not found.
+        """
+        if self.schedule_store is None:
+            print("Schedule not loaded.")
+            return None
+        if team_abbr is not None:
+            return self.schedule_store.context(game_id, team_abbr)
+        return self.schedule_store.game_context(game_id)
+
     def map_team_abbreviations_to_ids(self, abbreviation):
         """
         Maps a team abbreviation to the corresponding team ID.
@@ -124,7 +151,9 @@ class NBATeamRosters:
         Returns:
             pd.DataFrame: DataFrame containing the games scheduled for the specified date.
         """
-        if self.schedule_df is not None:
+        if self.schedule_store is not None:
+            return self.schedule_store.games_on(today)
+        elif self.schedule_df is not None:
             todays_games = self.schedule_df[self.schedule_df["Game Date"] == today]
             return todays_games
         else:
@@ -480,6 +509,169 @@ class NBATeamRosters:
             print(f"Error fetching team estimated metrics for season {season}: {e}")
             return None
     
+    def fetch_league_team_stats(self, season, date_to=None):
+        """
+        Fetches the per-game stats of all 30 teams for a season in three league-wide calls:
+        the Base and Opponent team dashboards and the estimated metrics.
+        
+        Args:
+            season (str): The NBA season in 'YYYY-YY' format (e.g., '2023-24').
+            date_to (str, optional): Last game date in 'YYYY-MM-DD' format for a season in progress.
+                                     The estimated metrics are not date-filtered by the API.
+        
+        Returns:
+            pd.DataFrame: One row per team with TEAM_ID, TEAM_ABBREVIATION, SEASON_YEAR, the per-game
+                          box score stats, PTS_PG, OPP_PTS_PG and the E_* metrics, or None on error.
+        """
+        date_to = pd.Timestamp(date_to).strftime('%m/%d/%Y') if date_to else ''
+        try:
+            base = leaguedashteamstats.LeagueDashTeamStats(
+                season=season,
+                season_type_all_star='Regular Season',
+                measure_type_detailed_defense='Base',
+                per_mode_detailed='PerGame',
+                date_to_nullable=date_to
+            ).get_data_frames()[0]
+            time.sleep(pause_time)
+            opponent = leaguedashteamstats.LeagueDashTeamStats(
+                season=season,
+                season_type_all_star='Regular Season',
+                measure_type_detailed_defense='Opponent',
+                per_mode_detailed='PerGame',
+                date_to_nullable=date_to
+            ).get_data_frames()[0]
+            time.sleep(pause_time)
+        except Exception as e:
+            print(f"Error fetching league team stats for season {season}: {e}")
+            return None
+        metrics = self.fetch_team_estimated_metrics(season)
+        if metrics is None:
+            return None
+
+        # Drop the ranking columns and keep only the metrics not already in the dashboard
+        base = base.drop(columns=[col for col in base.columns if col.endswith('_RANK')])
+        metrics = metrics[['TEAM_ID'] + [col for col in metrics.columns if col.startswith('E_') and not col.endswith('_RANK')]]
+        league_stats = base.merge(opponent[['TEAM_ID', 'OPP_PTS']], on='TEAM_ID', how='left')
+        league_stats = league_stats.merge(metrics, on='TEAM_ID', how='left')
+        league_stats = league_stats.rename(columns={'OPP_PTS': 'OPP_PTS_PG'})
+        league_stats['PTS_PG'] = league_stats['PTS']
+        league_stats['TEAM_ABBREVIATION'] = league_stats['TEAM_ID'].map(self.teams_df['abbreviation'])
+        league_stats['SEASON_YEAR'] = season
+        return league_stats
+
+    def get_league_team_stats(self, season, date_to=None):
+        """
+        Returns the per-game stats of all 30 teams for a season, fetching them only if they are
+        not cached yet. A finished season is cached once; a season in progress once per date_to.
+        
+        Args:
+            season (str): The NBA season in 'YYYY-YY' format (e.g., '2023-24').
+            date_to (str, optional): Last game date in 'YYYY-MM-DD' format for a season in progress.
+        
+        Returns:
+            pd.DataFrame: See fetch_league_team_stats.
+        """
+        key = CacheKey.league_table(season, 'team_stats', date_to)
+        league_stats = self.cache_manager.load(key)
+        if league_stats is not None:
+            return league_stats
+        league_stats = self.fetch_league_team_stats(season, date_to=date_to)
+        if league_stats is not None and not league_stats.empty:
+            self.cache_manager.save(key, league_stats)
+        return league_stats
+
+    def fetch_league_game_log(self, season, player_or_team='T'):
+        """
+        Fetches every regular season box score line of a season in one league-wide call.
+        
+        Args:
+            season (str): The NBA season in 'YYYY-YY' format (e.g., '2024-25').
+            player_or_team (str): 'T' for one row per team game, 'P' for one row per player game.
+        
+        Returns:
+            pd.DataFrame: The game log with GAME_ID, GAME_DATE, TEAM_ABBREVIATION, MATCHUP and PTS
+                          (plus PLAYER_ID and PLAYER_NAME for player rows), or None on error.
+        """
+        try:
+            game_log = leaguegamelog.LeagueGameLog(
+                season=season,
+                season_type_all_star='Regular Season',
+                player_or_team_abbreviation=player_or_team
+            ).get_data_frames()[0]
+            time.sleep(pause_time)
+            return game_log
+        except Exception as e:
+            print(f"Error fetching league game log ({player_or_team}) for season {season}: {e}")
+            return None
+
+    def get_league_game_log(self, season, player_or_team='T', through_date=None):
+        """
+        Returns the league game log of a season, fetching it only if it is not cached yet or
+        does not reach through_date.
+        
+        Args:
+            season (str): The NBA season in 'YYYY-YY' format (e.g., '2024-25').
+            player_or_team (str): 'T' for team games, 'P' for player games.
+            through_date (str, optional): Last game date in 'YYYY-MM-DD' format the log must cover.
+        
+        Returns:
+            pd.DataFrame: See fetch_league_game_log.
+        """
+        key = CacheKey.league_table(season, TEAM_GAME_LOG if player_or_team == 'T' else PLAYER_GAME_LOG)
+        game_log = self.cache_manager.load(key)
+        if game_log is not None and (through_date is None or game_log['GAME_DATE'].max() >= through_date):
+            return game_log
+        fetched = self.fetch_league_game_log(season, player_or_team=player_or_team)
+        if fetched is None or fetched.empty:
+            return game_log
+        self.cache_manager.save(key, fetched)
+        return fetched
+
+    def fetch_league_player_stats(self, season):
+        """
+        Fetches the regular season totals of every player in a season in one league-wide call.
+        
+        Args:
+            season (str): The NBA season in 'YYYY-YY' format (e.g., '2023-24').
+        
+        Returns:
+            pd.DataFrame: One row per player with PLAYER_ID, PLAYER_NAME, TEAM_ABBREVIATION (the
+                          player's last team of the season), GP and the box score totals, or None on error.
+        """
+        try:
+            player_stats = leaguedashplayerstats.LeagueDashPlayerStats(
+                season=season,
+                season_type_all_star='Regular Season',
+                per_mode_detailed='Totals'
+            ).get_data_frames()[0]
+            time.sleep(pause_time)
+            return player_stats
+        except Exception as e:
+            print(f"Error fetching league player stats for season {season}: {e}")
+            return None
+
+    def get_league_player_stats(self, season, refresh=False):
+        """
+        Returns the league-wide player totals of a season, fetching them only if they are not
+        cached yet or refresh is set (for a season in progress).
+        
+        Args:
+            season (str): The NBA season in 'YYYY-YY' format (e.g., '2023-24').
+            refresh (bool): If True, fetch even if the table is cached.
+        
+        Returns:
+            pd.DataFrame: See fetch_league_player_stats.
+        """
+        key = CacheKey.league_table(season, PLAYER_STATS)
+        player_stats = None if refresh else self.cache_manager.load(key)
+        if player_stats is not None:
+            return player_stats
+        fetched = self.fetch_league_player_stats(season)
+        if fetched is None or fetched.empty:
+            return self.cache_manager.load(key) if refresh else None
+        self.cache_manager.save(key, fetched)
+        return fetched
+
     def fetch_player_estimated_metrics(self, season):
         """
         Fetches player estimated metrics for a given season.
@@ -526,71 +718,58 @@ class NBATeamRosters:
             print(f"Error fetching TeamSeasonRanks for team ID {team_id}: {e}")
             return None
 
-    def fetch_and_merge_team_stats(self, team_abbr, previous_season='2023-24', current_season='2024-25'):
+    def fetch_and_merge_team_stats_for_season(self, team_abbr, season):
         """
-        Fetches and merges team stats, estimated metrics, and team season ranks for both previous and current seasons.
+        Fetches and merges team stats, estimated metrics, and team season ranks for a single season.
         
         Args:
-            self (NBATeamRosters): The NBA data object (within the class).
             team_abbr (str): Team abbreviation (e.g., 'BOS', 'NYK').
-            previous_season (str): Previous season year format (default: '2023-24').
-            current_season (str): Current season year format (default: '2024-25').
+            season (str): Season in 'YYYY-YY' format (e.g., '2023-24').
     
         Returns:
-            dict: Dictionary with merged DataFrames for both previous and current seasons.
+            pd.DataFrame: Merged per-game team stats for the season.
         """
-        # Fetch team stats for both seasons
-        previous_season_stats = self.fetch_team_stats(team_abbr, season=previous_season)
-        
-        time.sleep(pause_time)
-        
-        current_season_stats = self.fetch_team_stats(team_abbr, season=current_season)
-    
-        # Drop unnecessary ranking columns
-        columns_to_drop = ['GP_RANK', 'W_RANK', 'L_RANK', 'W_PCT_RANK', 'MIN_RANK']
-        
-        previous_season_stats = previous_season_stats.drop(columns=columns_to_drop)
-        current_season_stats = current_season_stats.drop(columns=columns_to_drop)
-    
-        # Fetch estimated metrics for both seasons
-        previous_season_metrics = self.fetch_team_estimated_metrics(season=previous_season)
+        # Fetch team stats
+        season_stats = self.fetch_team_stats(team_abbr, season=season)
 
         time.sleep(pause_time)
-        
-        current_season_metrics = self.fetch_team_estimated_metrics(season=current_season)
+
+        # Fetch estimated metrics
+        season_metrics = self.fetch_team_estimated_metrics(season=season)
 
         time.sleep(pause_time)
-        
-        # Merge team stats with estimated metrics
-        previous_merged_stats = previous_season_stats.merge(previous_season_metrics, on='TEAM_ID', how='left')
-        current_merged_stats = current_season_stats.merge(current_season_metrics, on='TEAM_ID', how='left')
-    
-        # Fetch team season ranks from TeamInfoCommon for both seasons
+
+        # Fetch team season ranks from TeamInfoCommon
         team_id = self.get_team_id_from_abbreviation(team_abbr)
+        team_info = self.fetch_team_season_ranks(team_id, season)
 
-        previous_team_info = self.fetch_team_season_ranks(team_id, previous_season)
-        
         time.sleep(pause_time)
-        
-        current_team_info = self.fetch_team_season_ranks(team_id, current_season)
 
-        time.sleep(pause_time)
+        return self.merge_team_stats(team_abbr, season_stats, season_metrics, team_info)
+
+    def merge_team_stats(self, team_abbr, season_stats, season_metrics, team_info):
+        """
+        Merges a team's dashboard stats, the league's estimated metrics and the team's season ranks
+        into per-game team stats. No API calls are made here.
         
-        # Merge team season ranks with the stats data
-        previous_merged_stats = previous_merged_stats.merge(previous_team_info[['TEAM_ID', 'PTS_RANK', 'PTS_PG', 'REB_RANK', 'REB_PG', 'AST_RANK', 'AST_PG', 'OPP_PTS_RANK', 'OPP_PTS_PG']], on='TEAM_ID', how='left')
-        current_merged_stats = current_merged_stats.merge(current_team_info[['TEAM_ID', 'PTS_RANK', 'PTS_PG', 'REB_RANK', 'REB_PG', 'AST_RANK', 'AST_PG', 'OPP_PTS_RANK', 'OPP_PTS_PG']], on='TEAM_ID', how='left')
+        Args:
+            team_abbr (str): Team abbreviation (e.g., 'BOS', 'NYK').
+            season_stats (pd.DataFrame): TeamDashboardByGeneralSplits overall stats for the team.
+            season_metrics (pd.DataFrame): TeamEstimatedMetrics for the season (all teams).
+            team_info (pd.DataFrame): TeamInfoCommon season ranks for the team.
     
+        Returns:
+            pd.DataFrame: Merged per-game team stats for the season.
+        """
+        # Drop unnecessary ranking columns and merge the estimated metrics with the team stats
+        season_stats = season_stats.drop(columns=['GP_RANK', 'W_RANK', 'L_RANK', 'W_PCT_RANK', 'MIN_RANK'])
+        merged_stats = season_stats.merge(season_metrics, on='TEAM_ID', how='left')
+
+        # Merge the team season ranks with the stats data
+        merged_stats = merged_stats.merge(team_info[['TEAM_ID', 'PTS_RANK', 'PTS_PG', 'REB_RANK', 'REB_PG', 'AST_RANK', 'AST_PG', 'OPP_PTS_RANK', 'OPP_PTS_PG']], on='TEAM_ID', how='left')
+
         # Rename columns for clarity and consistency
-        previous_merged_stats = previous_merged_stats.rename(columns={
-            'TEAM_NAME_x': 'TEAM_NAME',
-            'GP_x': 'GP',
-            'W_x': 'W',
-            'L_x': 'L',
-            'W_PCT_x': 'W_PCT',
-            'MIN_x': 'MIN',
-        })
-    
-        current_merged_stats = current_merged_stats.rename(columns={
+        merged_stats = merged_stats.rename(columns={
             'TEAM_NAME_x': 'TEAM_NAME',
             'GP_x': 'GP',
             'W_x': 'W',
@@ -599,32 +778,36 @@ class NBATeamRosters:
             'MIN_x': 'MIN',
         })
 
-        # Add the team abbreviation to both DataFrames
-        previous_merged_stats['TEAM_ABBREVIATION'] = team_abbr
-        current_merged_stats['TEAM_ABBREVIATION'] = team_abbr
-    
+        # Add the team abbreviation to the DataFrame
+        merged_stats['TEAM_ABBREVIATION'] = team_abbr
+
         # Move 'TEAM_NAME' to the leftmost side of the DataFrame
-        def move_team_name_to_left(df):
-            columns = ['TEAM_NAME'] + [col for col in df.columns if col != 'TEAM_NAME']
-            return df[columns]
-    
-        previous_merged_stats = move_team_name_to_left(previous_merged_stats)
-        current_merged_stats = move_team_name_to_left(current_merged_stats)
-    
+        columns = ['TEAM_NAME'] + [col for col in merged_stats.columns if col != 'TEAM_NAME']
+        merged_stats = merged_stats[columns]
+
         # Drop unnecessary columns
         columns_to_drop_after_merge = ['GROUP_VALUE', 'GROUP_SET', 'TEAM_NAME_y', 'GP_y', 'W_y', 'L_y', 'W_PCT_y','MIN_y','GP_RANK','MIN_RANK','FGM_RANK','FGA_RANK','FG_PCT_RANK','FG3M_RANK','FG3A_RANK','FG3_PCT_RANK','FTM_RANK','FTA_RANK','FT_PCT_RANK','OREB_RANK','DREB_RANK','REB_RANK_x','AST_RANK_x','TOV_RANK','STL_RANK','BLK_RANK','BLKA_RANK','PF_RANK','PFD_RANK','PTS_RANK_x','PLUS_MINUS_RANK']
-        
-        previous_merged_stats = previous_merged_stats.drop(columns=columns_to_drop_after_merge, errors='ignore')
-        current_merged_stats = current_merged_stats.drop(columns=columns_to_drop_after_merge, errors='ignore')
+        merged_stats = merged_stats.drop(columns=columns_to_drop_after_merge, errors='ignore')
 
         # Convert cumulative stats to per-game stats
-        previous_merged_stats = self.convert_to_per_game_stats(previous_merged_stats)
-        current_merged_stats = self.convert_to_per_game_stats(current_merged_stats)
+        return self.convert_to_per_game_stats(merged_stats)
+
+    def fetch_and_merge_team_stats(self, team_abbr, previous_season='2023-24', current_season='2024-25'):
+        """
+        Fetches and merges team stats, estimated metrics, and team season ranks for both previous and current seasons.
         
-        # Return the final data as a dictionary
+        Args:
+            self (NBATeamRosters): The NBA data object (within the class).
+            team_abbr (str): Team abbreviation (e.g., 'BOS', 'NYK').
+            previous_season (str): Previous season year format (default: '2023-24').
+            current_season (str): Current season year format (default: '2024-25').
+    
+        Returns:
+            dict: Dictionary with merged DataFrames for both previous and current seasons.
+        """
         return {
-            'previous_season': previous_merged_stats,
-            'current_season': current_merged_stats
+            'previous_season': self.fetch_and_merge_team_stats_for_season(team_abbr, previous_season),
+            'current_season': self.fetch_and_merge_team_stats_for_season(team_abbr, current_season)
         }
 
     def get_team_stats_today_games(self, date, previous_season='2023-24', current_season='2024-25'):
@@ -1121,18 +1304,39 @@ class NBATeamRosters:
         Returns:
             pd.DataFrame: Cleaned DataFrame containing player stats and additional details for the given team.
         """
-        # Fetch the team roster and select important columns
+        # Fetch the team roster
         team_roster = self.get_team_roster(team_abbr)
-        team_roster = team_roster[['PLAYER_ID', 'PLAYER', 'HEIGHT']]  # Add 'HEIGHT' and other roster info as needed
+    
+        # Fetch career stats for each player in the roster
+        career_stats = [self.fetch_player_career_stats(player_id) for player_id in team_roster['PLAYER_ID']]
+
+        # Fetch estimated metrics for the season
+        player_metrics_df = self.fetch_player_estimated_metrics(season)
+
+        return self.merge_player_stats(team_abbr, season, team_roster, career_stats, player_metrics_df)
+
+    def merge_player_stats(self, team_abbr, season, team_roster, career_stats, player_metrics_df):
+        """
+        Builds a team's player stats for a season from already fetched data. No API calls are made here,
+        so the same career stats can be reused for several seasons.
+        
+        Args:
+            team_abbr (str): The team abbreviation (e.g., 'MEM', 'NYK').
+            season (str): The season to keep in 'YYYY-YY' format (e.g., '2022-23').
+            team_roster (pd.DataFrame): CommonTeamRoster frame for the team.
+            career_stats (list): PlayerCareerStats frames (or None) for the roster's players.
+            player_metrics_df (pd.DataFrame): PlayerEstimatedMetrics for the season.
+            
+        Returns:
+            pd.DataFrame: Cleaned DataFrame containing player stats and additional details for the given team.
+        """
+        # Select important roster columns
+        team_roster = team_roster[['PLAYER_ID', 'PLAYER', 'HEIGHT', 'POSITION']]  # Add 'HEIGHT' and other roster info as needed
     
         # Initialize list to store each player's seasonal stats
         player_stats_list = []
         
-        # Fetch stats for each player in the roster
-        for _, player in team_roster.iterrows():
-            player_id = player['PLAYER_ID']
-            player_stats = self.fetch_player_career_stats(player_id)
-    
+        for player_stats in career_stats:
             if player_stats is not None and not player_stats.empty:
                 # Filter to keep only stats from the specified season
                 player_stats = player_stats[player_stats['SEASON_ID'] == season]
@@ -1147,15 +1351,14 @@ class NBATeamRosters:
             print(f"No player stats available for {team_abbr} in season {season}")
             return pd.DataFrame()  # Return empty DataFrame if no player stats found
     
-        # Merge player stats with team roster to add player names and height
+        # Merge player stats with team roster to add player names, height and position
         team_stats = team_stats.merge(
             team_roster,
             on='PLAYER_ID',
             how='left'
         )
 
-        # Fetch estimated metrics and merge with player stats
-        player_metrics_df = self.fetch_player_estimated_metrics(season)
+        # Merge estimated metrics with player stats
         team_stats = team_stats.merge(player_metrics_df, on='PLAYER_ID', how='left')
     
         # Remove duplicate columns or unwanted columns with '_y' suffix
@@ -1176,8 +1379,9 @@ class NBATeamRosters:
                 if col in team_stats.columns:
                     team_stats[col] = (team_stats[col] / team_stats['GP']).round(2)
         
-        # Move 'PLAYER' and 'HEIGHT' to the beginning and position 'PTS' right after 'MIN'
-        columns = ['PLAYER', 'HEIGHT'] + [col for col in team_stats.columns if col not in ['PLAYER', 'HEIGHT', 'GP', 'MIN', 'PTS']]
+        # Move 'PLAYER', 'HEIGHT' and 'POSITION' to the beginning and position 'PTS' right after 'MIN'
+        leading = [col for col in ['PLAYER', 'HEIGHT', 'POSITION', 'GP', 'MIN', 'PTS'] if col in team_stats.columns]
+        columns = leading + [col for col in team_stats.columns if col not in leading]
         team_stats = team_stats[columns]
     
         return team_stats
@@ -1224,18 +1428,13 @@ class NBATeamRosters:
         
         # Sort players by total minutes ('MIN') and select the top N players
         top_players = team_roster.sort_values(by='MIN', ascending=False).head(top_n)
-    
-        # Cache player logs directory structure
-        log_dir = os.path.join(self.cache_manager.cache_dir, game_date)
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
         
         # Loop through each player and fetch their logs
         for _, player in top_players.iterrows():
             player_id = player['PLAYER_ID']
             
             # Check if logs are already cached
-            cached_logs = self.cache_manager.load_player_logs(player_id, season)
+            cached_logs = self.cache_manager.load_player_logs(player_id, season, game_date=game_date)
             if cached_logs is not None:
                 print(f"Logs already cached for Player ID {player_id}. Skipping.")
                 continue
@@ -1246,7 +1445,7 @@ class NBATeamRosters:
             
             if player_logs is not None and not player_logs.empty:
                 # Cache the player logs
-                self.cache_manager.cache_player_logs(player_logs, player_id, season, log_dir)
+                self.cache_manager.cache_player_logs(player_logs, player_id, season)
                 print(f"Cached logs for Player ID {player_id}")
             else:
                 print(f"No game logs available for Player ID {player_id} in season {season}.")
@@ -1306,6 +1505,30 @@ class NBATeamRosters:
         )
         return response.get_data_frames()[0]
 
+    def get_matchup_rollup(self, season, per_mode="Totals", season_type="Regular Season"):
+        """
+        Returns the MatchupsRollup data for a season, fetching it only if it is not cached yet.
+        Totals for completed seasons never change, so they are cached once per season.
+        
+        Args:
+            season (str): Season in 'YYYY-YY' format.
+            per_mode (str): Per mode, e.g., 'Totals' or 'PerGame'.
+            season_type (str): Season type, e.g., 'Regular Season'.
+        
+        Returns:
+            pd.DataFrame: DataFrame with matchup rollup stats.
+        """
+        cacheable = per_mode == "Totals" and season_type == "Regular Season"
+        key = CacheKey.matchup_rollup(season)
+        if cacheable:
+            rollup = self.cache_manager.load(key)
+            if rollup is not None:
+                return rollup
+        rollup = self.fetch_matchup_rollup_direct(season=season, per_mode=per_mode, season_type=season_type)
+        if cacheable and rollup is not None and not rollup.empty:
+            self.cache_manager.save(key, rollup)
+        return rollup
+
     def fetch_current_season_matchup_rollup(self, per_mode="PerGame", season_type="Regular Season"):
         """
         Automatically fetches the matchup rollup data for the current NBA season.
@@ -0,0 +1,133 @@
+# conftest.py
+"""
+Synthetic data factories shared by the tests. Each fixture returns a function, so a test can
+build as many frames as it needs, each from its own seed.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Teams the traded players' other rows belong to
+OTHER_TEAMS = ["OKC", "UTA", "CHA"]
+# Home and visiting teams of the synthetic matchups, in game order
+HOME_TEAMS = ["BOS", "LAL", "MIA", "DEN", "PHX"]
+AWAY_TEAMS = ["NYK", "MIN", "ORL", "DAL", "SAC"]
+
+
+def _player_stats(team_abbr, first_id, n_players=13, n_traded=1, minutes_column="MIN", seed=0):
+    """
+    A player stats frame of one team's roster. The first n_traded players were traded: each
+    also has a 'TOT' row with the most minutes and a row for their other team. Minutes are
+    distinct, so sorts by minutes have no ties to order.
+    """
+    rng = np.random.default_rng(seed)
+    players = pd.DataFrame({
+        "PLAYER_ID": np.arange(first_id, first_id + n_players),
+        "PLAYER": [f"Player {first_id + index}" for index in range(n_players)],
+        "TEAM_ABBREVIATION": team_abbr,
+        "GP": 70,
+        minutes_column: rng.permutation(np.arange(n_players) * 2.5 + 4.0),
+        "E_USG_PCT": rng.uniform(0.1, 0.3, n_players).round(4),
+    })
+    traded = players.iloc[np.repeat(np.arange(n_traded), 2)].assign(
+        TEAM_ABBREVIATION=[team for index in range(n_traded) for team in ("TOT", OTHER_TEAMS[index])],
+        **{minutes_column: [minutes for index in range(n_traded) for minutes in (40.0 - index, 1.0 - 0.5 * index)]},
+    )
+    return pd.concat([players, traded], ignore_index=True)
+
+
+def _player_logs(player_ids, n_games=10, seed=0):
+    """
+    Long-format game logs ('Player_ID', 'Game_ID', 'PTS'), n_games per player.
+    """
+    rng = np.random.default_rng(seed)
+    player_ids = np.asarray(player_ids)
+    return pd.DataFrame({
+        "Player_ID": np.repeat(player_ids, n_games),
+        "Game_ID": np.tile(np.arange(n_games), len(player_ids)),
+        "PTS": rng.integers(0, 35, n_games * len(player_ids)).astype(float),
+    })
+
+
+def _game_logs(n_games=30, seed=0):
+    """
+    One player's game logs in the API's layout: newest game first, 'APR 14, 2024' dates,
+    'PTS', 'REB' and 'AST' columns.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2023-10-25", periods=n_games, freq="2D")
+    logs = pd.DataFrame({
+        "Game_ID": [f"00223{index:05d}" for index in range(n_games)],
+        "GAME_DATE": dates.strftime("%b %d, %Y").str.upper(),
+        "MATCHUP": np.where(rng.random(n_games) < 0.5, "BOS vs. NYK", "BOS @ NYK"),
+    })
+    for stat in ("PTS", "REB", "AST"):
+        logs[stat] = rng.integers(0, 35, n_games)
+    return logs.iloc[::-1].reset_index(drop=True)
+
+
+def _matchups(game_ids, seed=0):
+    """
+    A matchups table like modeling.py's matchup cells build, one row per game with both
+    teams' per-game totals and advanced ratings.
+    """
+    rng = np.random.default_rng(seed)
+    n_games = len(game_ids)
+    matchups = pd.DataFrame({
+        "Game ID": list(game_ids),
+        "Home Team Abbreviation": HOME_TEAMS[:n_games],
+        "Visiting Team Abbreviation": AWAY_TEAMS[:n_games],
+    })
+    for prefix in ("HOME_", "AWAY_"):
+        matchups[f"{prefix}FGA"] = rng.uniform(85, 92, n_games)
+        matchups[f"{prefix}FTA"] = rng.uniform(18, 25, n_games)
+        matchups[f"{prefix}OREB"] = rng.uniform(8, 12, n_games)
+        matchups[f"{prefix}TOV"] = rng.uniform(11, 15, n_games)
+        matchups[f"{prefix}PTS"] = rng.uniform(105, 120, n_games)
+        matchups[f"{prefix}E_OFF_RATING"] = rng.uniform(108, 118, n_games)
+        matchups[f"{prefix}E_DEF_RATING"] = rng.uniform(108, 118, n_games)
+        matchups[f"{prefix}E_PACE"] = rng.uniform(96, 102, n_games)
+    return matchups
+
+
+def _players_table(game_ids, players_per_side=4, seed=0):
+    """
+    A players table like projections.tagged_players_table returns, players_per_side tagged
+    players on each side of every game.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for game_index, game_id in enumerate(game_ids):
+        for side in ("home", "away"):
+            for index in range(players_per_side):
+                rows.append({"Game ID": game_id, "Side": side, "Team": f"T{game_index}{side[0]}", "Opponent": "X",
+                             "PLAYER_ID": 1000 * game_index + 100 * (side == "away") + index,
+                             "PLAYER": "Player", "PLAYER_TAG": 1,
+                             "OPP_E_DEF_RATING": rng.uniform(108, 118), "OPP_E_PACE": rng.uniform(96, 102)})
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def make_player_stats():
+    return _player_stats
+
+
+@pytest.fixture
+def make_player_logs():
+    return _player_logs
+
+
+@pytest.fixture
+def make_game_logs():
+    return _game_logs
+
+
+@pytest.fixture
+def make_matchups():
+    return _matchups
+
+
+@pytest.fixture
+def make_players_table():
+    return _players_table
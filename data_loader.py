@@ -1,37 +1,115 @@
 # data_loader.py
 
 import os
-import joblib
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from cache_manager import CacheManager
+from cache_keys import CacheKey, DATE_DIR_RE, TEAM_STATS, PLAYER_STATS, normalize_game_id, parse_cache_path
+from slate import GameSlate
+from player_tags import load_manual_tags, normalize_if_untagged
+from schedule_store import get_schedule_store
 
-def load_team_stats(game_date, team_type, team_abbr, season_type, stats_type="team_stats", cache_dir="cached_data"):
+# One CacheManager per cache directory, shared by all loaders in this module
+_cache_managers = {}
+
+def get_cache_manager(cache_dir):
+    """Returns the shared CacheManager for a cache directory."""
+    if cache_dir not in _cache_managers:
+        _cache_managers[cache_dir] = CacheManager(cache_dir)
+    return _cache_managers[cache_dir]
+
+def date_dirs(cache_dir, until_date=None):
     """
-    Loads cached team stats for the specified game date, team, and season type.
+    Returns the date directory names of the cache, newest first.
+
+    Args:
+        cache_dir (str): The base directory for cached data.
+        until_date (str, optional): Last date to include in 'YYYY-MM-DD' format (all dates if None).
+
+    Returns:
+        list: Date directory names (e.g., '2024-10-22').
+    """
+    if not os.path.isdir(cache_dir):
+        return []
+    dates = [name for name in os.listdir(cache_dir) if DATE_DIR_RE.match(name)]
+    if until_date is not None:
+        dates = [name for name in dates if name <= until_date]
+    return sorted(dates, reverse=True)
+
+# In-memory index of each date directory: {game_date_dir: (directory mtime, index)}
+_date_dir_indexes = {}
+
+def index_date_dir(game_date_dir):
+    """
+    Returns the index of a date directory, mapping (game_id, side, team, season_type, stats_type)
+    to a file name. Entries with game_id=None point at the first file for that team, so lookups
+    without a game ID still work. The directory is only re-scanned when its mtime changes.
+
+    Args:
+        game_date_dir (str): The date directory (e.g., 'cached_data/2024-10-22').
+
+    Returns:
+        dict: The index, or None if the directory does not exist.
+    """
+    try:
+        mtime = os.stat(game_date_dir).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    cached = _date_dir_indexes.get(game_date_dir)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    index = {}
+    for file_name in sorted(os.listdir(game_date_dir)):
+        key = parse_cache_path(file_name)
+        if key is None or key.entity not in (TEAM_STATS, PLAYER_STATS):
+            continue
+        team_key = (key.side, key.team_abbr, key.season_type, key.entity)
+        index[(key.game_id,) + team_key] = file_name
+        index.setdefault((None,) + team_key, file_name)
+
+    _date_dir_indexes[game_date_dir] = (mtime, index)
+    return index
+
+def _load_indexed_file(game_date, team_type, team_abbr, season_type, stats_type, game_id, cache_dir):
+    """
+    Looks a team or player stats file up in the date directory index and loads it.
     """
     game_date_dir = os.path.join(cache_dir, game_date)
-    
-    if not os.path.exists(game_date_dir):
+    index = index_date_dir(game_date_dir)
+
+    if index is None:
         print(f"Directory {game_date_dir} does not exist.")
         return pd.DataFrame()
-    
-    file_pattern = f"_{team_type}_team_{team_abbr}_{season_type}_{stats_type}.joblib"
-    
-    for file_name in os.listdir(game_date_dir):
-        if file_pattern in file_name:
-            filepath = os.path.join(game_date_dir, file_name)
-            try:
-                return joblib.load(filepath)
-            except Exception as e:
-                print(f"Error loading {file_name}: {e}")
-                return pd.DataFrame()
-    
-    print(f"No cached file found for pattern: {file_pattern}")
-    return pd.DataFrame()
 
+    lookup = (normalize_game_id(game_id), team_type, team_abbr.upper(), season_type, stats_type)
+    file_name = index.get(lookup)
+    if file_name is None:
+        print(f"No cached file found for {lookup}")
+        return pd.DataFrame()
 
-def load_player_stats(game_date, team_type, team_abbr, season_type, cache_dir="cached_data"):
+    try:
+        data = get_cache_manager(cache_dir).load_path(os.path.join(game_date_dir, file_name))
+        if stats_type == PLAYER_STATS:
+            data = normalize_if_untagged(data, load_manual_tags())
+        return data if data is not None else pd.DataFrame()
+    except Exception as e:
+        print(f"Error loading {file_name}: {e}")
+        return pd.DataFrame()
+
+def load_team_stats(game_date, team_type, team_abbr, season_type, stats_type="team_stats", cache_dir="cached_data", game_id=None):
+    """
+    Loads cached team stats for the specified game date, team, and season type.
+    If game_id is given, only that game's file is considered.
+    """
+    return _load_indexed_file(game_date, team_type, team_abbr, season_type, stats_type, game_id, cache_dir)
+
+
+def load_player_stats(game_date, team_type, team_abbr, season_type, cache_dir="cached_data", game_id=None):
     """
     Loads cached player stats for the specified game date, team, and season type.
+    Frames cached before ingest-time tagging are consolidated and tagged on load.
     
     Args:
         game_date (str): The game date in 'YYYY-MM-DD' format.
@@ -39,29 +117,96 @@ def load_player_stats(game_date, team_type, team_abbr, season_type, cache_dir="c
         team_abbr (str): Team abbreviation (e.g., 'MEM', 'NYK').
         season_type (str): 'prev' or 'curr' to indicate the season type.
         cache_dir (str): The base directory for cached data.
+        game_id (str, optional): Restricts the lookup to one game.
     
     Returns:
         pd.DataFrame: The loaded data as a DataFrame, or an empty DataFrame if not found.
     """
+    return _load_indexed_file(game_date, team_type, team_abbr, season_type, PLAYER_STATS, game_id, cache_dir)
+
+def load_slate(game_date, cache_dir="cached_data", max_workers=8):
+    """
+    Loads every cached team and player stats frame for a game date in parallel. Player
+    frames cached before ingest-time tagging are consolidated and tagged on load.
+
+    Args:
+        game_date (str): The game date in 'YYYY-MM-DD' format.
+        cache_dir (str): The base directory for cached data.
+        max_workers (int): Number of loader threads.
+
+    Returns:
+        GameSlate: The slate, keyed by game and side (empty if the date is not cached).
+    """
+    slate = GameSlate(game_date)
     game_date_dir = os.path.join(cache_dir, game_date)
-    
-    if not os.path.exists(game_date_dir):
+    index = index_date_dir(game_date_dir)
+
+    if index is None:
         print(f"Directory {game_date_dir} does not exist.")
-        return pd.DataFrame()
-    
-    file_pattern = f"_{team_type}_team_{team_abbr}_{season_type}.joblib"
-    
-    for file_name in os.listdir(game_date_dir):
-        if file_pattern in file_name:
-            filepath = os.path.join(game_date_dir, file_name)
+        return slate
+
+    # Only the per-game entries; the game_id=None aliases point at the same files
+    entries = {
+        CacheKey(stats_type, season_type=season_type, game_id=game_id, game_date=game_date,
+                 team_abbr=team_abbr, side=side): os.path.join(game_date_dir, file_name)
+        for (game_id, side, team_abbr, season_type, stats_type), file_name in index.items()
+        if game_id is not None
+    }
+    cache_manager = get_cache_manager(cache_dir)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(cache_manager.load_path, filepath): key for key, filepath in entries.items()}
+        for future in as_completed(futures):
+            key = futures[future]
             try:
-                return joblib.load(filepath)
+                slate.add(key, future.result())
             except Exception as e:
-                print(f"Error loading {file_name}: {e}")
-                return pd.DataFrame()
-    
-    print(f"No cached file found for pattern: {file_pattern}")
-    return pd.DataFrame()
+                print(f"Error loading {key.relpath()}: {e}")
+                slate.add(key, pd.DataFrame())
+
+    untagged = [data for *_, data in slate.frames(PLAYER_STATS) if not data.empty and "PLAYER_TAG" not in data.columns]
+    if untagged:
+        manual_tags = load_manual_tags()
+        slate.map_frames(PLAYER_STATS, lambda data: normalize_if_untagged(data, manual_tags))
+        print(f"Tagged {len(untagged)} untagged player frames on load, "
+              f"run 'python player_tags.py --cache-dir {cache_dir}' to tag them in the cache")
+
+    return slate
+
+def load_player_logs_table(player_ids, season, cache_dir="cached_data", max_workers=8):
+    """
+    Loads the cached game logs of many players in parallel into one long-format table.
+
+    Args:
+        player_ids (iterable): Player IDs to load logs for.
+        season (str): The season in 'YYYY-YY' format.
+        cache_dir (str): The base directory for cached data.
+        max_workers (int): Number of loader threads.
+
+    Returns:
+        pd.DataFrame: One row per player game with a 'Player_ID' column (empty if no logs are cached).
+    """
+    cache_manager = get_cache_manager(cache_dir)
+    player_ids = sorted(set(int(player_id) for player_id in player_ids))
+
+    frames = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(cache_manager.load_player_logs, player_id, season): player_id for player_id in player_ids}
+        for future in as_completed(futures):
+            player_id = futures[future]
+            try:
+                logs = future.result()
+            except Exception as e:
+                print(f"Error loading logs for Player ID {player_id}: {e}")
+                continue
+            if logs is None or logs.empty:
+                print(f"No cached logs for Player ID {player_id} ({season})")
+                continue
+            frames.append(logs.assign(Player_ID=player_id))
+
+    if not frames:
+        return pd.DataFrame(columns=["Player_ID"])
+    return pd.concat(frames, ignore_index=True)
 
 # Helper function to load and concatenate team stats for a single team
 def load_and_concatenate_team_stats(game_date, team_type, team_abbr):
@@ -92,13 +237,11 @@ def load_and_concatenate_team_stats(game_date, team_type, team_abbr):
 # Function to load and filter games for the next 7 days
 def get_next_seven_days_games(schedule_file, dates):
     try:
-        schedule_df = pd.read_csv(schedule_file)
-        schedule_df['Game Date'] = pd.to_datetime(schedule_df['Game Date']).dt.strftime('%Y-%m-%d')
         # Filter for the next seven days
-        next_seven_days_games = schedule_df[schedule_df['Game Date'].isin(dates)]
+        next_seven_days_games = get_schedule_store(schedule_file).games_on_dates(dates)
         return next_seven_days_games
     except FileNotFoundError:
-        st.error("Schedule file not found. Please ensure 'nbaSchedule2425.csv' is in the correct folder.")
+        print("Schedule file not found. Please ensure 'nbaSchedule2425.csv' is in the correct folder.")
         return pd.DataFrame()
 
 def get_team_roster(nba_data, team_abbr):
@@ -106,16 +249,18 @@ def get_team_roster(nba_data, team_abbr):
     return nba_data.get_team_roster(team_abbr)
 
 def get_player_game_logs(nba_data, player_id, season):
-    """Fetches the game logs for a specified player and season."""
+    """Fetches the game logs for a specified player and season (empty if the fetch fails)."""
     player_logs = nba_data.fetch_player_game_logs(player_id, season)
+    if player_logs is None:
+        return pd.DataFrame()
     player_logs['GAME_DATE'] = pd.to_datetime(player_logs['GAME_DATE'])
     return player_logs
 
 # Function to load last season’s matchup data
-def load_matchup_rollup_from_cache():
+def load_matchup_rollup_from_cache(season="2023-24", cache_dir="cached_data"):
     try:
-        filepath = os.path.join("cached_data", "matchups_rollup_2023_24.joblib")
-        return joblib.load(filepath)
+        rollup = get_cache_manager(cache_dir).load(CacheKey.matchup_rollup(season))
+        return rollup if rollup is not None else pd.DataFrame()
     except Exception as e:
-        st.error(f"Error loading cached matchup data: {e}")
+        print(f"Error loading cached matchup data: {e}")
         return pd.DataFrame()
\ No newline at end of file
@@ -0,0 +1,274 @@
+# feature_store.py
+"""
+Per-player rolling features for every box score stat: last 5/10/20 games, EWMA,
+season-to-date mean, SD, median and mode, and home/away splits.
+
+Features are maintained incrementally. Each player keeps a small running state (moments,
+value histograms, the last games and the EWMA), and new game rows are folded into it
+instead of recomputing from the full logs. Projections and the dashboard read the
+precomputed feature table.
+
+Usage:
+    store = PlayerFeatureStore("2023-24")
+    store.update(player_id, player_logs)   # only rows not seen before are applied
+    store.save()
+    features = store.features([player_id])
+"""
+
+import numpy as np
+import pandas as pd
+from cache_keys import CacheKey
+from data_loader import get_cache_manager
+
+FEATURE_STORE_TABLE = "features"
+FEATURE_STORE_VERSION = 1
+
+FEATURE_STATS = ["MIN", "FGM", "FGA", "FG3M", "FG3A", "FTM", "FTA", "OREB", "DREB", "REB",
+                 "AST", "STL", "BLK", "TOV", "PF", "PFD", "PTS", "PLUS_MINUS"]
+WINDOWS = [5, 10, 20]
+EWMA_SPAN = 10
+
+
+def parse_log_dates(player_logs):
+    """
+    Parses the GAME_DATE column of player logs ('APR 14, 2024' or ISO dates).
+    """
+    dates = pd.to_datetime(player_logs["GAME_DATE"], format="%b %d, %Y", errors="coerce")
+    return dates.fillna(pd.to_datetime(player_logs["GAME_DATE"], format="ISO8601", errors="coerce"))
+
+
+def _empty_moments(n_stats):
+    return {"n": 0, "mean": np.zeros(n_stats), "m2": np.zeros(n_stats)}
+
+
+def _merge_moments(moments, values):
+    """
+    Folds a batch of rows into running count/mean/M2 moments (Chan et al. parallel update).
+    """
+    if len(values) == 0:
+        return moments
+    n_b = len(values)
+    mean_b = values.mean(axis=0)
+    m2_b = ((values - mean_b) ** 2).sum(axis=0)
+    n_a = moments["n"]
+    n = n_a + n_b
+    delta = mean_b - moments["mean"]
+    return {
+        "n": n,
+        "mean": moments["mean"] + delta * n_b / n,
+        "m2": moments["m2"] + m2_b + delta ** 2 * n_a * n_b / n,
+    }
+
+
+def _sd(moments):
+    """
+    Sample standard deviation (ddof=1, as pandas .std()), NaN with fewer than two games.
+    """
+    if moments["n"] < 2:
+        return np.full(len(moments["mean"]), np.nan)
+    return np.sqrt(moments["m2"] / (moments["n"] - 1))
+
+
+def _histogram_median(histogram):
+    values = np.array(sorted(histogram))
+    counts = np.array([histogram[value] for value in values])
+    total = counts.sum()
+    if total == 0:
+        return np.nan
+    cumulative = np.cumsum(counts)
+    # Average the two middle values for an even count, as pandas .median() does
+    lower = values[np.searchsorted(cumulative, (total + 1) // 2)]
+    upper = values[np.searchsorted(cumulative, total // 2 + 1)]
+    return (lower + upper) / 2
+
+
+def _histogram_mode(histogram):
+    """
+    Most frequent value, the smallest one on ties (pandas .mode()[0]).
+    """
+    if not histogram:
+        return np.nan
+    top = max(histogram.values())
+    return min(value for value, count in histogram.items() if count == top)
+
+
+class PlayerFeatureStore:
+    """
+    Rolling features of every player for one season, persisted as a derived table of the
+    cache (CacheKey.derived(FEATURE_STORE_TABLE, season)).
+
+    Attributes:
+        season (str): The season the logs belong to.
+        state (dict): {player_id: running state}
+    """
+    def __init__(self, season, cache_dir="cached_data"):
+        self.season = season
+        self.cache_manager = get_cache_manager(cache_dir)
+        self.key = CacheKey.derived(FEATURE_STORE_TABLE, season)
+        self.state = {}
+        self._rows = {}
+        # A missing store or one written with another version is rebuilt from the logs
+        snapshot = self.cache_manager.load_snapshot(self.key, FEATURE_STORE_VERSION)
+        if snapshot is not None:
+            self.state = snapshot["state"]
+            self._rows = snapshot["rows"]
+
+    def save(self):
+        """
+        Writes the store to disk atomically.
+        """
+        self.cache_manager.save_snapshot(self.key, {"state": self.state, "rows": self._rows}, FEATURE_STORE_VERSION)
+
+    def _new_state(self, stats):
+        n_stats = len(stats)
+        return {
+            "stats": stats,
+            "seen": set(),
+            "last_date": None,
+            "season": _empty_moments(n_stats),
+            "home": _empty_moments(n_stats),
+            "away": _empty_moments(n_stats),
+            "recent": np.empty((0, n_stats)),
+            "ewma": None,
+            "histograms": [{} for _ in stats],
+        }
+
+    def _apply(self, state, rows):
+        """
+        Folds new game rows, sorted by date, into a player's running state.
+        """
+        values = rows[state["stats"]].to_numpy(dtype=float)
+        is_home = rows["MATCHUP"].str.contains(" vs. ", regex=False).to_numpy()
+
+        state["season"] = _merge_moments(state["season"], values)
+        state["home"] = _merge_moments(state["home"], values[is_home])
+        state["away"] = _merge_moments(state["away"], values[~is_home])
+        state["recent"] = np.vstack([state["recent"], values])[-max(WINDOWS):]
+
+        alpha = 2 / (EWMA_SPAN + 1)
+        ewma = state["ewma"]
+        for row in values:
+            ewma = row.copy() if ewma is None else alpha * row + (1 - alpha) * ewma
+        state["ewma"] = ewma
+
+        for histogram, column in zip(state["histograms"], values.T):
+            unique, counts = np.unique(column, return_counts=True)
+            for value, count in zip(unique.tolist(), counts.tolist()):
+                histogram[value] = histogram.get(value, 0) + count
+
+        state["seen"].update(rows["Game_ID"].astype(str))
+        state["last_date"] = rows["_date"].max()
+
+    def _feature_row(self, player_id, state):
+        stats = state["stats"]
+        row = {"Player_ID": player_id, "GP": state["season"]["n"], "HOME_GP": state["home"]["n"],
+               "AWAY_GP": state["away"]["n"], "LAST_GAME_DATE": state["last_date"]}
+        recent = state["recent"]
+        season_sd = _sd(state["season"])
+        for index, stat in enumerate(stats):
+            for window in WINDOWS:
+                row[f"{stat}_L{window}"] = recent[-window:, index].mean() if len(recent) else np.nan
+            row[f"{stat}_EWMA"] = state["ewma"][index] if state["ewma"] is not None else np.nan
+            row[f"{stat}_SEASON_MEAN"] = state["season"]["mean"][index] if state["season"]["n"] else np.nan
+            row[f"{stat}_SEASON_SD"] = season_sd[index]
+            row[f"{stat}_SEASON_MEDIAN"] = _histogram_median(state["histograms"][index])
+            row[f"{stat}_SEASON_MODE"] = _histogram_mode(state["histograms"][index])
+            row[f"{stat}_HOME_MEAN"] = state["home"]["mean"][index] if state["home"]["n"] else np.nan
+            row[f"{stat}_AWAY_MEAN"] = state["away"]["mean"][index] if state["away"]["n"] else np.nan
+        return row
+
+    def update(self, player_id, player_logs):
+        """
+        Applies the rows of a player's logs that the store has not seen yet. Rows dated after
+        the player's last applied game are folded in incrementally; an older row (a late
+        correction) rebuilds the player from the logs given.
+
+        Args:
+            player_id (int): The player's ID.
+            player_logs (pd.DataFrame): The player's game logs for the season (any order).
+
+        Returns:
+            int: Number of new game rows applied.
+        """
+        player_id = int(player_id)
+        if player_logs is None or player_logs.empty:
+            return 0
+
+        rows = player_logs.assign(_date=parse_log_dates(player_logs))
+        state = self.state.get(player_id)
+        if state is not None:
+            rows = rows[~rows["Game_ID"].astype(str).isin(state["seen"])]
+            if rows.empty:
+                return 0
+            if state["last_date"] is not None and rows["_date"].min() < state["last_date"]:
+                state = None
+                rows = player_logs.assign(_date=parse_log_dates(player_logs))
+
+        if state is None:
+            state = self._new_state([stat for stat in FEATURE_STATS if stat in player_logs.columns])
+            self.state[player_id] = state
+
+        rows = rows.sort_values("_date", kind="stable")
+        self._apply(state, rows)
+        self._rows[player_id] = self._feature_row(player_id, state)
+        return len(rows)
+
+    def update_many(self, player_logs):
+        """
+        Applies a long-format logs table (e.g., from data_loader.load_player_logs_table).
+
+        Returns:
+            int: Number of new game rows applied.
+        """
+        if player_logs.empty:
+            return 0
+        return sum(self.update(player_id, logs) for player_id, logs in player_logs.groupby("Player_ID"))
+
+    def features(self, player_ids=None):
+        """
+        Returns the feature table.
+
+        Args:
+            player_ids (iterable, optional): Only these players (all players if None).
+
+        Returns:
+            pd.DataFrame: One row per player with 'Player_ID' and the feature columns.
+        """
+        if player_ids is None:
+            rows = list(self._rows.values())
+        else:
+            rows = [self._rows[int(player_id)] for player_id in dict.fromkeys(player_ids) if int(player_id) in self._rows]
+        return pd.DataFrame(rows)
+
+    def player(self, player_id):
+        """
+        Returns one player's features as a dict, or None if the store has no logs for them.
+        """
+        return self._rows.get(int(player_id))
+
+    def __len__(self):
+        return len(self.state)
+
+
+def get_feature_store(season, cache_dir="cached_data", player_ids=None, max_workers=8):
+    """
+    Opens the feature store of a season and folds in any cached logs it has not seen.
+
+    Args:
+        season (str): The season in 'YYYY-YY' format.
+        cache_dir (str): The base directory for cached data.
+        player_ids (iterable, optional): Players whose cached logs are read.
+        max_workers (int): Number of loader threads.
+
+    Returns:
+        PlayerFeatureStore: The store, saved if anything changed.
+    """
+    from data_loader import load_player_logs_table
+
+    store = PlayerFeatureStore(season, cache_dir=cache_dir)
+    if player_ids is not None:
+        applied = store.update_many(load_player_logs_table(player_ids, season, cache_dir=cache_dir, max_workers=max_workers))
+        if applied:
+            print(f"Applied {applied} new game rows to the {season} feature store")
+            store.save()
+    return store
@@ -8,6 +8,9 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from classes import NBATeamRosters
 from cache_manager import CacheManager
+from pipeline import Checkpoint, Pipeline, RateLimiter
+from game_day_pipeline import Watermarks, build_game_day_pipeline
+from planner import plan_calls, print_plan
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import datetime
@@ -15,6 +18,7 @@ import json
 import seaborn as sns
 import joblib
 import os
+import sys
 import time
 
 
@@ -22,7 +26,8 @@ import time
 
 
 nba_data = NBATeamRosters(season="2024")
-cache_manager = CacheManager()
+# Write-behind mode: cache writes are queued to a background thread so fetching never waits on disk
+cache_manager = CacheManager(write_behind=True)
 
 
 # In[67]:
@@ -88,160 +93,46 @@ game_date = today_date
 todays_games = nba_data.get_todays_games(today_date) # Use today_date when in season
 
 
-# ## Fetch and Cache Previous Season Player Data
+# ## Fetch and Cache Team and Player Data
 
 # In[61]:
 
 
-pause_time = 10
-
-# Loop through each game in 'todays_games'
-for index, game in todays_games.iterrows():
-    game_id = game['Game ID']
-    home_team_abbr = game['Home Team Abbreviation']
-    away_team_abbr = game['Visiting Team Abbreviation']
-    game_date = game['Game Date']  # Game date in 'YYYY-MM-DD' format
-    season = "2023-24"  # Set to the previous season
-
-    print(f"Fetching data for Game ID {game_id}: Home: {home_team_abbr}, Away: {away_team_abbr} for {season}")
-    
-    # Fetch home team stats for the 2023-24 season
-    try:
-        home_team_stats = nba_data.fetch_player_stats_single_team(home_team_abbr, season)
-        print(f"Fetched 2023-24 season data for home team {home_team_abbr}")
-    except Exception as e:
-        print(f"Error fetching 2023-24 season data for home team {home_team_abbr}: {e}")
-        home_team_stats = pd.DataFrame()  # Return an empty DataFrame if an error occurs
-
-    # Pause to avoid hitting API rate limits
-    time.sleep(pause_time)
-    
-    # Fetch away team stats for the 2023-24 season
-    try:
-        away_team_stats = nba_data.fetch_player_stats_single_team(away_team_abbr, season)
-        print(f"Fetched 2023-24 season data for away team {away_team_abbr}")
-    except Exception as e:
-        print(f"Error fetching 2023-24 season data for away team {away_team_abbr}: {e}")
-        away_team_stats = pd.DataFrame()  # Return an empty DataFrame if an error occurs
-
-    # Pause to avoid hitting API rate limits
-    time.sleep(pause_time)
-    
-    # Cache the home and away team stats for the 2023-24 season, organized by game date with the new file naming format
-    cache_manager.cache_data(home_team_stats, f"game_{game_id}_home_team_{home_team_abbr}_prev", game_date)
-    cache_manager.cache_data(away_team_stats, f"game_{game_id}_away_team_{away_team_abbr}_prev", game_date)
-
-    print(f"Cached data for Game ID {game_id}: Home: {home_team_abbr}, Away: {away_team_abbr} for {season}")
-
-
-time.sleep(360)
-# ## Fetch and Cache Current Season Player Data
-
-# In[62]:
-
-
-# Loop through each game in 'todays_games'
-for index, game in todays_games.iterrows():
-    game_id = game['Game ID']
-    home_team_abbr = game['Home Team Abbreviation']
-    away_team_abbr = game['Visiting Team Abbreviation']
-    game_date = game['Game Date']  # Game date in 'YYYY-MM-DD' format
-    
-    # Handle only the current season
-    current_season = "2024-25"
-
-    print(f"Fetching data for Game ID {game_id}: Home: {home_team_abbr}, Away: {away_team_abbr} for {current_season}")
-    
-    # Fetch home team stats for current season (expecting null values)
-    try:
-        home_team_stats = nba_data.fetch_player_stats_single_team(home_team_abbr, current_season)
-        if home_team_stats.empty:
-            raise ValueError("No data for the current season")
-        print(f"Fetched current season data for home team {home_team_abbr}")
-    except Exception as e:
-        print(f"No data available for current season for home team {home_team_abbr}: {e}")
-        # Fill with NaN values since no current season data is available
-        home_team_stats = pd.DataFrame(columns=["PLAYER", "PLAYER_ID", "SEASON_ID", "PTS", "AST", "REB", "etc..."])
-
-    # Pause to avoid hitting API rate limits
-    time.sleep(pause_time)
-    
-    # Fetch away team stats for current season (expecting null values)
-    try:
-        away_team_stats = nba_data.fetch_player_stats_single_team(away_team_abbr, current_season)
-        if away_team_stats.empty:
-            raise ValueError("No data for the current season")
-        print(f"Fetched current season data for away team {away_team_abbr}")
-    except Exception as e:
-        print(f"No data available for current season for away team {away_team_abbr}: {e}")
-        # Fill with NaN values since no current season data is available
-        away_team_stats = pd.DataFrame(columns=["PLAYER", "PLAYER_ID", "SEASON_ID", "PTS", "AST", "REB", "etc..."])
-
-    # Pause to avoid hitting API rate limits
-    time.sleep(pause_time)
-    
-    # Cache the home and away team stats for the 2023-24 season, organized by game date with the new file naming format
-    cache_manager.cache_data(home_team_stats, f"game_{game_id}_home_team_{home_team_abbr}_curr", game_date)
-    cache_manager.cache_data(away_team_stats, f"game_{game_id}_away_team_{away_team_abbr}_curr", game_date)
-
-    print(f"Cached data for Game ID {game_id}: Home: {home_team_abbr}, Away: {away_team_abbr} for {current_season}")
-
-
-time.sleep(360)
-### Fetch and Cache Team Stats 
-
-
-# In[63]:
-
-
-# Call the existing function to get the compiled team stats for today's games
-team_stats_today = nba_data.get_team_stats_today_games(date=today_date)
-
-all_games_list = []
-
-
-# In[64]:
-
-
-# Loop through the games in the dictionary to pair up home and away stats
-for game_id, team_stats in team_stats_today.items():
-    # Extract the stats for home and away teams for both previous and current seasons
-    home_previous_stats = team_stats['home_previous_season']
-    home_current_stats = team_stats['home_current_season']
-    away_previous_stats = team_stats['away_previous_season']
-    away_current_stats = team_stats['away_current_season']
-    
-    # If the DataFrame is not empty, add a 'Game ID' column for tracking
-    if not home_previous_stats.empty:
-        home_previous_stats['Game_ID'] = game_id
-    if not home_current_stats.empty:
-        home_current_stats['Game_ID'] = game_id
-    if not away_previous_stats.empty:
-        away_previous_stats['Game_ID'] = game_id
-    if not away_current_stats.empty:
-        away_current_stats['Game_ID'] = game_id
-
-    # Get team abbreviations for file naming
-    home_team_abbr = home_previous_stats.iloc[0]['TEAM_ABBREVIATION'] if not home_previous_stats.empty else "unknown"
-    away_team_abbr = away_previous_stats.iloc[0]['TEAM_ABBREVIATION'] if not away_previous_stats.empty else "unknown"
-
-    # Cache home team stats (previous and current season)
-    if not home_previous_stats.empty:
-        cache_manager.cache_data(home_previous_stats, f"game_{game_id}_home_team_{home_team_abbr}_prev_team_stats", today_date)
-    if not home_current_stats.empty:
-        cache_manager.cache_data(home_current_stats, f"game_{game_id}_home_team_{home_team_abbr}_curr_team_stats", today_date)
+# Each API call is a task in a dependency graph; tasks run as soon as their inputs are ready and
+# all calls share one rate budget, so there are no fixed sleeps between the loops anymore.
+# Tasks whose results are already cached (e.g., previous-season stats in the season store) are skipped.
+# Finished tasks are checkpointed; run with --resume to continue an interrupted pull of the same date
+resume = "--resume" in sys.argv
+# Run with --delta to only refetch current-season stats for teams that played since the last pull
+delta = "--delta" in sys.argv
+checkpoint = Checkpoint(f"game_day_{today_date}", resume=resume)
+watermarks = Watermarks()
+limiter = RateLimiter(calls_per_minute=6)
+pipeline = build_game_day_pipeline(nba_data, cache_manager, todays_games, previous_season, current_season,
+                                   limiter=limiter, pipeline=Pipeline(max_workers=4, checkpoint=checkpoint),
+                                   watermarks=watermarks, delta=delta)
 
-    # Cache away team stats (previous and current season)
-    if not away_previous_stats.empty:
-        cache_manager.cache_data(away_previous_stats, f"game_{game_id}_away_team_{away_team_abbr}_prev_team_stats", today_date)
-    if not away_current_stats.empty:
-        cache_manager.cache_data(away_current_stats, f"game_{game_id}_away_team_{away_team_abbr}_curr_team_stats", today_date)
-
-    print(f"Cached team stats for Game ID {game_id}: Home: {home_team_abbr}, Away: {away_team_abbr}")
+# Print the planned API calls (already cached work is left out), then execute exactly that plan
+plan = plan_calls(pipeline)
+print_plan(plan, limiter)
+pipeline_result = pipeline.run(actions=plan["actions"])
+
+for task_name, error in pipeline_result["errors"].items():
+    print(f"Task {task_name} failed: {error}")
+print(f"API calls by endpoint: {dict(limiter.calls)}")
 
 
 # In[ ]:
 
 
+# Make sure every queued cache write is on disk before the script finishes
+failed_writes = cache_manager.flush()
+for filepath, error in failed_writes:
+    print(f"Failed to cache {filepath}: {error}")
 
+# Only move the current-season watermarks forward once the data they point at is on disk
+if not failed_writes:
+    watermarks.save()
 
+# Report cache hit/miss/write statistics for this pull
+print(cache_manager.metrics.to_json())
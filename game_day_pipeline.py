@@ -0,0 +1,374 @@
+# game_day_pipeline.py
+"""
+Game-day pull as a dependency graph. Every API call is its own task (or, for a roster's career
+stats, one task per team), merges only depend on the calls they need, and all calls share one
+rate budget instead of fixed sleeps between loops.
+
+Usage:
+    python game_day_pipeline.py --date 2024-10-22 --workers 4 --calls-per-minute 6
+"""
+
+import os
+import argparse
+import datetime
+import threading
+import joblib
+import pandas as pd
+from cache_keys import CacheKey, PLAYER_STATS, TEAM_STATS
+from pipeline import Checkpoint, Pipeline, RateLimiter
+from planner import plan_calls, print_plan
+from player_tags import load_manual_tags, normalize_player_stats
+
+PREVIOUS_SEASON = "2023-24"
+CURRENT_SEASON = "2024-25"
+
+# Players per roster assumed when planning career stats calls for a team with no cached roster
+ESTIMATED_ROSTER_SIZE = 17
+
+# Last successful current-season pull per team and entity, used by delta refreshes
+WATERMARK_PATH = os.path.join("cached_data", "watermarks", "current_season.joblib")
+
+
+class Watermarks:
+    """
+    Records, per team and entity, the game date the latest current-season data was pulled for
+    (it covers games before that date) and the key holding that data, so a delta refresh can
+    tell which teams have played since.
+    """
+    def __init__(self, path=WATERMARK_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = joblib.load(path) if os.path.exists(path) else {}
+
+    def get(self, team_abbr, entity):
+        """
+        Returns {'date': 'YYYY-MM-DD', 'key': CacheKey} for the team's last pull, or None.
+        """
+        return self.entries.get((team_abbr, entity))
+
+    def update(self, team_abbr, entity, pulled_on, key):
+        """
+        Moves a team's watermark to the data pulled for pulled_on. A pull for an earlier date
+        (e.g., a backfill) never moves the watermark back.
+        """
+        with self._lock:
+            mark = self.entries.get((team_abbr, entity))
+            if mark is None or mark["date"] <= pulled_on:
+                self.entries[(team_abbr, entity)] = {"date": pulled_on, "key": key}
+
+    def save(self):
+        """
+        Writes the watermarks to disk (atomically).
+        """
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = f"{self.path}.tmp{os.getpid()}"
+            joblib.dump(self.entries, temp_path)
+            os.replace(temp_path, self.path)
+
+
+def has_new_games(schedule_store, team_abbr, since_date, game_date):
+    """
+    True if the team has games between its last pull (inclusive, since a pull only covers
+    games before the day it runs) and game_date (exclusive).
+    """
+    last_day = (pd.Timestamp(game_date) - pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    if last_day < since_date:
+        return False
+    return not schedule_store.games_for_team(team_abbr, since_date, last_day, legacy=False).empty
+
+
+def _save_per_game_stats(cache_manager, per_game_key, stats, watermarks=None):
+    """
+    Saves one team's stats for one game. Previous-season stats are stored once in the season
+    store and each game only gets a reference to them. Current-season stats move the team's
+    watermark forward. Empty frames (failed or empty pulls) are not cached, so they are retried.
+
+    Returns:
+        CacheKey: The key saved, or None if the frame was empty.
+    """
+    if stats is None or stats.empty:
+        print(f"No data for {per_game_key.team_abbr} ({per_game_key.season_type} {per_game_key.entity}), not caching it")
+        return None
+    season_key = per_game_key.season_store_key()
+    if season_key is not None:
+        if not cache_manager.exists(season_key):
+            cache_manager.save(season_key, stats)
+        cache_manager.save_reference(per_game_key, season_key)
+    else:
+        cache_manager.save(per_game_key, stats)
+        if watermarks is not None and per_game_key.season_type == "curr":
+            watermarks.update(per_game_key.team_abbr, per_game_key.entity, per_game_key.game_date, per_game_key)
+    return per_game_key
+
+
+def _add_carry_forward_tasks(pipeline, cache_manager, schedule_store, watermarks, game_date, per_game_keys):
+    """
+    Adds tasks that point today's current-season entries at the team's last pulled data, if the
+    team has not played since. Only the save tasks are added, so nothing upstream is fetched.
+    Data pulled for a later date is never carried back to an earlier one, since it would
+    include games played after game_date.
+
+    Returns:
+        bool: True if the stats were carried forward, False if they have to be refetched.
+    """
+    marks = [watermarks.get(key.team_abbr, key.entity) for key in per_game_keys]
+    if any(mark is None or not cache_manager.exists(mark["key"]) for mark in marks):
+        return False
+    if any(mark["date"] > game_date for mark in marks):
+        return False
+    if any(has_new_games(schedule_store, key.team_abbr, mark["date"], game_date) for key, mark in zip(per_game_keys, marks)):
+        return False
+
+    for key, mark in zip(per_game_keys, marks):
+        if key == mark["key"]:
+            continue
+        pipeline.add(
+            f"save({key.game_id}, {key.side}, {key.entity}, {key.season_type})",
+            lambda inputs, key=key, target=mark["key"]: cache_manager.save_reference(key, target) or key,
+            is_complete=lambda key=key: cache_manager.exists(key),
+        )
+    print(f"No new games for {per_game_keys[0].team_abbr} since {marks[0]['date']}, carrying current-season stats forward")
+    return True
+
+
+def _cached_roster_size(team_abbr, cache_manager, checkpoint=None, watermarks=None):
+    """
+    Returns the size of a team's roster from the roster a checkpoint recorded for this run, or
+    from the team's last pulled current-season player stats (one row per rostered player).
+
+    Returns:
+        int: The number of players, or None if no roster is cached.
+    """
+    roster_task = f"roster({team_abbr})"
+    if checkpoint is not None and checkpoint.has(roster_task):
+        try:
+            return len(checkpoint.load(roster_task))
+        except Exception as e:
+            print(f"Checkpointed roster of {team_abbr} unusable ({e})")
+    mark = watermarks.get(team_abbr, PLAYER_STATS) if watermarks is not None else None
+    if mark is not None:
+        players = cache_manager.load(mark["key"])
+        if isinstance(players, pd.DataFrame) and "PLAYER_ID" in players.columns and not players.empty:
+            return players["PLAYER_ID"].nunique()
+    return None
+
+
+def _is_saved(cache_manager, per_game_key):
+    """
+    True if a game's stats are cached. Previous-season stats also need their season-store entry,
+    so empty or failed previous-season pulls are retried.
+    """
+    season_key = per_game_key.season_store_key()
+    if season_key is not None and not cache_manager.exists(season_key):
+        return False
+    return cache_manager.exists(per_game_key)
+
+
+def build_game_day_pipeline(nba_data, cache_manager, todays_games, previous_season=PREVIOUS_SEASON,
+                            current_season=CURRENT_SEASON, limiter=None, pipeline=None, watermarks=None, delta=False):
+    """
+    Declares the tasks needed to cache team and player stats for every game in todays_games.
+
+    Task names:
+        roster(TEAM), career(TEAM), team_metrics(SEASON), player_metrics(SEASON),
+        team_dashboard(TEAM, SEASON), team_ranks(TEAM, SEASON),
+        merge_player_stats(TEAM, SEASON), merge_team_stats(TEAM, SEASON),
+        save(GAME_ID, SIDE, ENTITY, prev|curr)
+
+    Args:
+        nba_data (NBATeamRosters): The NBA data object used for API calls and merges.
+        cache_manager (CacheManager): The cache the results are written to.
+        todays_games (pd.DataFrame): Schedule rows to pull.
+        previous_season (str): Previous season in 'YYYY-YY' format.
+        current_season (str, optional): Current season in 'YYYY-YY' format, or None to only pull
+            previous-season stats.
+        limiter (RateLimiter, optional): Shared request budget (a new one is created if None).
+        pipeline (Pipeline, optional): Pipeline to add the tasks to (a new one is created if None).
+        watermarks (Watermarks, optional): Updated with every current-season frame saved.
+        delta (bool): If True (requires watermarks), current-season stats of teams that have not
+            played since their last pull are carried forward as references instead of refetched.
+
+    Returns:
+        Pipeline: The pipeline with all game-day tasks.
+    """
+    limiter = limiter or RateLimiter()
+    pipeline = pipeline or Pipeline()
+    season_types = {previous_season: "prev"}
+    if current_season is not None:
+        season_types[current_season] = "curr"
+    manual_tags = load_manual_tags()
+
+    def call(endpoint, fetch, *args):
+        limiter.acquire(endpoint)
+        return fetch(*args)
+
+    def require(data, description):
+        # A failed fetch fails the task so nothing downstream caches a partial result
+        if data is None:
+            raise ValueError(f"No data returned for {description}")
+        return data
+
+    # League-wide metrics are shared by every team
+    for season in season_types:
+        pipeline.add(f"team_metrics({season})",
+                     lambda inputs, season=season: require(call("TeamEstimatedMetrics", nba_data.fetch_team_estimated_metrics, season), f"team metrics {season}"),
+                     calls={"TeamEstimatedMetrics": 1})
+        pipeline.add(f"player_metrics({season})",
+                     lambda inputs, season=season: require(call("PlayerEstimatedMetrics", nba_data.fetch_player_estimated_metrics, season), f"player metrics {season}"),
+                     calls={"PlayerEstimatedMetrics": 1})
+
+    for _, game in todays_games.iterrows():
+        game_id = game['Game ID']
+        game_date = game['Game Date']
+        for side, team_abbr in (("home", game['Home Team Abbreviation']), ("away", game['Visiting Team Abbreviation'])):
+            roster = pipeline.add(
+                f"roster({team_abbr})",
+                lambda inputs, team_abbr=team_abbr: require(call("CommonTeamRoster", nba_data.get_team_roster, team_abbr), f"roster {team_abbr}"),
+                calls={"CommonTeamRoster": 1},
+            )
+            # Career stats cover every season, so one pass per roster serves both merges
+            career = f"career({team_abbr})"
+            if career not in pipeline.tasks:
+                roster_size = _cached_roster_size(team_abbr, cache_manager, pipeline.checkpoint, watermarks)
+                pipeline.add(
+                    career,
+                    lambda inputs, roster=roster: [call("PlayerCareerStats", nba_data.fetch_player_career_stats, player_id)
+                                                   for player_id in inputs[roster]['PLAYER_ID']],
+                    inputs=[roster],
+                    calls={"PlayerCareerStats": roster_size or ESTIMATED_ROSTER_SIZE},
+                    estimated=roster_size is None,
+                )
+
+            for season, season_type in season_types.items():
+                player_key = CacheKey.player_stats(game_date, game_id, side, team_abbr, season_type, season)
+                team_key = CacheKey.team_stats(game_date, game_id, side, team_abbr, season_type, season)
+
+                if season_type == "curr" and delta and watermarks is not None:
+                    if _add_carry_forward_tasks(pipeline, cache_manager, nba_data.schedule_store, watermarks,
+                                                game_date, (player_key, team_key)):
+                        continue
+                player_season_key = player_key.season_store_key()
+                team_season_key = team_key.season_store_key()
+
+                # Previous-season merges are persisted in the season store, so later pulls load them.
+                # Frames are consolidated and tagged here, once, before anything is cached
+                merge_players = pipeline.add(
+                    f"merge_player_stats({team_abbr}, {season})",
+                    lambda inputs, team_abbr=team_abbr, season=season, roster=roster, career=career: normalize_player_stats(
+                        nba_data.merge_player_stats(team_abbr, season, inputs[roster], inputs[career], inputs[f"player_metrics({season})"]),
+                        manual_tags=manual_tags),
+                    inputs=[roster, career, f"player_metrics({season})"],
+                    is_complete=(lambda key=player_season_key: cache_manager.exists(key)) if player_season_key else None,
+                    load=(lambda key=player_season_key: cache_manager.load(key)) if player_season_key else None,
+                )
+
+                dashboard = pipeline.add(
+                    f"team_dashboard({team_abbr}, {season})",
+                    lambda inputs, team_abbr=team_abbr, season=season: require(
+                        call("TeamDashboardByGeneralSplits", nba_data.fetch_team_stats, team_abbr, season), f"team stats {team_abbr} {season}"),
+                    calls={"TeamDashboardByGeneralSplits": 1},
+                )
+                ranks = pipeline.add(
+                    f"team_ranks({team_abbr}, {season})",
+                    lambda inputs, team_abbr=team_abbr, season=season: require(
+                        call("TeamInfoCommon", nba_data.fetch_team_season_ranks, nba_data.get_team_id_from_abbreviation(team_abbr), season),
+                        f"team ranks {team_abbr} {season}"),
+                    calls={"TeamInfoCommon": 1},
+                )
+                merge_team = pipeline.add(
+                    f"merge_team_stats({team_abbr}, {season})",
+                    lambda inputs, team_abbr=team_abbr, season=season, dashboard=dashboard, ranks=ranks: nba_data.merge_team_stats(
+                        team_abbr, inputs[dashboard], inputs[f"team_metrics({season})"], inputs[ranks]),
+                    inputs=[dashboard, f"team_metrics({season})", ranks],
+                    is_complete=(lambda key=team_season_key: cache_manager.exists(key)) if team_season_key else None,
+                    load=(lambda key=team_season_key: cache_manager.load(key)) if team_season_key else None,
+                )
+
+                pipeline.add(
+                    f"save({game_id}, {side}, {PLAYER_STATS}, {season_type})",
+                    lambda inputs, key=player_key, merge=merge_players: _save_per_game_stats(cache_manager, key, inputs[merge], watermarks),
+                    inputs=[merge_players],
+                    is_complete=lambda key=player_key: _is_saved(cache_manager, key),
+                )
+
+                def save_team_stats(inputs, key=team_key, merge=merge_team, game_id=game_id):
+                    stats = inputs[merge]
+                    if key.season_type == "curr":
+                        if stats.empty:
+                            return None
+                        # Add a 'Game ID' column for tracking
+                        stats = stats.copy()
+                        stats['Game_ID'] = game_id
+                    return _save_per_game_stats(cache_manager, key, stats, watermarks)
+
+                pipeline.add(
+                    f"save({game_id}, {side}, {TEAM_STATS}, {season_type})",
+                    save_team_stats,
+                    inputs=[merge_team],
+                    is_complete=lambda key=team_key: _is_saved(cache_manager, key),
+                )
+
+    return pipeline
+
+
+def run_game_day_pull(game_date, workers=4, calls_per_minute=6, schedule_file="nbaSchedule2425.csv", resume=False,
+                      delta=False, dry_run=False):
+    """
+    Pulls and caches everything the app needs for the games on one date.
+
+    Args:
+        game_date (str): The game date in 'YYYY-MM-DD' format.
+        workers (int): Number of tasks run at the same time.
+        calls_per_minute (float): Shared API request budget.
+        schedule_file (str): The schedule CSV.
+        resume (bool): If True, tasks finished by an earlier, interrupted pull of this date are reused.
+        delta (bool): If True, only teams that played since their last pull get new current-season stats.
+        dry_run (bool): If True, only print the planned API calls.
+
+    Returns:
+        dict: The pipeline result (see Pipeline.run), or the plan (see planner.plan_calls) for a dry run.
+    """
+    from classes import NBATeamRosters
+    from cache_manager import CacheManager
+
+    nba_data = NBATeamRosters(season="2024")
+    nba_data.load_schedule(schedule_file)
+    todays_games = nba_data.get_todays_games(game_date)
+    print(f"{len(todays_games)} games on {game_date}")
+
+    watermarks = Watermarks()
+    limiter = RateLimiter(calls_per_minute)
+    with CacheManager(write_behind=True) as cache_manager:
+        # A dry run must not discard the progress a later --resume needs, so its checkpoint is read-only
+        checkpoint = Checkpoint(f"game_day_{game_date}", resume=resume, read_only=dry_run)
+        pipeline = build_game_day_pipeline(nba_data, cache_manager, todays_games, limiter=limiter,
+                                           pipeline=Pipeline(workers, checkpoint=checkpoint),
+                                           watermarks=watermarks, delta=delta)
+        # Print the plan and then execute exactly that plan
+        plan = plan_calls(pipeline)
+        print_plan(plan, limiter)
+        if dry_run:
+            return plan
+        result = pipeline.run(actions=plan["actions"])
+        failed_writes = cache_manager.flush()
+        for filepath, error in failed_writes:
+            print(f"Failed to cache {filepath}: {error}")
+        # Only move the watermarks forward once the data they point at is on disk
+        if not failed_writes:
+            watermarks.save()
+        print(cache_manager.metrics.to_json())
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the game-day pull as a dependency graph.")
+    parser.add_argument("--date", default=datetime.datetime.today().strftime('%Y-%m-%d'), help="Game date (YYYY-MM-DD).")
+    parser.add_argument("--workers", type=int, default=4, help="Number of tasks run at the same time.")
+    parser.add_argument("--calls-per-minute", type=float, default=6, help="Shared API request budget.")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted pull of the same date.")
+    parser.add_argument("--delta", action="store_true", help="Only refetch current-season stats of teams that played since the last pull.")
+    parser.add_argument("--dry-run", action="store_true", help="Print the planned API calls without running them.")
+    args = parser.parse_args()
+    run_game_day_pull(args.date, workers=args.workers, calls_per_minute=args.calls_per_minute, resume=args.resume,
+                      delta=args.delta, dry_run=args.dry_run)
@@ -0,0 +1,221 @@
+# league_context.py
+"""
+League context: possessions, offensive and defensive points per possession, pace and league
+averages for every team, computed in one vectorized pass per (season, snapshot date) and
+cached. Model functions look teams up in this table instead of recomputing possessions and
+PPP from one-row frames for every game.
+
+The context is built from the league-wide team stats table (all 30 teams from one set of
+calls, see NBATeamRosters.get_league_team_stats) when it is cached or an NBATeamRosters is
+passed to fetch it. Otherwise it falls back to the teams found in the per-game cache, and
+the league averages are left empty unless all 30 teams are there.
+
+Usage:
+    context = get_league_context("2023-24", "2024-10-22", nba_data=nba_data)
+    context.loc[context["TEAM_ABBREVIATION"] == "BOS", ["OFF_PPP", "DEF_PPP", "PACE"]]
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from cache_keys import CacheKey, LEAGUE_DIR, SEASON_STORE_DIR, TEAM_STATS
+from data_loader import date_dirs, get_cache_manager, index_date_dir
+from projections import TEAM_FEATURES, possessions, points_per_possession
+
+LEAGUE_CONTEXT_TABLE = "league_context"
+LEAGUE_CONTEXT_VERSION = 2
+LEAGUE_TEAMS = 30
+
+# Team stats columns kept next to the computed context
+CONTEXT_SOURCE_COLUMNS = TEAM_FEATURES + ["GP", "PTS_PG", "OPP_PTS_PG", "E_NET_RATING"]
+
+# In-process cache: {(cache_dir, season, snapshot_date): (signature, context)}
+_league_contexts = {}
+
+
+def _source_signature(cache_dir, season, snapshot_date):
+    """
+    Modification times of every folder the context is built from, so a cached context is
+    rebuilt when a pull adds team stats for a date it covers.
+    """
+    folders = [os.path.join(cache_dir, LEAGUE_DIR, season), os.path.join(cache_dir, SEASON_STORE_DIR, season, TEAM_STATS)]
+    folders += [os.path.join(cache_dir, name) for name in date_dirs(cache_dir, snapshot_date)]
+    signature = []
+    for folder in folders:
+        try:
+            signature.append((folder, os.stat(folder).st_mtime_ns))
+        except FileNotFoundError:
+            continue
+    return tuple(signature)
+
+
+def league_table_date(season, snapshot_date=None):
+    """
+    Returns the last game date a league-wide table needs to cover for a snapshot: None for a
+    season that was over by the snapshot date (the whole season), else the day before it.
+    """
+    season_end = f"{int(season[:4]) + 1}-07-01"
+    if snapshot_date is None or snapshot_date >= season_end:
+        return None
+    return (pd.Timestamp(snapshot_date) - pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def load_league_team_stats(season, snapshot_date=None, cache_dir="cached_data", nba_data=None):
+    """
+    Loads the league-wide team stats of a season as of a snapshot date from the cache, or
+    fetches them through nba_data if given.
+
+    Args:
+        season (str): The season in 'YYYY-YY' format.
+        snapshot_date (str, optional): Snapshot date in 'YYYY-MM-DD' format (whole season if None).
+        cache_dir (str): The base directory for cached data.
+        nba_data (NBATeamRosters, optional): Used to fetch the table when it is not cached.
+
+    Returns:
+        pd.DataFrame: One row per team, or None if it is not cached and cannot be fetched.
+    """
+    date_to = league_table_date(season, snapshot_date)
+    league_stats = get_cache_manager(cache_dir).load(CacheKey.league_table(season, TEAM_STATS, date_to))
+    if league_stats is None and nba_data is not None:
+        league_stats = nba_data.get_league_team_stats(season, date_to=date_to)
+    if league_stats is None or league_stats.empty:
+        return None
+    return league_stats.sort_values("TEAM_ABBREVIATION").reset_index(drop=True)
+
+
+def collect_team_stats(season, snapshot_date=None, cache_dir="cached_data"):
+    """
+    Collects the latest team stats frame of every team for a season as of a snapshot date:
+    first from the season store, then from the newest per-game files on or before the date.
+
+    Args:
+        season (str): The season in 'YYYY-YY' format (matched against SEASON_YEAR).
+        snapshot_date (str, optional): Last date in 'YYYY-MM-DD' format (all dates if None).
+        cache_dir (str): The base directory for cached data.
+
+    Returns:
+        pd.DataFrame: One row per team with a 'TEAM_ABBREVIATION' column.
+    """
+    cache_manager = get_cache_manager(cache_dir)
+    rows = {}
+
+    def take(team_abbr, data):
+        if team_abbr in rows or not isinstance(data, pd.DataFrame) or data.empty:
+            return
+        if "SEASON_YEAR" in data.columns and data["SEASON_YEAR"].iloc[0] != season:
+            return
+        rows[team_abbr] = data.iloc[[0]].assign(TEAM_ABBREVIATION=team_abbr)
+
+    store_dir = os.path.join(cache_dir, SEASON_STORE_DIR, season, TEAM_STATS)
+    if os.path.isdir(store_dir):
+        for file_name in sorted(os.listdir(store_dir)):
+            if file_name.endswith(".joblib"):
+                team_abbr = file_name[:-len(".joblib")]
+                take(team_abbr, cache_manager.load(CacheKey.season_team_stats(season, team_abbr)))
+
+    for game_date in date_dirs(cache_dir, snapshot_date):
+        index = index_date_dir(os.path.join(cache_dir, game_date)) or {}
+        for (game_id, _, team_abbr, _, stats_type), file_name in index.items():
+            if game_id is None or stats_type != TEAM_STATS or team_abbr in rows:
+                continue
+            take(team_abbr, cache_manager.load_path(os.path.join(cache_dir, game_date, file_name)))
+
+    if not rows:
+        return pd.DataFrame(columns=["TEAM_ABBREVIATION"] + CONTEXT_SOURCE_COLUMNS)
+    return pd.concat(rows.values(), ignore_index=True).sort_values("TEAM_ABBREVIATION").reset_index(drop=True)
+
+
+def compute_league_context(team_stats):
+    """
+    Computes possessions, PPP, pace and league averages for every team at once. League
+    averages need every team; with fewer than LEAGUE_TEAMS rows they are left as NaN.
+
+    Args:
+        team_stats (pd.DataFrame): One row per team (e.g., from collect_team_stats).
+
+    Returns:
+        pd.DataFrame: TEAM_ABBREVIATION, the source columns, POSS, OFF_PPP, DEF_PPP, PACE,
+                      the LEAGUE_* averages and each team's PPP relative to the league.
+    """
+    context = team_stats.reindex(columns=["TEAM_ABBREVIATION"] + CONTEXT_SOURCE_COLUMNS).reset_index(drop=True)
+    values = {column: context[column].to_numpy(dtype=float) for column in CONTEXT_SOURCE_COLUMNS}
+
+    poss = possessions(values["FGA"], values["FTA"], values["OREB"], values["TOV"])
+    # OPP_PTS_PG is per game; scale it to whatever per-mode PTS is in (totals or per game)
+    games = np.where(values["PTS_PG"] > 0, values["PTS"] / values["PTS_PG"], 1.0)
+    context["POSS"] = poss
+    context["OFF_PPP"] = points_per_possession(values["PTS"], poss)
+    context["DEF_PPP"] = points_per_possession(values["OPP_PTS_PG"] * games, poss)
+    context["PACE"] = values["E_PACE"]
+
+    if len(context) < LEAGUE_TEAMS:
+        print(f"Warning: league context has {len(context)} of {LEAGUE_TEAMS} teams, league averages are left empty")
+        for column in ["LEAGUE_OFF_PPP", "LEAGUE_DEF_PPP", "LEAGUE_PACE", "LEAGUE_OFF_RATING", "LEAGUE_DEF_RATING",
+                       "OFF_PPP_REL", "DEF_PPP_REL"]:
+            context[column] = np.nan
+        return context
+
+    # League averages: PPP weighted by possessions, ratings and pace as team means
+    league_poss = np.nansum(poss)
+    context["LEAGUE_OFF_PPP"] = np.nansum(values["PTS"]) / league_poss if league_poss else np.nan
+    context["LEAGUE_DEF_PPP"] = np.nansum(values["OPP_PTS_PG"] * games) / league_poss if league_poss else np.nan
+    context["LEAGUE_PACE"] = np.nanmean(values["E_PACE"]) if len(context) else np.nan
+    context["LEAGUE_OFF_RATING"] = np.nanmean(values["E_OFF_RATING"]) if len(context) else np.nan
+    context["LEAGUE_DEF_RATING"] = np.nanmean(values["E_DEF_RATING"]) if len(context) else np.nan
+    context["OFF_PPP_REL"] = context["OFF_PPP"] / context["LEAGUE_OFF_PPP"]
+    context["DEF_PPP_REL"] = context["DEF_PPP"] / context["LEAGUE_DEF_PPP"]
+    return context
+
+
+def get_league_context(season, snapshot_date=None, cache_dir="cached_data", refresh=False, nba_data=None):
+    """
+    Returns the league context of a season as of a snapshot date, building and caching it
+    on first use. A cached context is reused until one of its source folders changes.
+
+    Args:
+        season (str): The season in 'YYYY-YY' format.
+        snapshot_date (str, optional): Last date in 'YYYY-MM-DD' format (all dates if None).
+        cache_dir (str): The base directory for cached data.
+        refresh (bool): If True, rebuild even if a cached context is current.
+        nba_data (NBATeamRosters, optional): Used to fetch the league-wide team stats when
+                                             they are not cached.
+
+    Returns:
+        pd.DataFrame: The context table (see compute_league_context).
+    """
+    memo_key = (cache_dir, season, snapshot_date)
+    signature = _source_signature(cache_dir, season, snapshot_date)
+    cached = _league_contexts.get(memo_key)
+    if not refresh and cached is not None and cached[0] == signature:
+        return cached[1]
+
+    cache_manager = get_cache_manager(cache_dir)
+    key = CacheKey.derived(LEAGUE_CONTEXT_TABLE, f"{season}_{snapshot_date or 'latest'}")
+    context = None if refresh else cache_manager.load_snapshot(key, LEAGUE_CONTEXT_VERSION, signature)
+    if context is not None:
+        _league_contexts[memo_key] = (signature, context)
+        return context
+
+    team_stats = load_league_team_stats(season, snapshot_date, cache_dir, nba_data)
+    source = "league team stats"
+    if team_stats is None:
+        team_stats = collect_team_stats(season, snapshot_date, cache_dir)
+        source = "cached per-game team stats"
+    context = compute_league_context(team_stats)
+    context["SEASON"] = season
+    context["SNAPSHOT_DATE"] = snapshot_date
+    print(f"Built league context for {season} as of {snapshot_date or 'latest'} from {source} ({len(context)} teams)")
+
+    # Fetching the league table changed the sources, so the snapshot is signed after it
+    signature = _source_signature(cache_dir, season, snapshot_date)
+    cache_manager.save_snapshot(key, context, LEAGUE_CONTEXT_VERSION, signature)
+    _league_contexts[memo_key] = (signature, context)
+    return context
+
+
+def team_context(context, team_abbr):
+    """
+    Returns one team's row of a league context as a dict, or None if the team is missing.
+    """
+    rows = context[context["TEAM_ABBREVIATION"] == team_abbr]
+    return rows.iloc[0].to_dict() if not rows.empty else None
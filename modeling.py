@@ -13,6 +13,14 @@ import datetime
 import json
 import seaborn as sns
 from cache_manager import CacheManager
+from cache_keys import CacheKey, TEAM_STATS, PLAYER_STATS
+from data_loader import load_slate, load_player_logs_table
+from projections import (matchup_table_from_slate, matchup_table_from_team_table, project_team_totals,
+                         projections_to_dict, slate_games, tagged_players_table, project_player_points)
+from league_context import get_league_context, team_context
+from position_defense import get_position_defense_matrix, position_defense_rating
+from prediction_cache import get_prediction_cache, cached_team_totals, cached_player_points, cached_simulate_slate
+from feature_store import get_feature_store
 import joblib
 import os
 import re
@@ -106,163 +114,26 @@ except FileNotFoundError:
 # In[39]:
 
 
-# Initialize dictionaries to hold the dataframes
-game_dataframes = {}
+# Load every cached team and player frame for today's games, keyed by game, side and season type
+slate = load_slate(today_date, cache_dir=cache_dir)
 
-# Loop through the files in the game directory
-for filename in os.listdir(today_game_dir):
-    if filename.endswith(".joblib"):
-        # Extract the game_id, team, season, and stat type from the filename
-        parts = filename.split('_')
-        
-        # Extract key information from filename
-        game_id = parts[1]  # Example: '22400061'
-        home_or_away = parts[2]  # 'home' or 'away'
-        team_abbr = parts[4]  # Example: 'NYK'
-        season_type = 'prev' if 'prev' in filename else 'curr'  # 'prev' or 'curr'
-        stat_type = 'team' if 'team_stats' in filename else 'player'  # 'team' or 'player'
-        
-        # Load the data
-        filepath = os.path.join(today_game_dir, filename)
-        data = joblib.load(filepath)
-        
-        # Generate a unique name for the dataframe
-        df_name = f"game_{game_id}_{home_or_away}_team_{team_abbr}_{season_type}_{stat_type}_df"
-        
-        # Assign the dataframe to the dynamically generated variable name
-        globals()[df_name] = data
-        
-        # Optionally, store the dataframes in a dictionary for easy access if needed
-        game_dataframes[df_name] = data
-
-# Check created dataframes
-print("Created DataFrames:")
-for df_name in game_dataframes.keys():
-    print(df_name)
+# Check loaded frames
+print(f"Loaded {slate}:")
+for game_id, side, team_abbr, season_type, data in slate.frames(PLAYER_STATS):
+    print(f"{game_id} {side} {team_abbr} {season_type}: {len(data)} players")
 
 
 # In[31]:
 
 
-def consolidate_traded_players(df):
-    """
-    Consolidates player stats by retaining only the 'TOT' row for players with multiple entries 
-    due to trades within the season.
-
-    Args:
-        df (pd.DataFrame): The dataframe containing player stats with potential multiple entries per player.
-
-    Returns:
-        pd.DataFrame: The dataframe with only season totals for traded players.
-    """
-    # Identify players with multiple entries
-    player_counts = df['PLAYER_ID'].value_counts()
-    traded_players = player_counts[player_counts > 1].index
-
-    # Filter out non-TOT entries for traded players
-    df = df[~((df['PLAYER_ID'].isin(traded_players)) & (df['TEAM_ABBREVIATION'] != 'TOT'))]
-
-    # Reset index for a clean DataFrame
-    df = df.reset_index(drop=True)
-    
-    return df
-
-
-# In[35]:
-
-
-# Apply this function only to dataframes ending in '_prev_player_df' or '_curr_player_df'
-for df_name in globals():
-    if df_name.endswith('_prev_player_df') or df_name.endswith('_curr_player_df'):
-        globals()[df_name] = consolidate_traded_players(globals()[df_name])
-
-
-# # Select Top Players and Lineups
-
-# In[ ]:
-
-
-"""
-# Function to tag top players by MIN_x and E_USG_PCT
-def tag_top_players(player_df, df_name):
-    if 'MIN_x' in player_df.columns and 'E_USG_PCT' in player_df.columns:
-        # Sort by MIN_x and E_USG_PCT
-        player_df = player_df.sort_values(by=['MIN_x', 'E_USG_PCT'], ascending=False)
-        
-        # Tag top 6 players as core players ('1')
-        player_df['PLAYER_TAG'] = 0
-        player_df.iloc[:6, player_df.columns.get_loc('PLAYER_TAG')] = 1
-        
-        # Tag next 3-4 players as bench players ('2')
-        player_df.iloc[6:10, player_df.columns.get_loc('PLAYER_TAG')] = 2
-        
-        print(f"Tagged players for dataframe: {df_name}")
-    else:
-        print(f"MIN_x or E_USG_PCT not found in dataframe: {df_name}")
-    
-    return player_df
-"""
-
-
-# In[ ]:
-
-
-"""
-# Loop through the available player dataframes and apply the tagging
-for df_name in globals():
-    if df_name.endswith('_player_df'):  # Only apply to player dataframes
-        globals()[df_name] = tag_top_players(globals()[df_name], df_name)
-"""
-
-
-# ## Manual Tagging
-
-# In[ ]:
-
-
-"""
-# Dictionary to store manual tags, format: {PLAYER_ID: TAG}
-manual_tags = {
-    # Example: Add your manual player tags here
-    # 'PLAYER_ID': tag_value (1 for core, 2 for bench, etc.)
-    1628369: 1,  # Example: Manually tagging PLAYER_ID 1628369 as core player
-    203507: 2,   # Example: Manually tagging PLAYER_ID 203507 as bench player
-}
-
-# Function to tag top players by MIN_x and E_USG_PCT with manual override option
-def tag_top_players_with_manual_override(player_df, df_name):
-    if 'MIN_x' in player_df.columns and 'E_USG_PCT' in player_df.columns:
-        # Sort by MIN_x and E_USG_PCT
-        player_df = player_df.sort_values(by=['MIN_x', 'E_USG_PCT'], ascending=False)
-        
-        # Tag top 6 players as core players ('1')
-        player_df['PLAYER_TAG'] = 0
-        player_df.iloc[:6, player_df.columns.get_loc('PLAYER_TAG')] = 1
-        
-        # Tag next 3-4 players as bench players ('2')
-        player_df.iloc[6:10, player_df.columns.get_loc('PLAYER_TAG')] = 2
-
-        # Apply manual tags if they exist
-        for index, row in player_df.iterrows():
-            player_id = row['PLAYER_ID']
-            if player_id in manual_tags:
-                player_df.at[index, 'PLAYER_TAG'] = manual_tags[player_id]
-                print(f"Manual tag applied: Player ID {player_id} tagged as {manual_tags[player_id]} in {df_name}")
-        
-        print(f"Tagged players for dataframe: {df_name}")
-    else:
-        print(f"MIN_x or E_USG_PCT not found in dataframe: {df_name}")
-    
-    return player_df
-
-# Loop through the available player dataframes and apply the tagging with manual override
-for df_name in globals():
-    if df_name.endswith('_player_df'):  # Only apply to player dataframes
-        globals()[df_name] = tag_top_players_with_manual_override(globals()[df_name], df_name)
-
-# Example check on one dataframe
-print(game_22400061_away_team_NYK_prev_player_df.head())
-"""
+# Player frames are consolidated (traded players keep only their 'TOT' row) and tagged
+# (1 = core, 2 = bench) with manual_tags.csv joined in: by the game-day pull for new frames,
+# and by load_slate for frames cached before that. After editing manual_tags.csv, re-tag the
+# cache with: python player_tags.py
+untagged = [f"{game_id} {side} {season_type}" for game_id, side, _, season_type, data in slate.frames(PLAYER_STATS)
+            if not data.empty and 'PLAYER_TAG' not in data.columns]
+if untagged:
+    raise ValueError(f"Untagged player frames on the slate: {', '.join(untagged)}")
 
 
 # # Lineup and GameLogs
@@ -312,15 +183,9 @@ def fetch_and_cache_game_logs_based_on_tags(player_df, df_name, season, game_dat
 # Define pause time (in seconds) between each player log pull
 pause_time = 1.5  # Adjust the pause time as necessary
 
-# Collect all dataframe names with 'prev_player_df' in the name
-prev_player_dfs = [df_name for df_name in globals() if 'prev_player_df' in df_name]
-
-# Loop through collected dataframe names
-for df_name in prev_player_dfs:
-    print(f"Processing dataframe: {df_name}")
-    
-    # Get the dataframe
-    player_df = globals()[df_name]
+# Loop through the previous season player frames on the slate
+for game_id, side, team_abbr, season_type, player_df in slate.frames(PLAYER_STATS, "prev"):
+    print(f"Processing {side} team {team_abbr} in game {game_id}")
     
     # Check if the 'PLAYER_TAG' column exists
     if 'PLAYER_TAG' in player_df.columns:
@@ -329,17 +194,13 @@ for df_name in prev_player_dfs:
         # Fetch and cache logs for each tagged player
         for _, player in tagged_players.iterrows():
             player_id = player['PLAYER_ID']
-            game_id = df_name.split('_')[1]  # Extract game ID from the dataframe name
-            
-            # Generate a new filename based on game ID and player ID
-            player_log_filename = f"game_{game_id}_player_{player_id}_logs"
             
-            # Fetch player logs (adjust season as necessary)
-            player_logs = nba_data.fetch_player_game_logs(player_id, "2023-24")
+            # Fetch the previous season's player logs, the season the projections average
+            player_logs = nba_data.fetch_player_game_logs(player_id, previous_season)
             
             if not player_logs.empty:
-                # Cache the player logs with the new naming convention
-                cache_manager.cache_data(player_logs, player_log_filename, game_date)
+                # Cache the player logs under the canonical per-season key
+                cache_manager.save(CacheKey.player_logs(player_id, previous_season, game_date=game_date, game_id=game_id), player_logs)
                 print(f"Cached player logs for Player ID {player_id} in game {game_id}")
             else:
                 print(f"No logs available for Player ID {player_id} in game {game_id}")
@@ -347,56 +208,35 @@ for df_name in prev_player_dfs:
             # Pause between each player log pull to avoid overwhelming the API
             time.sleep(pause_time)
     else:
-        print(f"No PLAYER_TAG column found in {df_name}")
+        print(f"No PLAYER_TAG column found for {team_abbr} in game {game_id}")
 
 
+# # Predictive Model
+
 # In[ ]:
 
 
-def load_cached_game_logs(cache_dir):
-    """
-    Loads all cached player game logs from the specified directory into dataframes.
-    
-    Args:
-        cache_dir (str): The directory where player game logs are stored.
-        
-    Returns:
-        dict: A dictionary of dataframes, where the keys are the game log filenames.
-    """
-    player_game_logs = {}
-
-    # Iterate over the game date folders
-    for game_date_folder in os.listdir(cache_dir):
-        game_date_path = os.path.join(cache_dir, game_date_folder)
-        
-        # Look for the player_logs subdirectory
-        player_logs_dir = os.path.join(game_date_path, f"player_logs_{game_date_folder.replace('-', '')}")
-        if os.path.exists(player_logs_dir):
-            # Load all the player log files in this subdirectory
-            for filename in os.listdir(player_logs_dir):
-                if filename.endswith(".joblib"):
-                    filepath = os.path.join(player_logs_dir, filename)
-                    player_log_df = joblib.load(filepath)
-                    player_game_logs[filename] = player_log_df
-                    print(f"Loaded {filename}")
-    
-    return player_game_logs
+# Possessions, PPP, pace and league averages for all 30 teams, computed once per season and date
+# from the league-wide team stats (fetched on first use, then cached)
+league_context = get_league_context(previous_season, today_date, cache_dir=cache_dir, nba_data=nba_data)
+league_context[['TEAM_ABBREVIATION', 'POSS', 'OFF_PPP', 'DEF_PPP', 'PACE', 'OFF_PPP_REL', 'DEF_PPP_REL']]
 
 
 # In[ ]:
 
 
-# Define the base cache directory
-cache_dir = "C:/Users/justi/Documents/__ballAnalytics/bball/NBAModel/cached_data"
+# Team x opponent-position defensive ratings from the cached matchup rollups, with defenders
+# mapped to their team by the season's league-wide player stats (fetched on first use)
+position_defense_matrix = get_position_defense_matrix(previous_season, cache_dir=cache_dir, nba_data=nba_data)
+position_defense_matrix.round(1)
 
-# Call the function to load player game logs
-player_game_logs = load_cached_game_logs(cache_dir)
 
-# Print the loaded player game logs to see which ones are available
-print(f"Loaded player game logs: {list(player_game_logs.keys())}")
+# In[ ]:
 
 
-# # Predictive Model
+# Projections of games whose inputs did not change since the last run are reused from here
+prediction_cache = get_prediction_cache("modeling", cache_dir=cache_dir)
+
 
 # In[ ]:
 
@@ -473,42 +313,31 @@ def calculate_team_total_with_ppp(team_stats_df, opp_stats_df):
     return predicted_pts
 
 
-def predict_team_totals_with_ppp(todays_games, team_stats_dict):
+def predict_team_totals_with_ppp(slate, season_type="prev", league_context=None, prediction_cache=None):
     """
-    Loops through today's games and predicts total points for each game using PPP, offensive/defensive metrics, and pace.
+    Predicts total points for each of today's games using PPP, offensive/defensive metrics, and pace.
     
     Args:
-        todays_games (pd.DataFrame): DataFrame of today's games.
-        team_stats_dict (dict): Dictionary containing team stats for each game (by game ID).
+        slate (GameSlate): Today's games with their cached team stats.
+        season_type (str): 'prev' or 'curr' team stats.
+        league_context (pd.DataFrame, optional): League context to read team stats from
+                                                 instead of the slate's frames.
+        prediction_cache (PredictionCache, optional): Reuse the totals of unchanged games.
         
     Returns:
         dict: Dictionary with predicted points for home and away teams for each game.
     """
-    predictions = {}
-
-    for _, game in todays_games.iterrows():
-        game_id = game['Game ID']
-        home_team_abbr = game['Home Team Abbreviation']
-        away_team_abbr = game['Visiting Team Abbreviation']
-
-        # Fetch the team stats for home and away teams
-        home_team_stats = team_stats_dict[f'game_{game_id}_home_team_{home_team_abbr}_prev_team_stats']
-        away_team_stats = team_stats_dict[f'game_{game_id}_away_team_{away_team_abbr}_prev_team_stats']
-
-        # Predict points for home and away teams using PPP
-        home_team_total = calculate_team_total_with_ppp(home_team_stats, away_team_stats)
-        away_team_total = calculate_team_total_with_ppp(away_team_stats, home_team_stats)
-
-        # Store the predictions for this game
-        predictions[game_id] = {
-            'home_team': home_team_abbr,
-            'home_team_total': home_team_total,
-            'away_team': away_team_abbr,
-            'away_team_total': away_team_total
-        }
+    # Project every game at once from an aligned home/away table
+    if league_context is not None:
+        matchups = matchup_table_from_team_table(slate_games(slate), league_context)
+    else:
+        matchups = matchup_table_from_slate(slate, season_type)
+    projections = cached_team_totals(matchups, prediction_cache) if prediction_cache is not None else project_team_totals(matchups)
+    predictions = projections_to_dict(projections)
 
-        print(f"Game ID {game_id}: Predicted Home ({home_team_abbr}) Points: {home_team_total:.2f}")
-        print(f"Game ID {game_id}: Predicted Away ({away_team_abbr}) Points: {away_team_total:.2f}")
+    for game_id, game in predictions.items():
+        print(f"Game ID {game_id}: Predicted Home ({game['home_team']}) Points: {game['home_team_total']:.2f}")
+        print(f"Game ID {game_id}: Predicted Away ({game['away_team']}) Points: {game['away_team_total']:.2f}")
 
     return predictions
 
@@ -516,36 +345,11 @@ def predict_team_totals_with_ppp(todays_games, team_stats_dict):
 # In[ ]:
 
 
-# Example team stats dictionary
-team_stats_dict = {
-    'game_22400063_away_team_IND_prev_team_stats': game_22400063_away_team_IND_prev_player_df,
-    'game_22400063_home_team_DET_prev_team_stats': game_22400063_home_team_DET_prev_player_df,
-    'game_22400064_away_team_BKN_prev_team_stats': game_22400064_away_team_BKN_prev_player_df,
-    'game_22400064_home_team_ATL_prev_team_stats': game_22400064_home_team_ATL_prev_player_df,
-    'game_22400065_away_team_ORL_prev_team_stats': game_22400065_away_team_ORL_prev_player_df,
-    'game_22400065_home_team_MIA_prev_team_stats': game_22400065_home_team_MIA_prev_player_df,
-    'game_22400066_away_team_MIL_prev_team_stats': game_22400066_away_team_MIL_prev_player_df,
-    'game_22400066_home_team_PHI_prev_team_stats': game_22400066_home_team_PHI_prev_player_df,
-    'game_22400067_away_team_CLE_prev_team_stats': game_22400067_away_team_CLE_prev_player_df,
-    'game_22400067_home_team_TOR_prev_team_stats': game_22400067_home_team_TOR_prev_player_df,
-    'game_22400068_away_team_CHA_prev_team_stats': game_22400068_away_team_CHA_prev_player_df,
-    'game_22400068_home_team_HOU_prev_team_stats': game_22400068_home_team_HOU_prev_player_df,
-    'game_22400069_away_team_CHI_prev_team_stats': game_22400069_away_team_CHI_prev_player_df,
-    'game_22400069_home_team_NOP_prev_team_stats': game_22400069_home_team_NOP_prev_player_df,
-    'game_22400070_away_team_MEM_prev_team_stats': game_22400070_away_team_MEM_prev_player_df,
-    'game_22400070_home_team_UTA_prev_team_stats': game_22400070_home_team_UTA_prev_player_df,
-    'game_22400071_away_team_PHX_prev_team_stats': game_22400071_away_team_PHX_prev_player_df,
-    'game_22400071_home_team_LAC_prev_team_stats': game_22400071_home_team_LAC_prev_player_df,
-    'game_22400072_away_team_GSW_prev_team_stats': game_22400072_away_team_GSW_prev_player_df,
-    'game_22400072_home_team_POR_prev_team_stats': game_22400072_home_team_POR_prev_player_df
-}
-
-
 # In[ ]:
 
 
 # Predict team totals for today's games using PPP
-team_total_predictions = predict_team_totals_with_ppp(todays_games, team_stats_dict)
+team_total_predictions = predict_team_totals_with_ppp(slate, league_context=league_context, prediction_cache=prediction_cache)
 
 
 # # Predict Player Points
@@ -557,64 +361,47 @@ import os
 import joblib
 import pandas as pd
 
-# Path where player logs are stored
-player_logs_dir = "C:/Users/justi/Documents/__ballAnalytics/bball/NBAModel/cached_data/2024-10-22"
-
-def calculate_expected_points_for_tagged_players(player_stats_df, player_logs_dir, opp_def_stats):
+def calculate_expected_points_for_tagged_players(slate, season, cache_dir, season_type="prev", league_context=None,
+                                                 prediction_cache=None):
     """
-    Calculate expected points for tagged players based on their game logs.
+    Calculate expected points for the tagged players of every game on the slate in one pass.
+    Season averages are read from the feature store (new cached log rows are folded in
+    first), then adjusted by the opponent's pace and defensive rating.
     
     Args:
-        player_stats_df (pd.DataFrame): DataFrame with tagged player stats.
-        player_logs_dir (str): Path to the directory containing player logs.
-        opp_def_stats (pd.DataFrame): Opponent defensive statistics (def_rating, pace, etc.).
+        slate (GameSlate): Today's games with their (tagged) player stats and team stats.
+        season (str): The season of the player logs in 'YYYY-YY' format.
+        cache_dir (str): The base cache directory holding the player logs.
+        season_type (str): 'prev' or 'curr' player and team stats.
+        league_context (pd.DataFrame, optional): League context to read opponent stats from.
+        prediction_cache (PredictionCache, optional): Reuse the projections of unchanged games.
     
     Returns:
-        pd.DataFrame: DataFrame containing players and their expected points.
+        pd.DataFrame: One row per player with game, team, tag and expected points.
     """
-    expected_points_list = []
-    
-    for _, player in player_stats_df.iterrows():
-        player_id = player['PLAYER_ID']
-        player_name = player['PLAYER']
-        player_tag = player['PLAYER_TAG']  # Core or bench tag
+    players = tagged_players_table(slate, season_type, league_context=league_context)
+    feature_store = get_feature_store(season, cache_dir=cache_dir, player_ids=players['PLAYER_ID'])
+    features = feature_store.features(players['PLAYER_ID'])
+    if prediction_cache is not None:
+        return cached_player_points(players, prediction_cache, features=features)
+    return project_player_points(players, features=features)
 
-        # Build the file name for player logs (adjust for .joblib issue)
-        player_log_file = os.path.join(player_logs_dir, f"game_22400062_player_{player_id}_logs.joblib.joblib")
-        
-        # Check if the player log file exists and load it
-        if os.path.exists(player_log_file):
-            player_logs = joblib.load(player_log_file)
-            
-            # Calculate average points from the logs
-            avg_points_per_game = player_logs['PTS'].mean() if not player_logs.empty else 0
-        else:
-            print(f"Player log file for {player_name} (ID: {player_id}) not found.")
-            avg_points_per_game = 0
-
-        # Adjust expected points based on opponent defensive stats
-        opp_def_rating = opp_def_stats['E_DEF_RATING'].values[0]
-        opp_pace = opp_def_stats['E_PACE'].values[0]
-        
-        expected_points = avg_points_per_game * (opp_pace / 100) * (100 / opp_def_rating)
+# Expected points for both teams of every game
+expected_points_df = calculate_expected_points_for_tagged_players(slate, previous_season, cache_dir, league_context=league_context,
+                                                                  prediction_cache=prediction_cache)
 
-        # Store results
-        expected_points_list.append({
-            'Player_ID': player_id,
-            'Player_Name': player_name,
-            'Player_Tag': player_tag,
-            'Expected_Points': expected_points
-        })
-    
-    return pd.DataFrame(expected_points_list)
+print(expected_points_df)
 
-# Example call
-# Let's assume we have home_player_previous, away_player_previous, and opp_def_stats available
-home_expected_points_df = calculate_expected_points_for_tagged_players(home_player_previous, player_logs_dir, away_team_def_stats)
-away_expected_points_df = calculate_expected_points_for_tagged_players(away_player_previous, player_logs_dir, home_team_def_stats)
 
-print(home_expected_points_df)
-print(away_expected_points_df)
+# In[ ]:
+
+
+# Simulated distributions of team totals, game totals and spreads for every game on the slate
+slate_players = tagged_players_table(slate, league_context=league_context)
+slate_player_logs = load_player_logs_table(slate_players['PLAYER_ID'], previous_season, cache_dir=cache_dir)
+simulation = cached_simulate_slate(slate_players, slate_player_logs, prediction_cache, n_sims=20000)
+
+print(simulation['games'][['Game ID', 'Home Team', 'Away Team', 'Total Mean', 'Total P5', 'Total P95', 'Spread Mean']])
 
 
 # In[ ]:
@@ -650,25 +437,14 @@ print(away_expected_points_df)
 # In[ ]:
 
 
-import os
-import joblib
-
 # Example player ID and game ID
 player_id = 1628369  # Example: Jayson Tatum
 game_id = "22400062"  # Example game ID, replace with actual game ID
-game_logs_dir = "C:/Users/justi/Documents/__ballAnalytics/bball/NBAModel/cached_data/2024-10-22/game_logs_20241022"  # Adjust to your directory
-
-# Construct the path based on the game and player ID format
-player_logs_path = f"{game_logs_dir}/game_{game_id}_player_{player_id}_logs.joblib"
 
-# Check for both extensions (.joblib and .joblib.joblib)
-if os.path.exists(player_logs_path):
-    player_logs = joblib.load(player_logs_path)
-elif os.path.exists(player_logs_path + ".joblib"):
-    player_logs = joblib.load(player_logs_path + ".joblib")
-else:
+# Logs cached under older per-game file names are moved to the canonical path by cache_migrate.py
+player_logs = cache_manager.load_player_logs(player_id, previous_season, game_date="2024-10-22", game_id=game_id)
+if player_logs is None:
     print(f"No game logs found for Player ID {player_id} in Game ID {game_id}.")
-    player_logs = None
 
 # If logs are found, print them
 if player_logs is not None:
@@ -679,18 +455,14 @@ if player_logs is not None:
 # In[ ]:
 
 
-import joblib
-import os
-
-# Path to a specific player log file
-player_log_file = "C:/Users/justi/Documents/__ballAnalytics/bball/NBAModel/cached_data/2024-10-22/game_22400062_player_1628978_logs.joblib.joblib"
+# Load a specific player's logs through the cache key
+player_log_key = CacheKey.player_logs(1628978, previous_season, game_date="2024-10-22", game_id="22400062")
+player_logs = cache_manager.load(player_log_key)
 
-# Check if the file exists before loading
-if os.path.exists(player_log_file):
-    player_logs = joblib.load(player_log_file)
+if player_logs is not None:
     print(player_logs.head())  # Display the first few rows to check
 else:
-    print(f"File {player_log_file} not found.")
+    print(f"Logs for {player_log_key} not found.")
 
 
 # In[ ]:
@@ -882,15 +654,17 @@ def adjust_points_based_on_position(player_stats, opp_team_defense, position_def
     Args:
         player_stats (pd.DataFrame): Stats of the player.
         opp_team_defense (pd.DataFrame): Opponent's defensive stats.
-        position_defense_matrix (pd.DataFrame): Matrix indicating how the opponent defends each position.
+        position_defense_matrix (pd.DataFrame): Team x position matrix from position_defense.get_position_defense_matrix.
     
     Returns:
         float: Adjusted points for the player.
     """
-    player_position = player_stats['POSITION'].values[0]
+    # Frames cached before POSITION was added at pull fall back to the overall rating
+    player_position = player_stats['POSITION'].values[0] if 'POSITION' in player_stats.columns else None
     
-    # Get the opponent's defensive performance against this position
-    position_def_rating = position_defense_matrix.get(player_position, opp_team_defense['E_DEF_RATING'].values[0])
+    # Get the opponent's defensive performance against this position, or its overall rating
+    position_def_rating = position_defense_rating(position_defense_matrix, opp_team_defense['TEAM_ABBREVIATION'].values[0],
+                                                  player_position, default=opp_team_defense['E_DEF_RATING'].values[0])
     
     player_points = player_stats['PTS'].mean()  # Example: could be adjusted based on recent performance
     adjusted_points = player_points * (player_stats['E_OFF_RATING'].values[0] / position_def_rating)
@@ -913,12 +687,12 @@ def adjust_points_based_on_position(player_stats, opp_team_defense, position_def
 # In[ ]:
 
 
-def calculate_expected_points_for_all_games(todays_games, player_logs):
+def calculate_expected_points_for_all_games(slate, player_logs):
     """
     Calculate expected points for all games in today's schedule, based on player logs and team defense.
     
     Args:
-        todays_games (pd.DataFrame): DataFrame containing today's game information.
+        slate (GameSlate): Today's games with their cached team and player stats.
         player_logs (pd.DataFrame): DataFrame containing player game logs.
     
     Returns:
@@ -927,19 +701,17 @@ def calculate_expected_points_for_all_games(todays_games, player_logs):
     all_games_expected_points = {}
     
     # Loop through each game
-    for _, game in todays_games.iterrows():
-        game_id = game['Game ID']
-        home_team_abbr = game['Home Team Abbreviation']
-        away_team_abbr = game['Visiting Team Abbreviation']
-        game_date = game['Game Date']
+    for game_id in slate.game_ids():
+        home_team_abbr = slate.team(game_id, 'home')
+        away_team_abbr = slate.team(game_id, 'away')
         
-        # Load home and away player dataframes (replace with actual dataframes for home and away teams)
-        home_player_df = globals()[f'game_{game_id}_home_team_{home_team_abbr}_prev_player_df']
-        away_player_df = globals()[f'game_{game_id}_away_team_{away_team_abbr}_prev_player_df']
+        # Home and away player frames
+        home_player_df = slate.player_stats(game_id, 'home', 'prev')
+        away_player_df = slate.player_stats(game_id, 'away', 'prev')
         
-        # Load defensive stats for opponent teams
-        home_team_def_stats = globals()[f'game_{game_id}_home_team_{home_team_abbr}_prev_team_df']
-        away_team_def_stats = globals()[f'game_{game_id}_away_team_{away_team_abbr}_prev_team_df']
+        # Defensive stats for opponent teams
+        home_team_def_stats = slate.team_stats(game_id, 'home', 'prev')
+        away_team_def_stats = slate.team_stats(game_id, 'away', 'prev')
         
         # Calculate expected points for home team players
         print(f"Calculating expected points for home team {home_team_abbr} players...")
@@ -960,7 +732,7 @@ def calculate_expected_points_for_all_games(todays_games, player_logs):
     return all_games_expected_points
 
 # Call the function to calculate expected points for all games
-all_games_expected_points = calculate_expected_points_for_all_games(todays_games, player_logs)
+all_games_expected_points = calculate_expected_points_for_all_games(slate, player_logs)
 
 
 # In[ ]:
@@ -1074,18 +846,18 @@ all_games_expected_points
 # In[ ]:
 
 
-def calculate_team_possessions_and_ppp(team_df):
+def calculate_team_possessions_and_ppp(team_abbr, league_context):
     """
-    Calculates the total possessions and points per possession (PPP) for a team.
+    Looks up the possessions and points per possession (PPP) of a team in the league context.
     Args:
-        team_df (pd.DataFrame): DataFrame containing team statistics.
+        team_abbr (str): Team abbreviation (e.g., 'BOS').
+        league_context (pd.DataFrame): Table from league_context.get_league_context.
     
     Returns:
         float: Points per possession (PPP).
     """
-    possessions = team_df['FGA'] + 0.44 * team_df['FTA'] - team_df['OREB'] + team_df['TOV']
-    ppp = team_df['PTS'] / possessions
-    return ppp
+    team = team_context(league_context, team_abbr)
+    return team['OFF_PPP'] if team is not None else None
 
 
 # In[ ]:
@@ -1153,18 +925,28 @@ def calculate_team_total_points(player_stats, opponent_def_stats):
 # In[ ]:
 
 
-def list_available_dataframes():
+def list_available_dataframes(slate):
     """
-    Lists the names of all dataframes currently available in the global scope.
+    Lists the team and player frames loaded on a slate.
+
+    Args:
+        slate (GameSlate): The loaded slate.
+
+    Returns:
+        list: (game_id, side, team_abbr, season_type, stats_type) for each frame.
     """
-    available_dataframes = [name for name in globals() if isinstance(globals()[name], pd.DataFrame)]
+    available_dataframes = [
+        (game_id, side, team_abbr, season_type, entity)
+        for entity in (TEAM_STATS, PLAYER_STATS)
+        for game_id, side, team_abbr, season_type, _ in slate.frames(entity)
+    ]
     print("Available DataFrames:")
-    for df_name in available_dataframes:
-        print(df_name)
+    for frame in available_dataframes:
+        print(frame)
     return available_dataframes
 
 # Call the function to list the available DataFrames
-available_dataframes = list_available_dataframes()
+available_dataframes = list_available_dataframes(slate)
 
 
 # In[ ]:
@@ -0,0 +1,418 @@
+# pipeline.py
+
+import os
+import json
+import time
+import threading
+import joblib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+# Folder (inside the cache directory) holding pipeline checkpoints
+CHECKPOINT_DIR = os.path.join("cached_data", "checkpoints")
+
+# Statuses a task can end a run with
+COMPLETED = "completed"
+CACHED = "cached"
+RESUMED = "resumed"
+NOT_NEEDED = "not_needed"
+FAILED = "failed"
+UPSTREAM_FAILED = "upstream_failed"
+
+
+class RateLimiter:
+    """
+    Spaces API calls out so that all threads together stay within one request budget.
+    Replaces the fixed time.sleep(pause_time) calls between requests.
+    """
+    def __init__(self, calls_per_minute=6):
+        """
+        Args:
+            calls_per_minute (float): Allowed API calls per minute across all threads.
+        """
+        self.calls_per_minute = calls_per_minute
+        self.min_interval = 60.0 / calls_per_minute
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self.calls = defaultdict(int)
+
+    def acquire(self, endpoint="other"):
+        """
+        Blocks until the next call slot and records the call.
+
+        Args:
+            endpoint (str): The endpoint being called (used for the per-endpoint call counts).
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+            self.calls[endpoint] += 1
+        if slot > now:
+            time.sleep(slot - now)
+
+    def estimate_seconds(self, num_calls):
+        """
+        Returns the minimum wall time for a number of calls at this budget.
+        """
+        return max(num_calls - 1, 0) * self.min_interval
+
+
+class Checkpoint:
+    """
+    Durable record of finished pipeline tasks. Each finished task's output is written to its own
+    file and then appended to a log with its content hash, so a crashed run can be resumed with
+    only the unfinished tasks left to do.
+    """
+    def __init__(self, run_id, checkpoint_dir=CHECKPOINT_DIR, resume=False, read_only=False):
+        """
+        Args:
+            run_id (str): Identifies the run (e.g., 'game_day_2024-10-22').
+            checkpoint_dir (str): Folder holding all checkpoints.
+            resume (bool): If True, tasks recorded by a previous run are reused; otherwise the
+                           previous checkpoint of this run is discarded.
+            read_only (bool): If True (dry runs), nothing on disk is created, cleared or recorded.
+                              Without resume the checkpoint then looks empty, as it would to
+                              the real run after it was discarded.
+        """
+        self.run_id = run_id
+        self.directory = os.path.join(checkpoint_dir, run_id)
+        self.log_path = os.path.join(self.directory, "progress.jsonl")
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self.entries = {}
+
+        if resume:
+            self.entries = self._read_log()
+            print(f"Resuming {run_id}: {len(self.entries)} tasks already finished")
+        elif not read_only:
+            os.makedirs(self.directory, exist_ok=True)
+            self.clear()
+
+    def _read_log(self):
+        entries = {}
+        if not os.path.exists(self.log_path):
+            return entries
+        with open(self.log_path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A crash can leave the last line half written
+                    continue
+                entries[entry["task"]] = entry
+        return entries
+
+    def _output_path(self, task_name):
+        return os.path.join(self.directory, f"{joblib.hash(task_name)}.joblib")
+
+    def clear(self):
+        """
+        Removes every recorded task of this run.
+        """
+        with self._lock:
+            self.entries = {}
+            for file_name in os.listdir(self.directory):
+                os.remove(os.path.join(self.directory, file_name))
+
+    def has(self, task_name):
+        """
+        True if the task finished in a previous attempt of this run.
+        """
+        return task_name in self.entries
+
+    def record(self, task_name, output):
+        """
+        Persists a finished task's output and appends it to the progress log.
+
+        Returns:
+            str: The content hash of the output.
+
+        Raises:
+            ValueError: If the checkpoint was opened read-only.
+        """
+        if self.read_only:
+            raise ValueError(f"Checkpoint {self.run_id} is read-only.")
+        os.makedirs(self.directory, exist_ok=True)
+        content_hash = joblib.hash(output)
+        output_path = self._output_path(task_name)
+        temp_path = f"{output_path}.tmp{threading.get_ident()}"
+        joblib.dump(output, temp_path)
+        os.replace(temp_path, output_path)
+
+        entry = {"task": task_name, "hash": content_hash, "finished_at": time.time()}
+        with self._lock:
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries[task_name] = entry
+        return content_hash
+
+    def load(self, task_name):
+        """
+        Loads a recorded task's output, verifying its content hash.
+
+        Raises:
+            ValueError: If the stored output does not match the recorded hash.
+        """
+        output = joblib.load(self._output_path(task_name))
+        if joblib.hash(output) != self.entries[task_name]["hash"]:
+            raise ValueError(f"Checkpoint for '{task_name}' does not match its recorded hash.")
+        return output
+
+
+@dataclass
+class Task:
+    """
+    One unit of work in a pipeline.
+
+    Attributes:
+        name (str): Unique task name, e.g. 'roster(BOS)' or 'merge_team_stats(BOS, prev)'.
+        run (callable): Called with a dict {input name: output} and returns the task's output.
+        inputs (list): Names of the tasks whose outputs this task needs.
+        is_complete (callable, optional): Returns True if the task's output is already persisted.
+        load (callable, optional): Loads a completed task's output when a dependent needs it.
+        calls (dict): API calls the task makes when it runs, {endpoint: count} (used for planning).
+        estimated (bool): True if the call counts are estimates (e.g., before a roster is known).
+    """
+    name: str
+    run: Callable
+    inputs: List[str] = field(default_factory=list)
+    is_complete: Optional[Callable] = None
+    load: Optional[Callable] = None
+    calls: dict = field(default_factory=dict)
+    estimated: bool = False
+
+
+class Pipeline:
+    """
+    Runs tasks as a dependency graph: a task starts as soon as all its inputs are done, independent
+    tasks run concurrently, and tasks whose outputs are already persisted are skipped.
+    """
+    def __init__(self, max_workers=4, checkpoint=None):
+        """
+        Args:
+            max_workers (int): Number of tasks run at the same time.
+            checkpoint (Checkpoint, optional): Records finished tasks so the run can be resumed.
+        """
+        self.max_workers = max_workers
+        self.checkpoint = checkpoint
+        self.tasks = {}
+
+    def add(self, name, run, inputs=None, is_complete=None, load=None, calls=None, estimated=False):
+        """
+        Adds a task. Adding a task name that already exists keeps the first definition, so shared
+        work (e.g. a team that plays twice, or league-wide metrics) is only declared once.
+
+        Returns:
+            str: The task name (to use as an input of other tasks).
+        """
+        if name not in self.tasks:
+            self.tasks[name] = Task(name, run, list(inputs or []), is_complete, load, dict(calls or {}), estimated)
+        return name
+
+    def _topological_order(self):
+        """
+        Returns the task names in dependency order.
+
+        Raises:
+            ValueError: If an input is not a task or the graph has a cycle.
+        """
+        pending_inputs = {}
+        dependents = defaultdict(list)
+        for task in self.tasks.values():
+            for input_name in task.inputs:
+                if input_name not in self.tasks:
+                    raise ValueError(f"Task '{task.name}' depends on unknown task '{input_name}'.")
+                dependents[input_name].append(task.name)
+            pending_inputs[task.name] = len(task.inputs)
+
+        order = []
+        ready = [name for name, count in pending_inputs.items() if count == 0]
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for dependent in dependents[name]:
+                pending_inputs[dependent] -= 1
+                if pending_inputs[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) != len(self.tasks):
+            raise ValueError("Pipeline has a dependency cycle.")
+        return order
+
+    def dependents(self):
+        """
+        Returns {task name: [names of tasks that take it as an input]}.
+        """
+        dependents = defaultdict(list)
+        for task in self.tasks.values():
+            for input_name in task.inputs:
+                dependents[input_name].append(task.name)
+        return dependents
+
+    def plan(self):
+        """
+        Works out which tasks have to run, which can be loaded from persisted outputs and which
+        are not needed. A task runs if its output is not persisted, or if a task that runs needs
+        its output and it cannot be loaded.
+
+        Tasks without is_complete are intermediate: they only run when a dependent needs them.
+        Tasks without is_complete and without dependents always run. Tasks recorded in the
+        checkpoint are reloaded from it instead of rerun.
+
+        Returns:
+            dict: {task name: 'run', 'load', 'resume' or 'skip'}
+        """
+        dependents = self.dependents()
+        actions = {}
+        for name in reversed(self._topological_order()):
+            task = self.tasks[name]
+            output_needed = any(actions[dependent] in ("run", "resume") for dependent in dependents[name])
+            checkpointed = self.checkpoint is not None and self.checkpoint.has(name)
+            if task.is_complete is not None:
+                complete = task.is_complete()
+            else:
+                complete = bool(dependents[name])
+            if complete and not output_needed:
+                actions[name] = "skip"
+            elif complete and task.load is not None:
+                actions[name] = "load"
+            elif checkpointed and output_needed:
+                # Tasks that persist their own output (e.g., saves) rerun if it went missing
+                actions[name] = "resume"
+            else:
+                actions[name] = "run"
+        return actions
+
+    def run(self, on_task_done=None, actions=None):
+        """
+        Runs the pipeline.
+
+        Args:
+            on_task_done (callable, optional): Called as on_task_done(name, status, actions) after
+                each task that ran, was loaded or failed, and for every task skipped because
+                an upstream task failed (e.g., for progress reporting).
+            actions (dict, optional): A plan from plan() to execute as is (computed if None).
+
+        Returns:
+            dict: 'statuses' ({task name: status}), 'errors' ({task name: error}), 'durations'
+                  ({task name: seconds}), 'wall_seconds', 'critical_path' (task names) and
+                  'critical_path_seconds'.
+        """
+        start = time.perf_counter()
+        actions = actions if actions is not None else self.plan()
+        dependents = self.dependents()
+        outputs, statuses, errors, durations = {}, {}, {}, {}
+        remaining_inputs = {name: len(task.inputs) for name, task in self.tasks.items()}
+
+        def execute(task):
+            task_start = time.perf_counter()
+            try:
+                if actions[task.name] == "load":
+                    return task.load(), CACHED
+                if actions[task.name] == "resume":
+                    try:
+                        return self.checkpoint.load(task.name), RESUMED
+                    except Exception as e:
+                        print(f"[pipeline] Checkpoint for {task.name} unusable ({e}), rerunning")
+                output = task.run({input_name: outputs.get(input_name) for input_name in task.inputs})
+                if self.checkpoint is not None:
+                    self.checkpoint.record(task.name, output)
+                return output, COMPLETED
+            finally:
+                durations[task.name] = time.perf_counter() - task_start
+
+        def finish(name, status):
+            statuses[name] = status
+            released = []
+            for dependent in dependents[name]:
+                remaining_inputs[dependent] -= 1
+                if remaining_inputs[dependent] == 0:
+                    released.append(dependent)
+            return released
+
+        def mark_upstream_failed(name):
+            # Everything downstream of a failed task is skipped
+            marked = []
+            stack = list(dependents[name])
+            while stack:
+                dependent = stack.pop()
+                if dependent not in statuses:
+                    statuses[dependent] = UPSTREAM_FAILED
+                    marked.append(dependent)
+                    stack.extend(dependents[dependent])
+            return marked
+
+        ready = [name for name, count in remaining_inputs.items() if count == 0]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+            while ready or running:
+                while ready:
+                    name = ready.pop(0)
+                    if name in statuses:
+                        continue
+                    if actions[name] == "skip":
+                        ready.extend(finish(name, NOT_NEEDED))
+                        continue
+                    running[executor.submit(execute, self.tasks[name])] = name
+
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    skipped = []
+                    try:
+                        outputs[name], status = future.result()
+                        ready.extend(finish(name, status))
+                        print(f"[pipeline] {name} {status} in {durations[name]:.1f}s")
+                    except Exception as e:
+                        errors[name] = e
+                        statuses[name] = FAILED
+                        skipped = mark_upstream_failed(name)
+                        print(f"[pipeline] {name} failed: {e}")
+                    if on_task_done is not None:
+                        for done_name in [name] + skipped:
+                            on_task_done(done_name, statuses[done_name], actions)
+
+        critical_path, critical_seconds = self._critical_path(durations)
+        result = {
+            "statuses": statuses,
+            "errors": errors,
+            "durations": durations,
+            "wall_seconds": time.perf_counter() - start,
+            "critical_path": critical_path,
+            "critical_path_seconds": critical_seconds,
+        }
+        counts = defaultdict(int)
+        for status in statuses.values():
+            counts[status] += 1
+        print(f"[pipeline] Finished in {result['wall_seconds']:.1f}s "
+              f"(critical path {critical_seconds:.1f}s): {dict(counts)}")
+        return result
+
+    def _critical_path(self, durations):
+        """
+        Returns the longest chain of dependent tasks by measured duration.
+
+        Returns:
+            tuple: ([task names], seconds)
+        """
+        longest = {}
+        previous = {}
+        for name in self._topological_order():
+            best_input = max(self.tasks[name].inputs, key=lambda input_name: longest[input_name], default=None)
+            longest[name] = durations.get(name, 0.0) + (longest[best_input] if best_input else 0.0)
+            previous[name] = best_input
+        if not longest:
+            return [], 0.0
+        name = max(longest, key=longest.get)
+        seconds = longest[name]
+        path = []
+        while name is not None:
+            path.append(name)
+            name = previous[name]
+        return list(reversed(path)), seconds
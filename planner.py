@@ -0,0 +1,99 @@
+# planner.py
+"""
+Dry-run planner for cache pulls. Expands a pipeline into the API calls it would make, leaving
+out everything already cached or checkpointed, and estimates the wall time at the current rate
+budget. The pulls execute the same plan they print.
+
+Usage:
+    python planner.py --date 2024-10-22 --calls-per-minute 6
+"""
+
+import argparse
+import datetime
+from collections import defaultdict
+
+
+def plan_calls(pipeline, actions=None):
+    """
+    Counts the API calls a pipeline would make.
+
+    Args:
+        pipeline (Pipeline): The pipeline to plan.
+        actions (dict, optional): A plan from pipeline.plan() (computed if None).
+
+    Returns:
+        dict: 'actions' (the plan to execute), 'calls' ({endpoint: count}), 'estimated_calls'
+              ({endpoint: how many of its calls are estimates}), 'total_calls',
+              and 'tasks' ({action: number of tasks}).
+    """
+    actions = actions if actions is not None else pipeline.plan()
+    calls = defaultdict(int)
+    estimated_calls = defaultdict(int)
+    tasks = defaultdict(int)
+    for name, action in actions.items():
+        tasks[action] += 1
+        if action == "run":
+            task = pipeline.tasks[name]
+            for endpoint, count in task.calls.items():
+                calls[endpoint] += count
+                if task.estimated:
+                    estimated_calls[endpoint] += count
+    return {"actions": actions, "calls": dict(calls), "estimated_calls": dict(estimated_calls),
+            "total_calls": sum(calls.values()), "tasks": dict(tasks)}
+
+
+def print_plan(plan, limiter):
+    """
+    Prints call counts per endpoint and the estimated wall time for the limiter's budget.
+
+    Args:
+        plan (dict): The result of plan_calls.
+        limiter (RateLimiter): The rate budget the plan will run under.
+
+    Returns:
+        float: The estimated wall time in seconds.
+    """
+    print(f"Planned tasks: {plan['tasks']}")
+    estimated_calls = plan.get("estimated_calls", {})
+    for endpoint, count in sorted(plan["calls"].items(), key=lambda item: -item[1]):
+        estimated = estimated_calls.get(endpoint)
+        print(f"  {endpoint:<30} {count:>5} calls" + (f" ({estimated} estimated, roster not cached)" if estimated else ""))
+    estimate = limiter.estimate_seconds(plan["total_calls"])
+    print(f"Total: {plan['total_calls']} calls{' (estimated)' if estimated_calls else ''}, "
+          f"about {estimate / 60:.1f} min at {limiter.calls_per_minute:g} calls/min")
+    return estimate
+
+
+if __name__ == "__main__":
+    from classes import NBATeamRosters
+    from backfill import plan_backfill
+    from cache_manager import CacheManager
+    from game_day_pipeline import Watermarks, build_game_day_pipeline
+    from pipeline import Checkpoint, Pipeline, RateLimiter
+
+    parser = argparse.ArgumentParser(description="Show the API calls a game-day pull would make.")
+    parser.add_argument("--date", default=datetime.datetime.today().strftime('%Y-%m-%d'), help="Game date (YYYY-MM-DD).")
+    parser.add_argument("--end", default=None, help="Last date, to plan a backfill range instead of one day.")
+    parser.add_argument("--calls-per-minute", type=float, default=6, help="API request budget.")
+    parser.add_argument("--delta", action="store_true", help="Plan a delta refresh of current-season stats.")
+    parser.add_argument("--resume", action="store_true", help="Plan resuming the interrupted pull of the same date or range.")
+    args = parser.parse_args()
+
+    # Same run IDs as game_day_pipeline.py and backfill.py; the checkpoint is only read
+    run_id = f"backfill_{args.date}_{args.end}" if args.end else f"game_day_{args.date}"
+    checkpoint = Checkpoint(run_id, resume=args.resume, read_only=True)
+
+    nba_data = NBATeamRosters(season="2024")
+    nba_data.load_schedule("nbaSchedule2425.csv")
+    limiter = RateLimiter(args.calls_per_minute)
+    pipeline = Pipeline(checkpoint=checkpoint)
+    if args.end:
+        # Backfills only pull current-season stats for today's games
+        games = plan_backfill(nba_data, CacheManager(), args.date, args.end, limiter, pipeline,
+                              watermarks=Watermarks(), delta=args.delta)
+    else:
+        games = nba_data.schedule_store.games_between(args.date, args.date)
+        build_game_day_pipeline(nba_data, CacheManager(), games, limiter=limiter, pipeline=pipeline,
+                                watermarks=Watermarks(), delta=args.delta)
+    print(f"{len(games)} games from {args.date} to {args.end or args.date}")
+    print_plan(plan_calls(pipeline), limiter)
@@ -0,0 +1,229 @@
+# player_tags.py
+"""
+Ingest-time normalization of player stats frames: traded players are reduced to their 'TOT'
+row, and every team's players are ranked by minutes and usage and tagged core (1), bench (2)
+or other (0). Manual tags from MANUAL_TAGS_FILE are joined in on PLAYER_ID and win over the
+computed tags.
+
+The game-day pull normalizes frames before caching them. Frames cached before that (no
+PLAYER_TAG column) are normalized when they are loaded, until this module or
+cache_migrate.py rewrites them. Running this module re-normalizes everything already cached
+in one league-wide pass, e.g. after editing the manual tags.
+
+Usage:
+    python player_tags.py --cache-dir cached_data
+"""
+
+import os
+import argparse
+import time
+import pandas as pd
+from cache_keys import SEASON_STORE_DIR, PLAYER_STATS, parse_cache_path
+
+CORE_PLAYERS = 6
+BENCH_PLAYERS = 4
+CORE_TAG, BENCH_TAG, OTHER_TAG = 1, 2, 0
+TAG_COLUMNS = ["PLAYER_RANK", "PLAYER_TAG"]
+
+# CSV with PLAYER_ID and PLAYER_TAG columns, e.g. '1628369,1' tags a player as core
+MANUAL_TAGS_FILE = "manual_tags.csv"
+
+
+def player_minutes(players):
+    """
+    Returns the minutes of a player stats table ('MIN_x' in older merges, else 'MIN'). A stacked
+    table can hold frames of both kinds, so the columns are combined.
+
+    Returns:
+        pd.Series: Minutes per row, or None if the table has no minutes column.
+    """
+    columns = [column for column in ("MIN_x", "MIN") if column in players.columns]
+    if not columns:
+        return None
+    minutes = players[columns[0]]
+    for column in columns[1:]:
+        minutes = minutes.fillna(players[column])
+    return minutes
+
+
+def load_manual_tags(path=MANUAL_TAGS_FILE):
+    """
+    Loads the manual tag overrides.
+
+    Args:
+        path (str): CSV with PLAYER_ID and PLAYER_TAG columns.
+
+    Returns:
+        pd.DataFrame: PLAYER_ID and MANUAL_TAG, empty if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return pd.DataFrame({"PLAYER_ID": pd.Series(dtype="int64"), "MANUAL_TAG": pd.Series(dtype="int64")})
+    tags = pd.read_csv(path, usecols=["PLAYER_ID", "PLAYER_TAG"])
+    tags = tags.dropna().astype("int64").drop_duplicates("PLAYER_ID", keep="last")
+    return tags.rename(columns={"PLAYER_TAG": "MANUAL_TAG"})
+
+
+def consolidate_traded_players(players, group_columns=None):
+    """
+    Keeps only the 'TOT' row of players listed more than once (traded within the season).
+
+    Args:
+        players (pd.DataFrame): One team's player stats, or many teams' stacked together.
+        group_columns (list, optional): Columns identifying each team's frame in a stacked table.
+
+    Returns:
+        pd.DataFrame: The table without the per-team rows of traded players.
+    """
+    if players.empty or "TEAM_ABBREVIATION" not in players.columns:
+        return players
+    keys = (group_columns or []) + ["PLAYER_ID"]
+    entries = players.groupby(keys, sort=False)["PLAYER_ID"].transform("size")
+    return players[(entries == 1) | (players["TEAM_ABBREVIATION"] == "TOT")].reset_index(drop=True)
+
+
+def tag_top_players(players, group_columns=None, manual_tags=None):
+    """
+    Ranks each team's players by minutes, then E_USG_PCT, and tags the top CORE_PLAYERS as
+    core and the next BENCH_PLAYERS as bench. Manual tags are applied with one join.
+
+    Args:
+        players (pd.DataFrame): One team's player stats, or many teams' stacked together.
+        group_columns (list, optional): Columns identifying each team's frame in a stacked table.
+        manual_tags (pd.DataFrame, optional): PLAYER_ID and MANUAL_TAG (see load_manual_tags).
+
+    Returns:
+        pd.DataFrame: The table sorted by rank within each team, with PLAYER_RANK and PLAYER_TAG.
+    """
+    minutes = player_minutes(players)
+    if players.empty or minutes is None or "E_USG_PCT" not in players.columns:
+        return players
+    group_columns = group_columns or []
+
+    ordered = players.assign(_minutes=minutes).sort_values(group_columns + ["_minutes", "E_USG_PCT"],
+                                                           ascending=[True] * len(group_columns) + [False, False],
+                                                           na_position="last", kind="stable")
+    rank = ordered.groupby(group_columns, sort=False).cumcount() if group_columns else pd.Series(range(len(ordered)), index=ordered.index)
+    ordered = ordered.drop(columns="_minutes").assign(PLAYER_RANK=rank + 1)
+    ordered["PLAYER_TAG"] = OTHER_TAG
+    ordered.loc[rank < CORE_PLAYERS + BENCH_PLAYERS, "PLAYER_TAG"] = BENCH_TAG
+    ordered.loc[rank < CORE_PLAYERS, "PLAYER_TAG"] = CORE_TAG
+
+    if manual_tags is not None and not manual_tags.empty:
+        ordered = ordered.drop(columns="MANUAL_TAG", errors="ignore").merge(manual_tags, on="PLAYER_ID", how="left")
+        overridden = ordered["MANUAL_TAG"].notna()
+        ordered.loc[overridden, "PLAYER_TAG"] = ordered.loc[overridden, "MANUAL_TAG"].astype("int64")
+        ordered = ordered.drop(columns="MANUAL_TAG")
+        if overridden.any():
+            print(f"Manual tags applied to {overridden.sum()} player rows")
+    return ordered.reset_index(drop=True)
+
+
+def normalize_player_stats(players, group_columns=None, manual_tags=None):
+    """
+    Consolidates traded players and tags the top players, as done before caching.
+
+    Args:
+        players (pd.DataFrame): One team's player stats, or many teams' stacked together.
+        group_columns (list, optional): Columns identifying each team's frame in a stacked table.
+        manual_tags (pd.DataFrame, optional): PLAYER_ID and MANUAL_TAG (see load_manual_tags).
+
+    Returns:
+        pd.DataFrame: The normalized table.
+    """
+    if players is None or players.empty:
+        return players
+    players = consolidate_traded_players(players, group_columns)
+    return tag_top_players(players, group_columns, manual_tags)
+
+
+def normalize_if_untagged(players, manual_tags=None):
+    """
+    Normalizes a player stats frame cached before ingest-time normalization (no PLAYER_TAG
+    column). Frames that are already tagged are returned unchanged.
+
+    Args:
+        players (pd.DataFrame): One team's player stats.
+        manual_tags (pd.DataFrame, optional): PLAYER_ID and MANUAL_TAG (see load_manual_tags).
+
+    Returns:
+        pd.DataFrame: The normalized frame.
+    """
+    if players is None or players.empty or "PLAYER_TAG" in players.columns:
+        return players
+    return normalize_player_stats(players, manual_tags=manual_tags)
+
+
+def _cached_player_stats_paths(cache_dir):
+    """
+    Paths of every cached player stats file: the season store and the per-game files.
+    """
+    # Imported here, data_loader normalizes loaded frames with this module
+    from data_loader import date_dirs, index_date_dir
+
+    paths = []
+    store_dir = os.path.join(cache_dir, SEASON_STORE_DIR)
+    for season in sorted(os.listdir(store_dir)) if os.path.isdir(store_dir) else []:
+        team_dir = os.path.join(store_dir, season, PLAYER_STATS)
+        if os.path.isdir(team_dir):
+            paths += [os.path.join(team_dir, name) for name in sorted(os.listdir(team_dir)) if name.endswith(".joblib")]
+    for game_date in date_dirs(cache_dir, None):
+        index = index_date_dir(os.path.join(cache_dir, game_date)) or {}
+        paths += [os.path.join(cache_dir, game_date, file_name)
+                  for (game_id, _, _, _, stats_type), file_name in index.items()
+                  if game_id is not None and stats_type == PLAYER_STATS]
+    return paths
+
+
+def normalize_cached_player_stats(cache_dir="cached_data", manual_tags_file=MANUAL_TAGS_FILE):
+    """
+    Re-normalizes every cached player stats frame in one pass over the stacked league table
+    and writes back the frames that changed. Reference entries are left alone, since the
+    season-store frame they point at is normalized itself.
+
+    Args:
+        cache_dir (str): The base directory for cached data.
+        manual_tags_file (str): CSV with the manual tag overrides.
+
+    Returns:
+        int: Number of frames rewritten.
+    """
+    from data_loader import get_cache_manager
+
+    start = time.perf_counter()
+    cache_manager = get_cache_manager(cache_dir)
+    frames = {}
+    for path in _cached_player_stats_paths(cache_dir):
+        if not cache_manager.is_canonical_path(path):
+            print(f"Skipping {path}, run 'python cache_migrate.py --cache-dir {cache_dir}' first")
+            continue
+        data = cache_manager.load_path(path, follow_references=False)
+        if isinstance(data, pd.DataFrame) and not data.empty:
+            frames[path] = data
+    if not frames:
+        print(f"No cached player stats frames in {cache_dir}")
+        return 0
+
+    league = pd.concat(frames, names=["_path", None]).reset_index(level="_path")
+    league = normalize_player_stats(league, ["_path"], load_manual_tags(manual_tags_file))
+
+    rewritten = 0
+    for path, frame in league.groupby("_path", sort=False):
+        # Stacking adds the other frames' columns and upcasts, so restore this frame's layout
+        original = frames[path]
+        columns = [column for column in original.columns if column not in TAG_COLUMNS] + TAG_COLUMNS
+        dtypes = original.dtypes.drop(TAG_COLUMNS, errors="ignore").to_dict()
+        frame = frame.reindex(columns=columns).astype(dtypes).reset_index(drop=True)
+        if frame.shape == original.shape and frame.equals(original.reindex(columns=frame.columns)):
+            continue
+        cache_manager.save(parse_cache_path(os.path.relpath(path, cache_dir)), frame)
+        rewritten += 1
+    print(f"Normalized {len(frames)} player stats frames ({rewritten} rewritten) in {time.perf_counter() - start:.2f}s")
+    return rewritten
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consolidate traded players and tag top players in every cached player stats frame.")
+    parser.add_argument("--cache-dir", default="cached_data", help="Cache directory.")
+    parser.add_argument("--manual-tags", default=MANUAL_TAGS_FILE, help="CSV with PLAYER_ID and PLAYER_TAG overrides.")
+    args = parser.parse_args()
+    normalize_cached_player_stats(args.cache_dir, args.manual_tags)
@@ -0,0 +1,250 @@
+# position_defense.py
+"""
+Team x opponent-position defensive efficiency, built from the league-wide MatchupsRollup
+data. Every rollup row is one defender against one offensive position. Defenders are mapped
+to their team through the same season's league-wide player stats (one LeagueDashPlayerStats
+call per season, cached as a league table), and the rows are summed per (team, position) in
+one groupby, then pivoted into a matrix. A season without that table is not built.
+
+DEF_RATING is the offense's points per 100 partial possessions while the team's players
+guarded that position, on the same scale as E_DEF_RATING. Matrices are cached per season and
+rebuilt only when that season's rollup or player stats change; refresh_current_season pulls
+the in-progress season's rollup and player stats and rebuilds just that season.
+
+Usage:
+    matrix = get_position_defense_matrix("2023-24", nba_data=nba_data)
+    matrix.loc["BOS", "G"]
+    python position_defense.py --seasons 2021-22 2022-23 2023-24 --fetch
+"""
+
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from cache_keys import CacheKey, PLAYER_STATS
+from data_loader import get_cache_manager
+
+POSITION_DEFENSE_TABLE = "position_defense"
+POSITION_DEFENSE_VERSION = 2
+POSITIONS = ["G", "G-F", "F-G", "F", "F-C", "C-F", "C"]
+PREVIOUS_SEASONS = ["2021-22", "2022-23", "2023-24"]
+
+# Cells with fewer partial possessions are left empty, so lookups fall back to E_DEF_RATING
+MIN_POSSESSIONS = 200
+
+# In-process cache: {(cache_dir, season): (signature, table)}
+_position_defense = {}
+
+
+def load_player_teams(season, cache_dir="cached_data", nba_data=None):
+    """
+    Maps every player of a season to their team, from the season's league-wide player stats.
+    Traded players map to their last team of the season.
+
+    Args:
+        season (str): The season in 'YYYY-YY' format.
+        cache_dir (str): The base directory for cached data.
+        nba_data (NBATeamRosters, optional): Used to fetch the player stats when they are not cached.
+
+    Returns:
+        pd.Series: TEAM_ABBREVIATION indexed by PLAYER_ID, or None if the table is not cached
+                   and cannot be fetched.
+    """
+    player_stats = get_cache_manager(cache_dir).load(CacheKey.league_table(season, PLAYER_STATS))
+    if player_stats is None and nba_data is not None:
+        player_stats = nba_data.get_league_player_stats(season)
+    if player_stats is None or player_stats.empty:
+        return None
+    teams = player_stats.drop_duplicates("PLAYER_ID", keep="last")
+    return teams.set_index(teams["PLAYER_ID"].astype("int64"))["TEAM_ABBREVIATION"]
+
+
+def build_position_defense(rollup, player_teams, min_possessions=MIN_POSSESSIONS):
+    """
+    Aggregates a season's rollup into one row per (team, offensive position).
+
+    Args:
+        rollup (pd.DataFrame): MatchupsRollup rows (DEF_PLAYER_ID, POSITION, PARTIAL_POSS,
+                               PLAYER_PTS, TEAM_PTS, MATCHUP_FGM, MATCHUP_FGA).
+        player_teams (pd.Series): TEAM_ABBREVIATION indexed by PLAYER_ID.
+        min_possessions (float): Cells below this many partial possessions get no rating.
+
+    Returns:
+        pd.DataFrame: TEAM_ABBREVIATION, POSITION, POSS, PLAYER_PTS, TEAM_PTS, DEF_RATING,
+                      PLAYER_PTS_PER_100, FG_PCT, LEAGUE_DEF_RATING and DEF_RATING_REL.
+    """
+    rows = rollup[rollup["POSITION"].isin(POSITIONS)]
+    rows = rows.assign(TEAM_ABBREVIATION=rows["DEF_PLAYER_ID"].astype("int64").map(player_teams))
+    unmapped = rows["TEAM_ABBREVIATION"].isna()
+    if unmapped.any():
+        print(f"{rows.loc[unmapped, 'DEF_PLAYER_ID'].nunique()} defenders without a team "
+              f"({rows.loc[unmapped, 'PARTIAL_POSS'].sum() / rows['PARTIAL_POSS'].sum():.1%} of possessions) were skipped")
+    rows = rows[~unmapped]
+
+    table = rows.groupby(["TEAM_ABBREVIATION", "POSITION"], as_index=False).agg(
+        POSS=("PARTIAL_POSS", "sum"),
+        PLAYER_PTS=("PLAYER_PTS", "sum"),
+        TEAM_PTS=("TEAM_PTS", "sum"),
+        FGM=("MATCHUP_FGM", "sum"),
+        FGA=("MATCHUP_FGA", "sum"),
+    )
+    poss = table["POSS"].to_numpy(dtype=float)
+    enough = poss >= min_possessions
+    table["DEF_RATING"] = np.where(enough, 100 * table["TEAM_PTS"] / np.where(poss > 0, poss, np.nan), np.nan)
+    table["PLAYER_PTS_PER_100"] = np.where(enough, 100 * table["PLAYER_PTS"] / np.where(poss > 0, poss, np.nan), np.nan)
+    table["FG_PCT"] = table["FGM"] / table["FGA"].where(table["FGA"] > 0)
+
+    # League rating against each position, weighted by possessions
+    league = table.groupby("POSITION")[["TEAM_PTS", "POSS"]].transform("sum")
+    table["LEAGUE_DEF_RATING"] = 100 * league["TEAM_PTS"] / league["POSS"]
+    table["DEF_RATING_REL"] = table["DEF_RATING"] / table["LEAGUE_DEF_RATING"]
+    return table.drop(columns=["FGM", "FGA"])
+
+
+def position_defense_matrix(table, value="DEF_RATING"):
+    """
+    Pivots a position defense table into a team x position matrix.
+
+    Args:
+        table (pd.DataFrame): A table from build_position_defense.
+        value (str): The column to pivot (e.g., 'DEF_RATING' or 'DEF_RATING_REL').
+
+    Returns:
+        pd.DataFrame: Indexed by TEAM_ABBREVIATION with one column per position.
+    """
+    matrix = table.pivot(index="TEAM_ABBREVIATION", columns="POSITION", values=value)
+    return matrix.reindex(columns=POSITIONS).rename_axis(columns=None)
+
+
+def _source_signature(cache_dir, season):
+    """
+    Modification times of the season's rollup and league-wide player stats.
+    """
+    cache_manager = get_cache_manager(cache_dir)
+    paths = [cache_manager.path_for(CacheKey.matchup_rollup(season)),
+             cache_manager.path_for(CacheKey.league_table(season, PLAYER_STATS))]
+    signature = []
+    for path in paths:
+        try:
+            signature.append((path, os.stat(path).st_mtime_ns))
+        except FileNotFoundError:
+            continue
+    return tuple(signature)
+
+
+def get_position_defense(season, cache_dir="cached_data", refresh=False, nba_data=None):
+    """
+    Returns a season's position defense table, building and caching it on first use.
+    A cached table is reused until the season's rollup or league player stats change.
+
+    Args:
+        season (str): The season in 'YYYY-YY' format.
+        cache_dir (str): The base directory for cached data.
+        refresh (bool): If True, rebuild even if a cached table is current.
+        nba_data (NBATeamRosters, optional): Used to fetch the season's league player stats
+                                             when they are not cached.
+
+    Returns:
+        pd.DataFrame: The table (see build_position_defense), empty without a cached rollup
+                      or the season's player to team map.
+    """
+    memo_key = (cache_dir, season)
+    signature = _source_signature(cache_dir, season)
+    cached = _position_defense.get(memo_key)
+    if not refresh and cached is not None and cached[0] == signature:
+        return cached[1]
+
+    cache_manager = get_cache_manager(cache_dir)
+    key = CacheKey.derived(POSITION_DEFENSE_TABLE, season)
+    table = None if refresh else cache_manager.load_snapshot(key, POSITION_DEFENSE_VERSION, signature)
+    if table is not None:
+        _position_defense[memo_key] = (signature, table)
+        return table
+
+    rollup = cache_manager.load(CacheKey.matchup_rollup(season))
+    if rollup is None or rollup.empty:
+        print(f"No cached matchup rollup for {season}")
+        return pd.DataFrame()
+    player_teams = load_player_teams(season, cache_dir, nba_data)
+    if player_teams is None:
+        print(f"No league player stats for {season} to map defenders to teams, pass nba_data to fetch them")
+        return pd.DataFrame()
+    table = build_position_defense(rollup, player_teams)
+    table["SEASON"] = season
+    print(f"Built position defense for {season} ({table['TEAM_ABBREVIATION'].nunique()} teams)")
+
+    # Fetching the player stats changed the sources, so the snapshot is signed after it
+    signature = _source_signature(cache_dir, season)
+    cache_manager.save_snapshot(key, table, POSITION_DEFENSE_VERSION, signature)
+    _position_defense[memo_key] = (signature, table)
+    return table
+
+
+def get_position_defense_matrix(season, cache_dir="cached_data", value="DEF_RATING", refresh=False, nba_data=None):
+    """
+    Returns a season's team x position matrix (see position_defense_matrix).
+    """
+    table = get_position_defense(season, cache_dir=cache_dir, refresh=refresh, nba_data=nba_data)
+    if table.empty:
+        return pd.DataFrame(columns=POSITIONS)
+    return position_defense_matrix(table, value)
+
+
+def refresh_current_season(nba_data, season, cache_dir="cached_data"):
+    """
+    Pulls the current season's rollup totals and league player stats, replaces the cached
+    copies and rebuilds that season's table. Completed seasons are left untouched.
+
+    Args:
+        nba_data (NBADataFetcher): The data fetcher used to call the API.
+        season (str): The current season in 'YYYY-YY' format.
+        cache_dir (str): The base directory for cached data.
+
+    Returns:
+        pd.DataFrame: The rebuilt table.
+    """
+    rollup = nba_data.fetch_matchup_rollup_direct(season=season, per_mode="Totals", season_type="Regular Season")
+    if rollup is None or rollup.empty:
+        print(f"No matchup rollup returned for {season}, keeping the cached table")
+        return get_position_defense(season, cache_dir=cache_dir)
+    get_cache_manager(cache_dir).save(CacheKey.matchup_rollup(season), rollup)
+    # Rosters change during the season, so the player to team map is pulled again too
+    nba_data.get_league_player_stats(season, refresh=True)
+    return get_position_defense(season, cache_dir=cache_dir, refresh=True, nba_data=nba_data)
+
+
+def position_defense_rating(matrix, team_abbr, position, default=None):
+    """
+    Looks up a team's rating against a position.
+
+    Args:
+        matrix (pd.DataFrame): A matrix from position_defense_matrix.
+        team_abbr (str): The defending team.
+        position (str): The offensive player's position (e.g., 'G' or 'F-C').
+        default (float, optional): Returned when the team, position or rating is missing.
+
+    Returns:
+        float: The rating, or default.
+    """
+    if matrix is None or team_abbr not in matrix.index or position not in matrix.columns:
+        return default
+    rating = matrix.at[team_abbr, position]
+    return default if pd.isna(rating) else float(rating)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the team x position defense matrices from cached rollups.")
+    parser.add_argument("--seasons", nargs="+", default=PREVIOUS_SEASONS, help="Seasons to build (YYYY-YY).")
+    parser.add_argument("--cache-dir", default="cached_data", help="Cache directory.")
+    parser.add_argument("--refresh", action="store_true", help="Rebuild even if the cached tables are current.")
+    parser.add_argument("--fetch", action="store_true", help="Fetch league player stats that are not cached.")
+    args = parser.parse_args()
+
+    nba_data = None
+    if args.fetch:
+        from classes import NBATeamRosters
+        nba_data = NBATeamRosters(season="2024")
+    for season_name in args.seasons:
+        season_table = get_position_defense(season_name, cache_dir=args.cache_dir, refresh=args.refresh, nba_data=nba_data)
+        if not season_table.empty:
+            print(position_defense_matrix(season_table).round(1).to_string())
@@ -0,0 +1,286 @@
+# prediction_cache.py
+"""
+Memoized projections. Every game's inputs (its rows of the matchup or players table, the
+logs or features of its players, and the model parameters) are reduced to a fingerprint.
+A game whose fingerprint matches the stored one gets its stored output back, and only the
+games whose inputs changed are recomputed, in one batched call. Fingerprints include a hash
+of the model code (projections.py and simulation.py), so editing a model invalidates its
+stored outputs.
+
+Usage:
+    cache = get_prediction_cache("modeling")
+    totals = cached_team_totals(matchups, cache)
+    points = cached_player_points(players, cache, features=features)
+"""
+
+import inspect
+import threading
+import time
+import joblib
+import pandas as pd
+import projections
+import simulation
+from cache_keys import CacheKey
+from data_loader import get_cache_manager
+from projections import project_team_totals, project_player_points
+from simulation import DEFAULT_SIMULATIONS, simulate_slate
+
+PREDICTION_CACHE_TABLE = "predictions"
+PREDICTION_CACHE_VERSION = 1
+
+# Hash of the source of the modules computing the outputs, part of every fingerprint
+MODEL_CODE_VERSION = joblib.hash([inspect.getsource(module) for module in (projections, simulation)])
+
+# In-process caches: {(cache_dir, name): PredictionCache}, shared by Streamlit's session threads
+_prediction_caches = {}
+_prediction_caches_lock = threading.Lock()
+
+
+def frame_fingerprint(frame):
+    """
+    Fingerprints a DataFrame's columns, dtypes and values (not its index).
+
+    Returns:
+        str: A joblib hash, or None for a missing frame.
+    """
+    if frame is None:
+        return None
+    try:
+        rows = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    except TypeError:
+        # Unhashable cells (lists, dicts), fall back to hashing the whole frame
+        return joblib.hash(frame.reset_index(drop=True))
+    return joblib.hash((list(frame.columns), [str(dtype) for dtype in frame.dtypes], rows))
+
+
+def group_fingerprints(frame, column):
+    """
+    Fingerprints the rows of each value of column (e.g., each player's logs) in one pass.
+
+    Returns:
+        dict: {value: fingerprint}
+    """
+    if frame is None or frame.empty:
+        return {}
+    rows = pd.util.hash_pandas_object(frame, index=False)
+    header = (list(frame.columns), [str(dtype) for dtype in frame.dtypes])
+    return {key: joblib.hash((header, values.to_numpy())) for key, values in rows.groupby(frame[column].to_numpy())}
+
+
+class PredictionCache:
+    """
+    The latest output of every (model, game) pair with the fingerprint of its inputs,
+    persisted as a derived table of the cache (CacheKey.derived(PREDICTION_CACHE_TABLE, name)).
+    One instance is shared by every thread of the process, so all access holds its lock.
+
+    Attributes:
+        entries (dict): {(model, game_id): (fingerprint, output)}
+        hits (int): Games served from the cache since it was opened.
+        misses (int): Games recomputed since it was opened.
+    """
+    def __init__(self, cache_manager, key):
+        self.cache_manager = cache_manager
+        self.key = key
+        self.entries = cache_manager.load_snapshot(key, PREDICTION_CACHE_VERSION) or {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def lookup(self, model, game_id, fingerprint):
+        """
+        Returns the stored output of a game if its fingerprint matches, else None.
+        """
+        with self._lock:
+            entry = self.entries.get((model, game_id))
+            if entry is not None and entry[0] == fingerprint:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def store(self, model, game_id, fingerprint, output):
+        with self._lock:
+            self.entries[(model, game_id)] = (fingerprint, output)
+            self._dirty = True
+
+    def save(self):
+        """
+        Writes the cache to disk atomically, if anything changed.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            self.cache_manager.save_snapshot(self.key, self.entries, PREDICTION_CACHE_VERSION)
+            self._dirty = False
+
+
+def get_prediction_cache(name="default", cache_dir="cached_data"):
+    """
+    Opens a named prediction cache, reusing the instance already open in this process.
+
+    Args:
+        name (str): Cache name, e.g. 'modeling' or 'app'.
+        cache_dir (str): The base directory for cached data.
+
+    Returns:
+        PredictionCache: The cache.
+    """
+    with _prediction_caches_lock:
+        if (cache_dir, name) not in _prediction_caches:
+            _prediction_caches[(cache_dir, name)] = PredictionCache(get_cache_manager(cache_dir),
+                                                                    CacheKey.derived(PREDICTION_CACHE_TABLE, name))
+        return _prediction_caches[(cache_dir, name)]
+
+
+def _run_cached(cache, model, fingerprints, compute):
+    """
+    Serves every game from the cache or recomputes it.
+
+    Args:
+        cache (PredictionCache): The cache.
+        model (str): Model name, part of the cache key.
+        fingerprints (dict): {game_id: fingerprint} in output order.
+        compute (callable): Takes the list of game IDs to recompute and returns {game_id: output}.
+
+    Returns:
+        dict: {game_id: output} in the order of fingerprints.
+    """
+    start = time.perf_counter()
+    # Outputs of an older version of the model code are recomputed
+    fingerprints = {game_id: joblib.hash((MODEL_CODE_VERSION, fingerprint)) for game_id, fingerprint in fingerprints.items()}
+    outputs, stale = {}, []
+    for game_id, fingerprint in fingerprints.items():
+        output = cache.lookup(model, game_id, fingerprint)
+        if output is None:
+            stale.append(game_id)
+        outputs[game_id] = output
+
+    if stale:
+        computed = compute(stale)
+        for game_id in stale:
+            output = computed.get(game_id)
+            if output is not None:
+                cache.store(model, game_id, fingerprints[game_id], output)
+            outputs[game_id] = output
+        cache.save()
+    print(f"{model}: reused {len(fingerprints) - len(stale)} of {len(fingerprints)} games, "
+          f"recomputed {len(stale)} in {time.perf_counter() - start:.2f}s")
+    return {game_id: output for game_id, output in outputs.items() if output is not None}
+
+
+def _split_by_game(frame, game_column="Game ID"):
+    return {game_id: rows.reset_index(drop=True) for game_id, rows in frame.groupby(game_column, sort=False)}
+
+
+def _concat(frames, columns=None):
+    frames = list(frames)
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def cached_team_totals(matchups, cache):
+    """
+    project_team_totals, recomputing only the games whose matchup row changed.
+
+    Args:
+        matchups (pd.DataFrame): A table from one of the projections.matchup_table_* builders.
+        cache (PredictionCache): The cache.
+
+    Returns:
+        pd.DataFrame: As project_team_totals.
+    """
+    fingerprints = {game_id: frame_fingerprint(rows.reset_index(drop=True))
+                    for game_id, rows in matchups.groupby("Game ID", sort=False)}
+    outputs = _run_cached(cache, "team_totals", fingerprints,
+                          lambda game_ids: _split_by_game(project_team_totals(matchups[matchups["Game ID"].isin(game_ids)])))
+    return _concat(outputs.values())
+
+
+def _player_game_fingerprints(players, per_player, params):
+    """
+    Fingerprints each game's rows of a players table together with its players' inputs.
+    """
+    return {
+        game_id: joblib.hash((params, frame_fingerprint(rows.reset_index(drop=True)),
+                              [per_player.get(int(player_id)) for player_id in rows["PLAYER_ID"]]))
+        for game_id, rows in players.groupby("Game ID", sort=False)
+    }
+
+
+def cached_player_points(players, cache, player_logs=None, stat="PTS", features=None, window="SEASON_MEAN"):
+    """
+    project_player_points, recomputing only the games whose players, opponent stats or
+    player averages changed.
+
+    Args:
+        players (pd.DataFrame): A table from projections.tagged_players_table.
+        cache (PredictionCache): The cache.
+        player_logs, stat, features, window: As project_player_points.
+
+    Returns:
+        pd.DataFrame: As project_player_points.
+    """
+    feature_column = f"{stat}_{window}"
+    # Only the column the averages come from is fingerprinted, other log columns do not matter
+    if features is not None and not features.empty and feature_column in features.columns:
+        source_name, source = "features", features[["Player_ID", feature_column]]
+    elif player_logs is not None and not player_logs.empty and stat in player_logs.columns:
+        source_name, source = "logs", player_logs[["Player_ID", stat]]
+    else:
+        source_name, source = None, None
+    per_player = group_fingerprints(source, "Player_ID")
+    fingerprints = _player_game_fingerprints(players, per_player, ("player_points", stat, window, source_name))
+
+    def compute(game_ids):
+        return _split_by_game(project_player_points(players[players["Game ID"].isin(game_ids)], player_logs,
+                                                    stat=stat, features=features, window=window))
+
+    return _concat(_run_cached(cache, "player_points", fingerprints, compute).values())
+
+
+def cached_simulate_slate(players, player_logs, cache, n_sims=DEFAULT_SIMULATIONS, stat="PTS", total_lines=None,
+                          spread_lines=None, player_lines=None, seed=None):
+    """
+    simulate_slate, re-simulating only the games whose players, logs, lines or settings
+    changed. Samples are not cached; call simulate_slate with keep_samples=True for them.
+    simulate_slate seeds each game on its own, so with a seed the cached results equal a
+    full run of the slate.
+
+    Args:
+        players (pd.DataFrame): A table from projections.tagged_players_table.
+        player_logs (pd.DataFrame): Long-format logs with 'Player_ID', 'Game_ID' and the stat.
+        cache (PredictionCache): The cache.
+        n_sims, stat, total_lines, spread_lines, player_lines, seed: As simulate_slate.
+
+    Returns:
+        dict: 'games' and 'players' as simulate_slate, 'samples' is None.
+    """
+    total_lines = total_lines or {}
+    spread_lines = spread_lines or {}
+    player_lines = player_lines or {}
+
+    logs = player_logs[player_logs["Player_ID"].isin(players["PLAYER_ID"].astype("int64"))]
+    per_player = group_fingerprints(logs[["Player_ID", "Game_ID", stat]], "Player_ID")
+    fingerprints = {}
+    for game_id, rows in players.groupby("Game ID", sort=False):
+        lines = (total_lines.get(game_id), spread_lines.get(game_id),
+                 [player_lines.get(player_id) for player_id in rows["PLAYER_ID"]])
+        fingerprints[game_id] = joblib.hash((
+            ("simulation", n_sims, stat, seed, lines), frame_fingerprint(rows.reset_index(drop=True)),
+            [per_player.get(int(player_id)) for player_id in rows["PLAYER_ID"]]))
+
+    def compute(game_ids):
+        result = simulate_slate(players[players["Game ID"].isin(game_ids)], player_logs, n_sims=n_sims, stat=stat,
+                                total_lines=total_lines, spread_lines=spread_lines, player_lines=player_lines, seed=seed)
+        games = _split_by_game(result["games"]) if not result["games"].empty else {}
+        game_players = _split_by_game(result["players"]) if not result["players"].empty else {}
+        return {game_id: (games[game_id], game_players.get(game_id, pd.DataFrame())) for game_id in games}
+
+    outputs = _run_cached(cache, "simulation", fingerprints, compute)
+    return {
+        "games": _concat(output[0] for output in outputs.values()),
+        "players": _concat(output[1] for output in outputs.values() if not output[1].empty),
+        "samples": None,
+    }
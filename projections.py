@@ -0,0 +1,295 @@
+# projections.py
+"""
+Slate-level team and player projections. The per-game functions in modeling.py
+(calculate_possessions, calculate_ppp, calculate_team_total_with_ppp) read one-row frames
+team by team; here the same formulas run once over an aligned matchup table with one row
+per game, so a whole season projects in a few array operations. Player projections work
+the same way over one table of every tagged player on the slate.
+"""
+
+import numpy as np
+import pandas as pd
+from player_tags import load_manual_tags, normalize_if_untagged
+
+# Team stats columns the projection reads, for both sides of a game
+TEAM_FEATURES = ["FGA", "FTA", "OREB", "TOV", "PTS", "E_OFF_RATING", "E_DEF_RATING", "E_PACE"]
+SIDES = {"home": "HOME_", "away": "AWAY_"}
+
+# Columns that identify a game in the matchup table, named like the schedule columns
+GAME_COLUMNS = ["Game ID", "Home Team Abbreviation", "Visiting Team Abbreviation"]
+
+
+def _feature_row(team_stats_df):
+    """
+    Returns the first row of a team stats frame as {column: value}, the row the per-game
+    functions read with .values[0]. Missing frames or columns give NaN.
+    """
+    if team_stats_df is None or team_stats_df.empty:
+        return {column: np.nan for column in TEAM_FEATURES}
+    first = team_stats_df.iloc[0]
+    return {column: first[column] if column in team_stats_df.columns else np.nan for column in TEAM_FEATURES}
+
+
+def _matchup_row(game_id, home_team, away_team, home_stats, away_stats):
+    row = {"Game ID": game_id, "Home Team Abbreviation": home_team, "Visiting Team Abbreviation": away_team}
+    for side, stats in (("home", home_stats), ("away", away_stats)):
+        for column, value in _feature_row(stats).items():
+            row[SIDES[side] + column] = value
+    return row
+
+
+def matchup_table_from_slate(slate, season_type="prev"):
+    """
+    Builds the matchup table from a GameSlate.
+
+    Args:
+        slate (GameSlate): The loaded slate.
+        season_type (str): 'prev' or 'curr' team stats.
+
+    Returns:
+        pd.DataFrame: One row per game with GAME_COLUMNS and HOME_/AWAY_ team features.
+    """
+    rows = [
+        _matchup_row(game_id, slate.team(game_id, "home"), slate.team(game_id, "away"),
+                     slate.team_stats(game_id, "home", season_type),
+                     slate.team_stats(game_id, "away", season_type))
+        for game_id in slate.game_ids()
+    ]
+    return pd.DataFrame(rows, columns=_matchup_columns())
+
+
+def slate_games(slate):
+    """
+    Returns the games of a slate as a schedule-like frame with GAME_COLUMNS.
+    """
+    return pd.DataFrame(
+        [(game_id, slate.team(game_id, "home"), slate.team(game_id, "away")) for game_id in slate.game_ids()],
+        columns=GAME_COLUMNS,
+    )
+
+
+def matchup_table_from_stats_dict(todays_games, team_stats_dict, season_type="prev"):
+    """
+    Builds the matchup table from a schedule and a dictionary of team stats frames keyed
+    like modeling.py's team_stats_dict ('game_{id}_home_team_{abbr}_prev_team_stats').
+
+    Args:
+        todays_games (pd.DataFrame): Games with 'Game ID', 'Home Team Abbreviation' and
+                                     'Visiting Team Abbreviation' columns.
+        team_stats_dict (dict): Team stats frames by name.
+        season_type (str): 'prev' or 'curr' team stats.
+
+    Returns:
+        pd.DataFrame: One row per game with GAME_COLUMNS and HOME_/AWAY_ team features.
+    """
+    rows = []
+    for game_id, home_team, away_team in todays_games[GAME_COLUMNS].itertuples(index=False):
+        home_stats = team_stats_dict[f'game_{game_id}_home_team_{home_team}_{season_type}_team_stats']
+        away_stats = team_stats_dict[f'game_{game_id}_away_team_{away_team}_{season_type}_team_stats']
+        rows.append(_matchup_row(game_id, home_team, away_team, home_stats, away_stats))
+    return pd.DataFrame(rows, columns=_matchup_columns())
+
+
+def matchup_table_from_team_table(games, team_table, team_column="TEAM_ABBREVIATION"):
+    """
+    Builds the matchup table for any number of games from one stats row per team, with two
+    joins instead of a lookup per game. This is the path for season-long tables.
+
+    Args:
+        games (pd.DataFrame): Games with GAME_COLUMNS (e.g., ScheduleStore.full_schedule()).
+        team_table (pd.DataFrame): One row per team with TEAM_FEATURES columns.
+        team_column (str): The team abbreviation column of team_table.
+
+    Returns:
+        pd.DataFrame: One row per game with GAME_COLUMNS and HOME_/AWAY_ team features.
+    """
+    features = team_table.drop_duplicates(team_column).set_index(team_column).reindex(columns=TEAM_FEATURES)
+    matchups = games[GAME_COLUMNS].reset_index(drop=True)
+    for side, team_column_name in (("home", "Home Team Abbreviation"), ("away", "Visiting Team Abbreviation")):
+        side_features = features.reindex(matchups[team_column_name].astype(str).to_numpy())
+        side_features.columns = [SIDES[side] + column for column in TEAM_FEATURES]
+        matchups = pd.concat([matchups, side_features.reset_index(drop=True)], axis=1)
+    return matchups
+
+
+def _matchup_columns():
+    return GAME_COLUMNS + [prefix + column for prefix in SIDES.values() for column in TEAM_FEATURES]
+
+
+def _side_arrays(matchups, side):
+    prefix = SIDES[side]
+    return {column: matchups[prefix + column].to_numpy(dtype=float) for column in TEAM_FEATURES}
+
+
+def possessions(fga, fta, oreb, tov):
+    """
+    Estimated possessions, FGA + 0.44 * FTA - OREB + TOV, on scalars or arrays.
+    """
+    return fga + (0.44 * fta) - oreb + tov
+
+
+def points_per_possession(pts, poss):
+    """
+    Points per possession on arrays, 0 where there are no possessions (as calculate_ppp does).
+    """
+    ppp = np.zeros_like(poss, dtype=float)
+    np.divide(pts, poss, out=ppp, where=poss != 0)
+    return ppp
+
+
+def project_team_totals(matchups):
+    """
+    Projects both team totals of every game in a matchup table. The formulas and their order
+    of operations match calculate_team_total_with_ppp, so results are identical to the
+    per-game functions.
+
+    Args:
+        matchups (pd.DataFrame): A table from one of the matchup_table_* builders.
+
+    Returns:
+        pd.DataFrame: GAME_COLUMNS plus possessions, PPP, pace adjustment, each team's
+                      projected points and the projected game total.
+    """
+    home = _side_arrays(matchups, "home")
+    away = _side_arrays(matchups, "away")
+
+    home_poss = possessions(home["FGA"], home["FTA"], home["OREB"], home["TOV"])
+    away_poss = possessions(away["FGA"], away["FTA"], away["OREB"], away["TOV"])
+    home_ppp = points_per_possession(home["PTS"], home_poss)
+    away_ppp = points_per_possession(away["PTS"], away_poss)
+
+    # Both sides play at the average of the two paces
+    pace_adjustment = (home["E_PACE"] + away["E_PACE"]) / 2
+
+    home_total = home_ppp * pace_adjustment * (home["E_OFF_RATING"] / away["E_DEF_RATING"])
+    away_total = away_ppp * pace_adjustment * (away["E_OFF_RATING"] / home["E_DEF_RATING"])
+
+    projections = matchups[GAME_COLUMNS].reset_index(drop=True)
+    projections["Home Possessions"] = home_poss
+    projections["Away Possessions"] = away_poss
+    projections["Home PPP"] = home_ppp
+    projections["Away PPP"] = away_ppp
+    projections["Pace Adjustment"] = pace_adjustment
+    projections["Home Team Total"] = home_total
+    projections["Away Team Total"] = away_total
+    projections["Projected Total"] = home_total + away_total
+    return projections
+
+
+def projections_to_dict(projections):
+    """
+    Converts a projection table to the {game_id: {...}} dictionary predict_team_totals_with_ppp
+    returns.
+    """
+    return {
+        game_id: {
+            'home_team': home_team,
+            'home_team_total': home_total,
+            'away_team': away_team,
+            'away_team_total': away_total,
+        }
+        for game_id, home_team, away_team, home_total, away_total in projections[
+            GAME_COLUMNS + ["Home Team Total", "Away Team Total"]].itertuples(index=False)
+    }
+
+
+def tagged_players_table(slate, season_type="prev", tags=(1, 2), league_context=None):
+    """
+    Collects the tagged players of every game on a slate into one table, each row carrying
+    the opponent's defensive rating and pace.
+
+    Args:
+        slate (GameSlate): The loaded slate.
+        season_type (str): 'prev' or 'curr' player and team stats.
+        tags (tuple): PLAYER_TAG values to keep. Frames without PLAYER_TAG are consolidated
+                      and tagged first.
+        league_context (pd.DataFrame, optional): A league context table to read the opponent
+                                                 stats from instead of the slate's frames.
+
+    Returns:
+        pd.DataFrame: One row per player with Game ID, Side, Team, Opponent, PLAYER_ID,
+                      PLAYER, PLAYER_TAG, OPP_E_DEF_RATING and OPP_E_PACE.
+
+    Raises:
+        ValueError: If a frame has no PLAYER_TAG and cannot be tagged (no minutes or usage).
+    """
+    columns = ["Game ID", "Side", "Team", "Opponent", "PLAYER_ID", "PLAYER", "PLAYER_TAG",
+               "OPP_E_DEF_RATING", "OPP_E_PACE"]
+    frames = []
+    manual_tags = None
+    for game_id in slate.game_ids():
+        for side, opp_side in (("home", "away"), ("away", "home")):
+            players = slate.player_stats(game_id, side, season_type)
+            if players.empty:
+                continue
+            if "PLAYER_TAG" not in players.columns:
+                manual_tags = load_manual_tags() if manual_tags is None else manual_tags
+                players = normalize_if_untagged(players, manual_tags)
+                if "PLAYER_TAG" not in players.columns:
+                    raise ValueError(f"Player stats of {slate.team(game_id, side)} in game {game_id} ({season_type}) "
+                                     f"cannot be tagged, they have no minutes or E_USG_PCT column")
+            players = players[players["PLAYER_TAG"].isin(tags)]
+            if league_context is not None:
+                opp_stats = _feature_row(league_context[league_context["TEAM_ABBREVIATION"] == slate.team(game_id, opp_side)])
+            else:
+                opp_stats = _feature_row(slate.team_stats(game_id, opp_side, season_type))
+            frames.append(pd.DataFrame({
+                "Game ID": game_id,
+                "Side": side,
+                "Team": slate.team(game_id, side),
+                "Opponent": slate.team(game_id, opp_side),
+                "PLAYER_ID": players["PLAYER_ID"].to_numpy(),
+                "PLAYER": players["PLAYER"].to_numpy() if "PLAYER" in players.columns else None,
+                "PLAYER_TAG": players["PLAYER_TAG"].to_numpy(),
+                "OPP_E_DEF_RATING": opp_stats["E_DEF_RATING"],
+                "OPP_E_PACE": opp_stats["E_PACE"],
+            }, columns=columns))
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def project_player_points(players, player_logs=None, stat="PTS", features=None, window="SEASON_MEAN"):
+    """
+    Projects every player in a players table at once. Each player's average comes from the
+    feature store when a feature table is given, otherwise from one groupby over the
+    long-format logs; the opponent pace and defensive rating adjustments are then applied
+    as array operations. Players without logs average 0, as in
+    calculate_expected_points_for_tagged_players.
+
+    Args:
+        players (pd.DataFrame): A table from tagged_players_table.
+        player_logs (pd.DataFrame, optional): Long-format logs with 'Player_ID' and the stat
+                                              column (e.g., from data_loader.load_player_logs_table).
+        stat (str): The box score stat to project.
+        features (pd.DataFrame, optional): A table from PlayerFeatureStore.features().
+        window (str): The feature to project from, e.g. 'SEASON_MEAN', 'L10' or 'EWMA'.
+
+    Returns:
+        pd.DataFrame: Game ID, Side, Team, Opponent, Player_ID, Player_Name, Player_Tag,
+                      Average_Points and Expected_Points.
+    """
+    feature_column = f"{stat}_{window}"
+    if features is not None and not features.empty and feature_column in features.columns:
+        averages = features.set_index("Player_ID")[feature_column].dropna()
+    elif player_logs is None or player_logs.empty or stat not in player_logs.columns:
+        averages = pd.Series(dtype=float)
+    else:
+        averages = player_logs.groupby("Player_ID")[stat].mean()
+
+    player_ids = players["PLAYER_ID"].astype("int64").to_numpy()
+    avg_points = averages.reindex(player_ids).fillna(0).to_numpy(dtype=float)
+    missing = int((~np.isin(player_ids, averages.index.to_numpy())).sum())
+    if missing:
+        print(f"No logs found for {missing} of {len(player_ids)} players, projecting 0 points for them")
+
+    opp_pace = players["OPP_E_PACE"].to_numpy(dtype=float)
+    opp_def_rating = players["OPP_E_DEF_RATING"].to_numpy(dtype=float)
+
+    projections = players[["Game ID", "Side", "Team", "Opponent"]].reset_index(drop=True)
+    projections["Player_ID"] = player_ids
+    projections["Player_Name"] = players["PLAYER"].to_numpy()
+    projections["Player_Tag"] = players["PLAYER_TAG"].to_numpy()
+    projections["Average_Points"] = avg_points
+    projections["Expected_Points"] = avg_points * (opp_pace / 100) * (100 / opp_def_rating)
+    return projections
@@ -0,0 +1,581 @@
+# schedule_store.py
+
+import os
+import glob
+import hashlib
+import joblib
+import numpy as np
+import pandas as pd
+from cache_keys import normalize_game_id
+
+try:
+    import pyarrow  # noqa: F401 (only needed to write Parquet season partitions)
+except ImportError:
+    pyarrow = None
+
+# Folder (inside the cache directory) holding the parsed schedule snapshots
+SCHEDULE_SNAPSHOT_DIR = os.path.join("cached_data", "schedule")
+
+# Partitioned multi-season table built from every schedule CSV in the project
+SCHEDULE_CSV_PATTERN = "nbaSchedule*.csv"
+SEASON_PARTITION_DIR = "seasons"
+SEASON_MANIFEST_FILE = "manifest.joblib"
+# Each season partition holds these two tables
+PARTITION_TABLES = ("games", "team_games")
+
+# Bump when the parsed layout changes so old snapshots are rebuilt
+SCHEDULE_SNAPSHOT_VERSION = 2
+
+TEAM_COLUMNS = ["Home Team Abbreviation", "Visiting Team Abbreviation"]
+CATEGORY_COLUMNS = ["Arena", "Arena City", "Home Conference", "Home Division", "Visiting Conference",
+                    "Visiting Division", "Divisional Game", "Conference Game", "Game Time"]
+TEAM_ID_COLUMNS = ["Home Team ID", "Visiting Team ID"]
+
+# Windows (in days, including the game day) for the 'Games Last N Days' context columns
+CONTEXT_WINDOWS = [4, 7]
+
+
+def _file_hash(path):
+    """
+    Returns the SHA-256 hex digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_schedule_csv(csv_path):
+    """
+    Parses a schedule CSV into typed columns: datetime64 game dates, integer game IDs and
+    categorical team codes, sorted by date and game ID.
+
+    Args:
+        csv_path (str): The schedule CSV path.
+
+    Returns:
+        pd.DataFrame: The typed schedule.
+    """
+    games = pd.read_csv(csv_path, dtype={"Game ID": str})
+    games["Game Date"] = pd.to_datetime(games["Game Date"])
+    # '0022400061' and '22400061' are the same game
+    games["Game ID"] = games["Game ID"].map(normalize_game_id).astype("int64")
+    return _apply_schedule_types(games).sort_values(["Game Date", "Game ID"]).reset_index(drop=True)
+
+
+def _apply_schedule_types(games):
+    """
+    Casts the team, category and team ID columns of a schedule frame in place.
+    Also used after concatenating schedules, where categoricals fall back to object.
+    """
+    # Both team columns share one set of categories so they can be compared directly
+    team_codes = pd.CategoricalDtype(sorted(set(games[TEAM_COLUMNS[0]]) | set(games[TEAM_COLUMNS[1]])))
+    for column in TEAM_COLUMNS:
+        games[column] = games[column].astype(team_codes)
+    for column in CATEGORY_COLUMNS:
+        if column in games.columns:
+            games[column] = games[column].astype("category")
+    for column in TEAM_ID_COLUMNS:
+        if column in games.columns:
+            games[column] = games[column].astype("Int64")
+    return games
+
+
+def compute_schedule_context(games):
+    """
+    Computes fatigue and venue context for every game and both teams in one vectorized pass.
+
+    Columns per (game, team):
+        'Rest Days': Full days off before the game (NaN for a team's first game).
+        'Back To Back': True if the team also played the day before.
+        'Games Last N Days': Games in the N days ending on the game day, for N in CONTEXT_WINDOWS.
+        'Three In Four': True if this is at least the team's third game in four days.
+        'Venue Streak': Consecutive home (or road) games ending with this one.
+
+    Args:
+        games (pd.DataFrame): The typed schedule from parse_schedule_csv.
+
+    Returns:
+        pd.DataFrame: One row per team per game, sorted by team and date.
+    """
+    # One row per team per game
+    home = pd.DataFrame({"Game ID": games["Game ID"], "Game Date": games["Game Date"],
+                         "Team Abbreviation": games[TEAM_COLUMNS[0]], "Opponent Abbreviation": games[TEAM_COLUMNS[1]],
+                         "Is Home": True})
+    away = pd.DataFrame({"Game ID": games["Game ID"], "Game Date": games["Game Date"],
+                         "Team Abbreviation": games[TEAM_COLUMNS[1]], "Opponent Abbreviation": games[TEAM_COLUMNS[0]],
+                         "Is Home": False})
+    team_games = pd.concat([home, away], ignore_index=True)
+    team_games = team_games.sort_values(["Team Abbreviation", "Game Date", "Game ID"]).reset_index(drop=True)
+
+    team_codes = team_games["Team Abbreviation"].cat.codes.to_numpy().astype("int64")
+    day_numbers = (team_games["Game Date"].to_numpy().astype("datetime64[D]").astype("int64"))
+    new_team = np.r_[True, team_codes[1:] != team_codes[:-1]]
+
+    # Days between consecutive games of the same team
+    days_since_last = np.r_[np.nan, np.diff(day_numbers).astype("float64")]
+    days_since_last[new_team] = np.nan
+    team_games["Rest Days"] = days_since_last - 1
+    team_games["Back To Back"] = days_since_last == 1
+
+    # Games in a trailing window: one sorted (team, day) key, searched for the window start
+    sort_keys = team_codes * 1_000_000 + day_numbers
+    positions = np.arange(len(team_games))
+    for window in CONTEXT_WINDOWS:
+        window_start = np.searchsorted(sort_keys, sort_keys - (window - 1), side="left")
+        team_games[f"Games Last {window} Days"] = positions - window_start + 1
+    team_games["Three In Four"] = team_games["Games Last 4 Days"] >= 3
+
+    # Home/road streaks: a new streak starts on a team change or a venue change
+    is_home = team_games["Is Home"].to_numpy()
+    streak_start = new_team | np.r_[True, is_home[1:] != is_home[:-1]]
+    streak_ids = np.cumsum(streak_start)
+    team_games["Venue Streak"] = team_games.groupby(streak_ids).cumcount().to_numpy() + 1
+
+    return team_games
+
+
+def season_for_dates(dates):
+    """
+    Returns the NBA season ('YYYY-YY') of each game date. Seasons start in the fall, so
+    games before August belong to the season that started the previous year.
+
+    Args:
+        dates (pd.Series): datetime64 game dates.
+
+    Returns:
+        pd.Series: Season strings (e.g., '2024-25').
+    """
+    start_years = dates.dt.year - (dates.dt.month < 8).astype("int64")
+    return start_years.astype(str) + "-" + ((start_years + 1) % 100).astype(str).str.zfill(2)
+
+
+def to_legacy_schedule(games):
+    """
+    Returns a copy of schedule rows in the layout the CSV consumers expect,
+    with 'Game Date' as a 'YYYY-MM-DD' string.
+    """
+    legacy = games.copy()
+    legacy["Game Date"] = legacy["Game Date"].dt.strftime("%Y-%m-%d")
+    return legacy
+
+
+class ScheduleStore:
+    """
+    A schedule CSV parsed once into typed columns, persisted as a joblib snapshot keyed by
+    the CSV's content hash, with indexes for date, team and game ID lookups.
+
+    Query methods return frames in the legacy layout ('Game Date' as a string) so they can
+    replace the existing read_csv calls directly; the typed frame is available as `games`.
+    """
+    def __init__(self, csv_path="nbaSchedule2425.csv", snapshot_dir=SCHEDULE_SNAPSHOT_DIR):
+        """
+        Loads the schedule snapshot, parsing the CSV only if its contents changed.
+
+        Args:
+            csv_path (str): The schedule CSV path.
+            snapshot_dir (str): Folder holding the parsed snapshots.
+
+        Raises:
+            FileNotFoundError: If the CSV does not exist.
+        """
+        self.csv_path = csv_path
+        self.snapshot_dir = snapshot_dir
+        self.csv_mtime = os.path.getmtime(csv_path)
+        self.csv_hash = _file_hash(csv_path)
+        snapshot = self._load_snapshot()
+        self.games = snapshot["games"]
+        self.team_games = snapshot["team_games"]
+        self._legacy = None
+        self._build_indexes()
+
+    def _snapshot_path(self):
+        name = os.path.splitext(os.path.basename(self.csv_path))[0]
+        return os.path.join(self.snapshot_dir, f"{name}_v{SCHEDULE_SNAPSHOT_VERSION}_{self.csv_hash[:16]}.joblib")
+
+    def _load_snapshot(self):
+        """
+        Returns the snapshot ({'games', 'team_games'}), or parses the CSV, computes the
+        schedule context and writes a new snapshot.
+        """
+        snapshot_path = self._snapshot_path()
+        if os.path.exists(snapshot_path):
+            try:
+                return joblib.load(snapshot_path)
+            except Exception as e:
+                print(f"Error loading schedule snapshot {snapshot_path}: {e}")
+
+        games = parse_schedule_csv(self.csv_path)
+        snapshot = {"games": games, "team_games": compute_schedule_context(games)}
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            temp_path = f"{snapshot_path}.tmp{os.getpid()}"
+            joblib.dump(snapshot, temp_path)
+            os.replace(temp_path, snapshot_path)
+            print(f"Schedule snapshot written to {snapshot_path}")
+        except OSError as e:
+            print(f"Could not write schedule snapshot {snapshot_path}: {e}")
+        return snapshot
+
+    def _build_indexes(self):
+        """
+        Builds positional indexes by date, team and game ID.
+        """
+        self._by_date = self.games.groupby("Game Date", sort=True).indices
+        self._dates = pd.DatetimeIndex(sorted(self._by_date))
+        self._by_game_id = {game_id: position for position, game_id in enumerate(self.games["Game ID"])}
+
+        self._by_team = {}
+        for column in TEAM_COLUMNS:
+            for team_abbr, positions in self.games.groupby(column, observed=True, sort=False).indices.items():
+                self._by_team.setdefault(team_abbr, []).extend(positions)
+        self._by_team = {team_abbr: sorted(positions) for team_abbr, positions in self._by_team.items()}
+
+        # Schedule context by (game ID, team)
+        records = self.team_games.drop(columns=["Game ID", "Team Abbreviation"]).to_dict("records")
+        self._context = dict(zip(zip(self.team_games["Game ID"], self.team_games["Team Abbreviation"]), records))
+
+    def is_stale(self):
+        """
+        True if the CSV on disk changed since the store was loaded.
+        """
+        try:
+            if os.path.getmtime(self.csv_path) == self.csv_mtime:
+                return False
+            return _file_hash(self.csv_path) != self.csv_hash
+        except FileNotFoundError:
+            return True
+
+    def _rows(self, positions, legacy=True):
+        rows = self.games.iloc[sorted(positions)]
+        return to_legacy_schedule(rows) if legacy else rows
+
+    def full_schedule(self, legacy=True):
+        """
+        Returns the whole schedule. The legacy-format copy is built once and reused.
+        """
+        if not legacy:
+            return self.games
+        if self._legacy is None:
+            self._legacy = to_legacy_schedule(self.games)
+        return self._legacy
+
+    def games_between(self, start_date, end_date, legacy=True):
+        """
+        Returns the games between two dates (inclusive).
+
+        Args:
+            start_date (str): The first date in 'YYYY-MM-DD' format.
+            end_date (str): The last date in 'YYYY-MM-DD' format.
+            legacy (bool): If True, 'Game Date' is returned as a string.
+
+        Returns:
+            pd.DataFrame: The games in the range.
+        """
+        start = self._dates.searchsorted(pd.Timestamp(start_date), side="left")
+        end = self._dates.searchsorted(pd.Timestamp(end_date), side="right")
+        positions = [position for date in self._dates[start:end] for position in self._by_date[date]]
+        return self._rows(positions, legacy)
+
+    def games_on(self, game_date, legacy=True):
+        """
+        Returns the games scheduled on a date ('YYYY-MM-DD').
+        """
+        return self._rows(self._by_date.get(pd.Timestamp(game_date), []), legacy)
+
+    def games_on_dates(self, dates, legacy=True):
+        """
+        Returns the games scheduled on any of the given dates ('YYYY-MM-DD' strings).
+        """
+        positions = [position for date in dates for position in self._by_date.get(pd.Timestamp(date), [])]
+        return self._rows(positions, legacy)
+
+    def games_for_team(self, team_abbr, start_date=None, end_date=None, legacy=True):
+        """
+        Returns a team's games (home and away), optionally limited to a date range.
+
+        Args:
+            team_abbr (str): The team abbreviation (e.g., 'GSW').
+            start_date (str, optional): The first date in 'YYYY-MM-DD' format.
+            end_date (str, optional): The last date in 'YYYY-MM-DD' format.
+            legacy (bool): If True, 'Game Date' is returned as a string.
+
+        Returns:
+            pd.DataFrame: The team's games.
+        """
+        rows = self._rows(self._by_team.get(team_abbr, []), legacy=False)
+        if start_date is not None:
+            rows = rows[rows["Game Date"] >= pd.Timestamp(start_date)]
+        if end_date is not None:
+            rows = rows[rows["Game Date"] <= pd.Timestamp(end_date)]
+        return to_legacy_schedule(rows) if legacy else rows
+
+    def game(self, game_id, legacy=True):
+        """
+        Returns one game's schedule row by game ID.
+
+        Returns:
+            pd.Series: The game row, or None if the game is not on the schedule.
+        """
+        position = self._by_game_id.get(int(normalize_game_id(game_id)))
+        if position is None:
+            return None
+        return self._rows([position], legacy).iloc[0]
+
+    def context(self, game_id, team_abbr):
+        """
+        Returns the schedule context of one team in one game (see compute_schedule_context).
+
+        Args:
+            game_id (str or int): The game ID.
+            team_abbr (str): The team abbreviation.
+
+        Returns:
+            dict: The context values, or None if the team does not play in that game.
+        """
+        return self._context.get((int(normalize_game_id(game_id)), team_abbr))
+
+    def game_context(self, game_id):
+        """
+        Returns the schedule context of both teams in a game.
+
+        Returns:
+            dict: {'home': context, 'away': context}, or None if the game is not on the schedule.
+        """
+        position = self._by_game_id.get(int(normalize_game_id(game_id)))
+        if position is None:
+            return None
+        game = self.games.iloc[position]
+        return {"home": self.context(game_id, game[TEAM_COLUMNS[0]]),
+                "away": self.context(game_id, game[TEAM_COLUMNS[1]])}
+
+
+# One store per CSV path for the life of the process (Streamlit reruns reuse it)
+_schedule_stores = {}
+
+def get_schedule_store(csv_path="nbaSchedule2425.csv", snapshot_dir=SCHEDULE_SNAPSHOT_DIR):
+    """
+    Returns the shared ScheduleStore for a CSV, reloading it only if the CSV changed.
+
+    Raises:
+        FileNotFoundError: If the CSV does not exist.
+    """
+    store = _schedule_stores.get(csv_path)
+    if store is None or store.is_stale():
+        store = ScheduleStore(csv_path, snapshot_dir=snapshot_dir)
+        _schedule_stores[csv_path] = store
+    return store
+
+
+class ScheduleTable:
+    """
+    One schedule table across every season, built from all schedule CSVs in the project and
+    partitioned by season. Each partition's games and schedule context are persisted as
+    Parquet files (joblib when pyarrow is not installed) and only read when a query needs
+    that season; when a CSV changes, only the seasons it covers are rebuilt. Games listed in
+    more than one CSV are kept once per (Season, Game ID), preferring the CSV with the most
+    columns.
+    """
+    def __init__(self, project_dir=".", pattern=SCHEDULE_CSV_PATTERN, snapshot_dir=SCHEDULE_SNAPSHOT_DIR):
+        """
+        Args:
+            project_dir (str): Folder searched for schedule CSVs.
+            pattern (str): Glob pattern of the schedule CSVs.
+            snapshot_dir (str): Folder holding the per-CSV snapshots and the season partitions.
+        """
+        self.project_dir = project_dir
+        self.pattern = pattern
+        self.snapshot_dir = snapshot_dir
+        self.partition_dir = os.path.join(snapshot_dir, SEASON_PARTITION_DIR)
+        self.partition_format = "parquet" if pyarrow is not None else "joblib"
+        self.refresh()
+
+    def _csv_paths(self):
+        return sorted(glob.glob(os.path.join(self.project_dir, self.pattern)))
+
+    def _partition_path(self, season, table):
+        return os.path.join(self.partition_dir, f"{season}_{table}.{self.partition_format}")
+
+    def _partition_exists(self, season):
+        return all(os.path.exists(self._partition_path(season, table)) for table in PARTITION_TABLES)
+
+    def _write_partition(self, season, partition):
+        for table in PARTITION_TABLES:
+            path = self._partition_path(season, table)
+            temp_path = f"{path}.tmp{os.getpid()}"
+            if self.partition_format == "parquet":
+                partition[table].to_parquet(temp_path, index=False)
+            else:
+                joblib.dump(partition[table], temp_path)
+            os.replace(temp_path, path)
+
+    def _remove_partition(self, season):
+        for table in PARTITION_TABLES:
+            path = self._partition_path(season, table)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _partition(self, season, table):
+        """
+        Returns one table of a season partition, reading it from disk on first use.
+        """
+        key = (season, table)
+        if key not in self._loaded:
+            path = self._partition_path(season, table)
+            self._loaded[key] = pd.read_parquet(path) if self.partition_format == "parquet" else joblib.load(path)
+        return self._loaded[key]
+
+    def _read_manifest(self):
+        manifest_path = os.path.join(self.partition_dir, SEASON_MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            try:
+                return joblib.load(manifest_path)
+            except Exception as e:
+                print(f"Error loading schedule manifest {manifest_path}: {e}")
+        return {"version": SCHEDULE_SNAPSHOT_VERSION, "sources": {}}
+
+    def _dump(self, data, path):
+        temp_path = f"{path}.tmp{os.getpid()}"
+        joblib.dump(data, temp_path)
+        os.replace(temp_path, path)
+
+    def _build_partition(self, season, stores):
+        """
+        Builds one season partition from every CSV that has games in that season.
+
+        Returns:
+            dict: {'games': typed games with a 'Season' column, 'team_games': schedule context}
+        """
+        # Prefer the CSV with the most columns (e.g., the one that has team IDs)
+        stores = sorted(stores, key=lambda store: (-len(store.games.columns), store.csv_path))
+        frames = []
+        for store in stores:
+            games = store.games[season_for_dates(store.games["Game Date"]) == season]
+            frames.append(games.assign(Season=season))
+        games = pd.concat(frames, ignore_index=True).drop_duplicates(["Season", "Game ID"], keep="first")
+        games = _apply_schedule_types(games).sort_values(["Game Date", "Game ID"]).reset_index(drop=True)
+        team_games = compute_schedule_context(games)
+        team_games["Season"] = season
+        return {"games": games, "team_games": team_games}
+
+    def refresh(self):
+        """
+        Re-reads the schedule CSVs and rebuilds the season partitions whose sources changed.
+
+        Returns:
+            list: The seasons that were rebuilt.
+        """
+        stores = {path: get_schedule_store(path, snapshot_dir=self.snapshot_dir) for path in self._csv_paths()}
+        manifest = self._read_manifest()
+        if manifest.get("version") != SCHEDULE_SNAPSHOT_VERSION:
+            manifest = {"version": SCHEDULE_SNAPSHOT_VERSION, "sources": {}}
+
+        # Seasons fed by a new, changed or removed CSV are dirty
+        dirty = set()
+        sources = {}
+        for path, store in stores.items():
+            previous = manifest["sources"].get(path)
+            if previous is not None and previous["hash"] == store.csv_hash:
+                sources[path] = previous
+                continue
+            seasons = sorted(season_for_dates(store.games["Game Date"]).unique())
+            sources[path] = {"hash": store.csv_hash, "seasons": seasons}
+            dirty.update(seasons)
+            if previous is not None:
+                dirty.update(previous["seasons"])
+        for path, previous in manifest["sources"].items():
+            if path not in stores:
+                dirty.update(previous["seasons"])
+
+        seasons = sorted({season for source in sources.values() for season in source["seasons"]})
+        dirty.update(season for season in seasons if not self._partition_exists(season))
+
+        os.makedirs(self.partition_dir, exist_ok=True)
+        for season in sorted(dirty):
+            if season in seasons:
+                season_stores = [stores[path] for path, source in sources.items() if season in source["seasons"]]
+                self._write_partition(season, self._build_partition(season, season_stores))
+                print(f"Schedule partition {season} rebuilt from {len(season_stores)} file(s)")
+            else:
+                self._remove_partition(season)
+        if sources != manifest["sources"]:
+            self._dump({"version": SCHEDULE_SNAPSHOT_VERSION, "sources": sources},
+                       os.path.join(self.partition_dir, SEASON_MANIFEST_FILE))
+
+        self.sources = sources
+        self._stores = stores
+        self._seasons = seasons
+        # Partitions are read lazily by the queries that need them
+        self._loaded = {}
+        return sorted(dirty & set(seasons))
+
+    def is_stale(self):
+        """
+        True if a schedule CSV was added, removed or changed since the table was refreshed.
+        """
+        return self._csv_paths() != sorted(self._stores) or any(store.is_stale() for store in self._stores.values())
+
+    def seasons(self):
+        """
+        Returns the seasons in the table, in order.
+        """
+        return list(self._seasons)
+
+    def query(self, seasons=None, start_date=None, end_date=None, team_abbr=None, legacy=False):
+        """
+        Returns games across seasons in one filtered read. Only the requested season
+        partitions are touched.
+
+        Args:
+            seasons (list, optional): Seasons to include (e.g., ['2023-24', '2024-25']); all if None.
+            start_date (str, optional): The first date in 'YYYY-MM-DD' format.
+            end_date (str, optional): The last date in 'YYYY-MM-DD' format.
+            team_abbr (str, optional): Only games this team plays in.
+            legacy (bool): If True, 'Game Date' is returned as a string.
+
+        Returns:
+            pd.DataFrame: The matching games with a 'Season' column.
+        """
+        seasons = self.seasons() if seasons is None else [season for season in seasons if season in self._seasons]
+        if not seasons:
+            return pd.DataFrame()
+        games = pd.concat([self._partition(season, "games") for season in seasons], ignore_index=True)
+        games = _apply_schedule_types(games)
+
+        mask = pd.Series(True, index=games.index)
+        if start_date is not None:
+            mask &= games["Game Date"] >= pd.Timestamp(start_date)
+        if end_date is not None:
+            mask &= games["Game Date"] <= pd.Timestamp(end_date)
+        if team_abbr is not None:
+            mask &= (games[TEAM_COLUMNS[0]] == team_abbr) | (games[TEAM_COLUMNS[1]] == team_abbr)
+        games = games[mask]
+        return to_legacy_schedule(games) if legacy else games
+
+    def context(self, seasons=None):
+        """
+        Returns the schedule context rows (see compute_schedule_context) for the given seasons.
+        """
+        seasons = self.seasons() if seasons is None else [season for season in seasons if season in self._seasons]
+        if not seasons:
+            return pd.DataFrame()
+        return pd.concat([self._partition(season, "team_games") for season in seasons], ignore_index=True)
+
+
+# One table per project folder for the life of the process, like the per-CSV stores
+_schedule_tables = {}
+
+def get_schedule_table(project_dir=".", snapshot_dir=SCHEDULE_SNAPSHOT_DIR):
+    """
+    Returns the shared multi-season schedule table for the project's schedule CSVs,
+    refreshing it only if a CSV was added, removed or changed.
+    """
+    key = (project_dir, snapshot_dir)
+    table = _schedule_tables.get(key)
+    if table is None:
+        table = ScheduleTable(project_dir, snapshot_dir=snapshot_dir)
+        _schedule_tables[key] = table
+    elif table.is_stale():
+        table.refresh()
+    return table
@@ -0,0 +1,181 @@
+# simulation.py
+"""
+Monte Carlo simulation of every game on a slate from the players' cached game logs.
+
+Each simulation draws one outcome per player by bootstrapping their logs. Teammates are
+drawn from the same historical game whenever they both played it, which keeps the
+correlation between their outcomes (shared pace, blowouts, usage shifts). Draws are scaled
+by the same opponent pace and E_DEF_RATING factors the point projections use, and summed
+into team totals, game totals and spreads.
+
+The draws of one side are vectorized across simulations and players. Each game draws from its
+own random generator, so with a seed a game's results do not depend on the rest of the slate.
+"""
+
+import time
+import zlib
+import numpy as np
+import pandas as pd
+from cache_keys import normalize_game_id
+
+PERCENTILES = [5, 25, 50, 75, 95]
+DEFAULT_SIMULATIONS = 10000
+
+
+def _opponent_factor(opp_pace, opp_def_rating):
+    """
+    The opponent adjustment of projections.project_player_points.
+    """
+    return (opp_pace / 100) * (100 / opp_def_rating)
+
+
+def game_rng(seed, game_id):
+    """
+    Returns the random generator of one game: seeded with (seed, game ID) when a seed is given,
+    so simulating a game alone or with any other games gives the same draws.
+
+    Args:
+        seed (int): The slate's seed, or None for unseeded draws.
+        game_id (str or int): The game ID.
+
+    Returns:
+        np.random.Generator: The game's generator.
+    """
+    if seed is None:
+        return np.random.default_rng()
+    game_id = normalize_game_id(game_id)
+    # Python's str hash is salted per process, so non-numeric IDs use a stable checksum
+    game_key = int(game_id) if game_id.isdigit() else zlib.crc32(game_id.encode())
+    return np.random.default_rng([seed, game_key])
+
+
+def _draw_side(players, logs_by_player, game_logs, n_sims, rng, stat):
+    """
+    Draws n_sims outcomes for every player on one side of a game.
+
+    Args:
+        players (pd.DataFrame): The side's rows of the players table.
+        logs_by_player (dict): {player_id: np.ndarray of the player's stat values}.
+        game_logs (pd.DataFrame): The side's logs pivoted to (game x player) stat values.
+        n_sims (int): Number of simulations.
+        rng (np.random.Generator): The random generator.
+        stat (str): The simulated stat.
+
+    Returns:
+        np.ndarray: (n_sims x players) simulated outcomes, before the opponent adjustment.
+    """
+    player_ids = players["PLAYER_ID"].astype("int64").to_numpy()
+    n_players = len(player_ids)
+
+    # Independent bootstrap of each player's own logs (zeros for players without logs)
+    counts = np.array([len(logs_by_player.get(player_id, ())) for player_id in player_ids])
+    values = np.zeros((n_players, max(counts.max(initial=0), 1)))
+    for column, player_id in enumerate(player_ids):
+        values[column, :counts[column]] = logs_by_player.get(player_id, ())
+    picks = (rng.random((n_sims, n_players)) * counts).astype("int64")
+    draws = values[np.arange(n_players), picks]
+
+    # Shared bootstrap: every simulation replays one historical game for the whole side,
+    # players who did not play in it keep their independent draw
+    if not game_logs.empty:
+        shared = game_logs.reindex(columns=player_ids).to_numpy(dtype=float)
+        shared_draws = shared[rng.integers(len(shared), size=n_sims)]
+        played = ~np.isnan(shared_draws)
+        draws[played] = shared_draws[played]
+    return draws
+
+
+def _summarize(samples, prefix):
+    """
+    Mean, SD and percentiles of simulated samples along the first axis, as {column: values}.
+    """
+    summary = {f"{prefix}Mean": samples.mean(axis=0), f"{prefix}SD": samples.std(axis=0)}
+    for percentile, values in zip(PERCENTILES, np.percentile(samples, PERCENTILES, axis=0)):
+        summary[f"{prefix}P{percentile}"] = values
+    return summary
+
+
+def simulate_slate(players, player_logs, n_sims=DEFAULT_SIMULATIONS, stat="PTS", total_lines=None,
+                   spread_lines=None, player_lines=None, seed=None, keep_samples=False):
+    """
+    Simulates every game in a players table.
+
+    Args:
+        players (pd.DataFrame): A table from projections.tagged_players_table.
+        player_logs (pd.DataFrame): Long-format logs with 'Player_ID', 'Game_ID' and the stat
+                                    column (e.g., from data_loader.load_player_logs_table).
+        n_sims (int): Simulations per game (10,000 to 100,000 is typical).
+        stat (str): The box score stat to simulate.
+        total_lines (dict, optional): {game_id: total line} for P(over/under).
+        spread_lines (dict, optional): {game_id: home spread line}, e.g. -5.5 when the home
+                                       team is favored by 5.5, for P(home covers).
+        player_lines (dict, optional): {player_id: line} for player P(over/under).
+        seed (int, optional): Seed for reproducible simulations. Each game is seeded with
+                              (seed, game ID), see game_rng.
+        keep_samples (bool): If True, also return the simulated home and away totals.
+
+    Returns:
+        dict: 'games' (one row per game with team total, game total and spread distributions),
+              'players' (one row per player) and 'samples' ({game_id: {'home', 'away'}} or None).
+    """
+    start = time.perf_counter()
+    total_lines = total_lines or {}
+    spread_lines = spread_lines or {}
+    player_lines = player_lines or {}
+
+    logs = player_logs[player_logs["Player_ID"].isin(players["PLAYER_ID"].astype("int64"))]
+    logs_by_player = {player_id: group[stat].to_numpy(dtype=float) for player_id, group in logs.groupby("Player_ID")}
+    pivoted = logs.pivot_table(index="Game_ID", columns="Player_ID", values=stat, aggfunc="first") if not logs.empty else pd.DataFrame()
+
+    game_rows, player_frames, samples = [], [], {}
+    for game_id, game_players in players.groupby("Game ID", sort=True):
+        rng = game_rng(seed, game_id)
+        side_totals = {}
+        for side in ("home", "away"):
+            side_players = game_players[game_players["Side"] == side]
+            if side_players.empty:
+                side_totals[side] = np.zeros(n_sims)
+                continue
+
+            # Only the historical games at least one of this side's players appeared in
+            player_ids = side_players["PLAYER_ID"].astype("int64").to_numpy()
+            game_logs = pivoted.reindex(columns=player_ids).dropna(how="all") if not pivoted.empty else pivoted
+            draws = _draw_side(side_players, logs_by_player, game_logs, n_sims, rng, stat)
+            draws *= _opponent_factor(side_players["OPP_E_PACE"].to_numpy(dtype=float),
+                                      side_players["OPP_E_DEF_RATING"].to_numpy(dtype=float))
+            side_totals[side] = draws.sum(axis=1)
+
+            player_summary = side_players[["Game ID", "Side", "Team", "PLAYER_ID", "PLAYER", "PLAYER_TAG"]].reset_index(drop=True)
+            player_summary = player_summary.assign(**_summarize(draws, ""))
+            line = np.array([player_lines.get(player_id, np.nan) for player_id in player_ids], dtype=float)
+            player_summary["Line"] = line
+            player_summary["P(Over)"] = np.where(np.isnan(line), np.nan, (draws > line).mean(axis=0))
+            player_summary["P(Under)"] = np.where(np.isnan(line), np.nan, (draws < line).mean(axis=0))
+            player_frames.append(player_summary)
+
+        home, away = side_totals["home"], side_totals["away"]
+        total, spread = home + away, home - away
+        row = {"Game ID": game_id,
+               "Home Team": game_players.loc[game_players["Side"] == "home", "Team"].iloc[0] if (game_players["Side"] == "home").any() else None,
+               "Away Team": game_players.loc[game_players["Side"] == "away", "Team"].iloc[0] if (game_players["Side"] == "away").any() else None}
+        for prefix, values in (("Home ", home), ("Away ", away), ("Total ", total), ("Spread ", spread)):
+            row.update({column: float(value) for column, value in _summarize(values, prefix).items()})
+
+        total_line = total_lines.get(game_id)
+        row["Total Line"] = total_line
+        row["P(Over)"] = float((total > total_line).mean()) if total_line is not None else np.nan
+        row["P(Under)"] = float((total < total_line).mean()) if total_line is not None else np.nan
+        spread_line = spread_lines.get(game_id)
+        row["Spread Line"] = spread_line
+        row["P(Home Covers)"] = float((spread + spread_line > 0).mean()) if spread_line is not None else np.nan
+        game_rows.append(row)
+
+        if keep_samples:
+            samples[game_id] = {"home": home, "away": away}
+
+    print(f"Simulated {len(game_rows)} games x {n_sims} runs in {time.perf_counter() - start:.2f}s")
+    return {
+        "games": pd.DataFrame(game_rows),
+        "players": pd.concat(player_frames, ignore_index=True) if player_frames else pd.DataFrame(),
+        "samples": samples if keep_samples else None,
+    }
@@ -0,0 +1,126 @@
+# slate.py
+
+import pandas as pd
+from cache_keys import TEAM_STATS, PLAYER_STATS, SEASON_TYPES, normalize_game_id
+
+
+class GameSlate:
+    """
+    All cached team and player frames for one game date, keyed by game and side.
+
+    Attributes:
+        game_date (str): The game date in 'YYYY-MM-DD' format.
+        games (dict): {game_id: {side: {'team': abbr, 'team_stats': {season_type: df},
+                       'player_stats': {season_type: df}}}}
+    """
+    def __init__(self, game_date):
+        self.game_date = game_date
+        self.games = {}
+
+    def add(self, key, data):
+        """
+        Adds a loaded frame to the slate.
+
+        Args:
+            key (CacheKey): The per-game key the frame was loaded from.
+            data (pd.DataFrame): The loaded frame.
+        """
+        side = self.games.setdefault(key.game_id, {}).setdefault(
+            key.side, {"team": key.team_abbr, TEAM_STATS: {}, PLAYER_STATS: {}}
+        )
+        side[key.entity][key.season_type] = data if data is not None else pd.DataFrame()
+
+    def game_ids(self):
+        """
+        Returns the game IDs on the slate, in order.
+        """
+        return sorted(self.games)
+
+    def team(self, game_id, side):
+        """
+        Returns the team abbreviation playing on one side of a game, or None.
+        """
+        return self.games.get(normalize_game_id(game_id), {}).get(side, {}).get("team")
+
+    def find_game(self, team_abbr):
+        """
+        Returns the game ID and side a team plays in on this slate.
+
+        Returns:
+            tuple: (game_id, side), or (None, None) if the team is not on the slate.
+        """
+        for game_id, sides in self.games.items():
+            for side, entry in sides.items():
+                if entry["team"] == team_abbr:
+                    return game_id, side
+        return None, None
+
+    def _frame(self, game_id, side, entity, season_type):
+        entry = self.games.get(normalize_game_id(game_id), {}).get(side)
+        if entry is None:
+            return pd.DataFrame()
+        return entry[entity].get(season_type, pd.DataFrame())
+
+    def team_stats(self, game_id, side, season_type):
+        """
+        Returns the team stats of one side of a game ('prev' or 'curr'), or an empty DataFrame.
+        """
+        return self._frame(game_id, side, TEAM_STATS, season_type)
+
+    def player_stats(self, game_id, side, season_type):
+        """
+        Returns the player stats of one side of a game ('prev' or 'curr'), or an empty DataFrame.
+        """
+        return self._frame(game_id, side, PLAYER_STATS, season_type)
+
+    def frames(self, entity, season_type=None):
+        """
+        Iterates over the stored frames of one entity ('team_stats' or 'player_stats').
+
+        Args:
+            entity (str): TEAM_STATS or PLAYER_STATS.
+            season_type (str, optional): Only 'prev' or 'curr' frames.
+
+        Yields:
+            tuple: (game_id, side, team_abbr, season_type, df), in game order.
+        """
+        for game_id in self.game_ids():
+            for side, entry in sorted(self.games[game_id].items()):
+                for frame_season_type, data in entry[entity].items():
+                    if season_type is None or frame_season_type == season_type:
+                        yield game_id, side, entry["team"], frame_season_type, data
+
+    def map_frames(self, entity, func, season_type=None):
+        """
+        Replaces every stored frame of one entity with func(df), in place.
+
+        Args:
+            entity (str): TEAM_STATS or PLAYER_STATS.
+            func (callable): Takes and returns a DataFrame.
+            season_type (str, optional): Only 'prev' or 'curr' frames.
+        """
+        for game_id, side, _, frame_season_type, data in list(self.frames(entity, season_type)):
+            self.games[game_id][side][entity][frame_season_type] = func(data)
+
+    def consolidated_team_stats(self, game_id, side):
+        """
+        Concatenates previous and current season team stats with a 'Season' column,
+        the same frame data_loader.load_and_concatenate_team_stats returns.
+
+        Returns:
+            pd.DataFrame: The concatenated stats, or an empty DataFrame.
+        """
+        frames = []
+        for season_type, label in zip(SEASON_TYPES, ["Previous", "Current"]):
+            stats = self.team_stats(game_id, side, season_type).copy()
+            stats["Season"] = label
+            frames.append(stats)
+        if all(frame.empty for frame in frames):
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def __len__(self):
+        return len(self.games)
+
+    def __repr__(self):
+        return f"GameSlate({self.game_date}, {len(self.games)} games)"
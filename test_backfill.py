@@ -0,0 +1,47 @@
+# test_backfill.py
+"""
+A backfill must not cache current-season stats for past dates: the endpoints return stats
+as of the day they are called, which include games played after those dates.
+
+Usage:
+    python -m pytest test_backfill.py
+"""
+
+from types import SimpleNamespace
+import pandas as pd
+from backfill import plan_backfill
+from cache_manager import CacheManager
+from pipeline import Pipeline, RateLimiter
+from schedule_store import ScheduleStore
+
+GAMES = pd.DataFrame({
+    "Game Date": ["2024-10-22", "2024-10-23", "2024-10-24"],
+    "Game ID": ["0022400061", "0022400070", "0022400080"],
+    "Home Team Abbreviation": ["BOS", "MIA", "BOS"],
+    "Visiting Team Abbreviation": ["NYK", "ORL", "MIA"],
+})
+
+
+def plan(tmp_path, today):
+    GAMES.to_csv(tmp_path / "nbaSchedule2425.csv", index=False)
+    schedule = ScheduleStore(str(tmp_path / "nbaSchedule2425.csv"), snapshot_dir=str(tmp_path / "schedule"))
+    pipeline = Pipeline()
+    plan_backfill(SimpleNamespace(schedule_store=schedule), CacheManager(str(tmp_path / "cache")),
+                  "2024-10-22", "2024-10-24", RateLimiter(), pipeline, today=today)
+    return pipeline
+
+
+def test_current_season_stats_are_only_pulled_for_today(tmp_path):
+    pipeline = plan(tmp_path, today="2024-10-23")
+    saves = [name for name in pipeline.tasks if name.startswith("save(")]
+    assert [name for name in saves if name.endswith("curr)")] == [
+        "save(22400070, home, player_stats, curr)", "save(22400070, home, team_stats, curr)",
+        "save(22400070, away, player_stats, curr)", "save(22400070, away, team_stats, curr)",
+    ]
+    assert len([name for name in saves if name.endswith("prev)")]) == 12
+
+
+def test_past_range_fetches_no_current_season_data(tmp_path):
+    pipeline = plan(tmp_path, today="2024-11-01")
+    assert not [name for name in pipeline.tasks if "2024-25" in name or name.endswith("curr)")]
+    assert "team_metrics(2023-24)" in pipeline.tasks
@@ -0,0 +1,92 @@
+# test_backtest.py
+"""
+A backtest must project from the backtested season's logs and refetch the league game log
+only when it misses a game that was scheduled by the end of the range.
+
+Usage:
+    python -m pytest test_backtest.py
+"""
+
+from types import SimpleNamespace
+import pandas as pd
+import pytest
+import backtest
+from backtest import backtest_day, last_game_date, run_backtest
+from cache_keys import CacheKey, TEAM_GAME_LOG
+from cache_manager import CacheManager
+from player_tags import normalize_player_stats
+from schedule_store import ScheduleStore
+
+# The 2023-24 finale, then opening week of 2024-25 with an off day on the 24th
+SCHEDULE = pd.DataFrame({
+    "Game Date": ["2024-04-14", "2024-10-22", "2024-10-23", "2024-10-25"],
+    "Game ID": ["0022301200", "0022400061", "0022400070", "0022400080"],
+    "Home Team Abbreviation": ["BOS", "BOS", "MIA", "BOS"],
+    "Visiting Team Abbreviation": ["WAS", "NYK", "ORL", "MIA"],
+})
+
+
+def team_game_log(through_date):
+    games = SCHEDULE[(SCHEDULE["Game Date"] >= "2024-10-22") & (SCHEDULE["Game Date"] <= through_date)]
+    return pd.DataFrame({
+        "GAME_ID": list(games["Game ID"]) * 2,
+        "GAME_DATE": list(games["Game Date"]) * 2,
+        "TEAM_ABBREVIATION": list(games["Home Team Abbreviation"]) + list(games["Visiting Team Abbreviation"]),
+        "PTS": 110.0,
+    })
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """
+    A project folder with the schedule CSV and an empty cache, as the working directory.
+    """
+    monkeypatch.chdir(tmp_path)
+    SCHEDULE.to_csv(tmp_path / "nbaSchedule2425.csv", index=False)
+    return tmp_path
+
+
+def test_last_game_date_skips_off_days_and_other_seasons(project):
+    schedule = ScheduleStore("nbaSchedule2425.csv", snapshot_dir=str(project / "schedule"))
+    assert last_game_date(schedule, "2024-25", "2024-10-24") == "2024-10-23"
+    assert last_game_date(schedule, "2024-25", "2025-06-30") == "2024-10-25"
+    assert last_game_date(schedule, "2024-25", "2024-10-21") is None
+    assert last_game_date(schedule, "2023-24", "2024-10-24") == "2024-04-14"
+
+
+@pytest.mark.parametrize("cached_through, end_date, fetches", [
+    ("2024-10-23", "2024-10-24", 0),
+    ("2024-10-23", "2024-10-25", 1),
+])
+def test_game_log_is_refetched_only_when_it_misses_a_game(project, cached_through, end_date, fetches):
+    CacheManager("cached_data").save(CacheKey.league_table("2024-25", TEAM_GAME_LOG), team_game_log(cached_through))
+    calls = []
+
+    def get_league_game_log(season, player_or_team, through_date=None):
+        calls.append((season, through_date))
+        return team_game_log(through_date)
+
+    report, _ = run_backtest("2024-10-22", end_date, workers=1, output_dir=str(project / "backtests"),
+                             nba_data=SimpleNamespace(get_league_game_log=get_league_game_log))
+    assert len(calls) == fetches
+    assert report.empty
+
+
+def test_player_model_averages_the_backtested_season(project, monkeypatch, make_player_stats):
+    cache_manager = CacheManager("cached_data")
+    for side, team_abbr, first_id in (("home", "BOS", 1000), ("away", "NYK", 2000)):
+        key = CacheKey.player_stats("2024-10-22", "22400061", side, team_abbr, "prev")
+        cache_manager.save(key, normalize_player_stats(make_player_stats(team_abbr, first_id)))
+        cache_manager.save(CacheKey.team_stats("2024-10-22", "22400061", side, team_abbr, "prev"),
+                           pd.DataFrame({"E_DEF_RATING": [110.0], "E_PACE": [99.0]}))
+    seasons = []
+
+    def load_player_logs_table(player_ids, season, cache_dir="cached_data"):
+        seasons.append(season)
+        return pd.DataFrame()
+
+    monkeypatch.setattr(backtest, "load_player_logs_table", load_player_logs_table)
+    day_actuals = pd.DataFrame(columns=["Game ID", "Game Date", "Team", "Player_ID", "PTS"])
+    report = backtest_day("2024-10-22", "player_points", day_actuals)
+    assert seasons == ["2024-25"]
+    assert len(report) == 20
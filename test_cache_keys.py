@@ -0,0 +1,75 @@
+# test_cache_keys.py
+"""
+Every CacheKey must parse back from its own storage path, and the file names older code
+wrote must parse to the key that now owns them.
+
+Usage:
+    python -m pytest test_cache_keys.py
+"""
+
+import pytest
+from cache_keys import CacheKey, normalize_game_id, parse_cache_path
+
+KEYS = [
+    CacheKey.team_stats("2024-10-22", "0022400061", "home", "BOS", "prev"),
+    CacheKey.player_stats("2024-10-22", "22400061", "away", "NYK", "curr"),
+    CacheKey.season_team_stats("2023-24", "BOS"),
+    CacheKey.season_player_stats("2023-24", "NYK"),
+    CacheKey.player_logs(1628369, "2023-24"),
+    CacheKey.matchup_rollup("2023-24"),
+    CacheKey.league_table("2024-25", "team_stats"),
+    CacheKey.league_table("2024-25", "player_game_log", "2024-10-22"),
+    CacheKey.derived("features", "2023-24"),
+]
+
+
+@pytest.mark.parametrize("key", KEYS, ids=lambda key: key.relpath())
+def test_canonical_paths_parse_back_to_their_key(key):
+    assert parse_cache_path(key.relpath()) == key
+
+
+@pytest.mark.parametrize("relpath, expected", [
+    ("2024-10-22/game_22400061_home_team_BOS_prev.joblib.joblib",
+     CacheKey.player_stats("2024-10-22", "22400061", "home", "BOS", "prev")),
+    ("2024-10-22/game_22400061_player_1628369_logs.joblib",
+     CacheKey.player_logs(1628369, None, game_date="2024-10-22", game_id="22400061")),
+    ("2024-10-22/player_1628369_logs_2023-24.joblib",
+     CacheKey.player_logs(1628369, "2023-24", game_date="2024-10-22")),
+    ("2024-10-22/player_logs/player_1628369_logs_2024-10-22.joblib",
+     CacheKey.player_logs(1628369, None, game_date="2024-10-22")),
+    ("matchups_rollup_2023_24.joblib", CacheKey.matchup_rollup("2023-24")),
+])
+def test_legacy_paths_parse_to_the_owning_key(relpath, expected):
+    assert parse_cache_path(relpath) == expected
+
+
+def test_legacy_paths_are_tried_after_the_canonical_path():
+    key = CacheKey.player_logs(1628369, "2023-24", game_date="2024-10-22", game_id="22400061")
+    legacy = key.legacy_relpaths()
+    assert key.relpath() not in legacy
+    assert legacy.index("2024-10-22/game_22400061_player_1628369_logs.joblib") < legacy.index("2024-10-22/player_1628369_logs_2023-24.joblib")
+
+
+def test_unrecognized_paths_are_not_cache_entries():
+    assert parse_cache_path("schema_version.json") is None
+    assert parse_cache_path("2024-10-22/notes.txt") is None
+
+
+def test_game_ids_are_normalized():
+    assert normalize_game_id("0022400061") == normalize_game_id(22400061) == "22400061"
+    assert CacheKey.team_stats("2024-10-22", "0022400061", "home", "BOS", "prev").game_id == "22400061"
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"entity": "box_scores"},
+    {"entity": "team_stats", "season_type": "playoffs"},
+    {"entity": "team_stats", "side": "neutral"},
+])
+def test_invalid_keys_raise(kwargs):
+    with pytest.raises(ValueError):
+        CacheKey(**kwargs)
+
+
+def test_incomplete_keys_have_no_path():
+    with pytest.raises(ValueError):
+        CacheKey("team_stats", game_date="2024-10-22", game_id="22400061").relpath()
@@ -0,0 +1,45 @@
+# test_cache_metrics.py
+"""
+Cache operations must be counted under the entity of the key they touched, whatever the
+cache directory, layout or file name scheme.
+
+Usage:
+    python -m pytest test_cache_metrics.py
+"""
+
+import os
+import pandas as pd
+import pytest
+from cache_keys import CacheKey
+from cache_manager import CacheManager
+from cache_metrics import categorize_cache_path
+
+
+@pytest.mark.parametrize("relpath, category", [
+    ("2024-10-22/game_22400061_home_team_BOS_prev_team_stats.joblib", "team_stats"),
+    ("2024-10-22/game_22400061_home_team_BOS_curr.joblib", "player_stats"),
+    ("seasons/2023-24/team_stats/BOS.joblib", "team_stats"),
+    ("seasons/2023-24/player_stats/BOS.joblib", "player_stats"),
+    ("player_logs/2023-24/1628369.joblib", "player_logs"),
+    ("2024-10-22/player_1628369_logs_2023-24.joblib", "player_logs"),
+    ("previous_seasons/matchup_rollup_2023-24_Totals_Regular Season.joblib", "matchup_rollup"),
+    ("league/2024-25/team_stats_2024-10-22.joblib", "league_table"),
+    ("derived/features/2023-24.joblib", "derived"),
+    ("schedule/2024-25.parquet", "other"),
+])
+def test_paths_are_categorized_by_entity(relpath, category):
+    assert categorize_cache_path(relpath) == category
+    assert categorize_cache_path(os.path.join("/data/cached_data", relpath)) == category
+
+
+def test_cache_manager_records_league_and_derived_entries(tmp_path):
+    cache_manager = CacheManager(str(tmp_path))
+    frame = pd.DataFrame({"TEAM_ID": [1, 2]})
+    for key in (CacheKey.league_table("2024-25", "team_stats", "2024-10-22"), CacheKey.derived("features", "2023-24")):
+        cache_manager.save(key, frame)
+        cache_manager.load(key)
+
+    snapshot = cache_manager.metrics.snapshot()
+    for category in ("league_table", "derived"):
+        assert (snapshot[category]["writes"], snapshot[category]["hits"]) == (1, 1)
+    assert snapshot["other"]["writes"] == 0
@@ -0,0 +1,76 @@
+# test_cache_migrate.py
+"""
+Migrating a cache must move every legacy file to its canonical CacheKey path in the
+versioned envelope, keep what CacheManager reads unchanged, and be a no-op the second time.
+
+Usage:
+    python -m pytest test_cache_migrate.py
+"""
+
+import os
+import joblib
+import pandas as pd
+from cache_keys import CacheKey
+from cache_manager import CacheManager, SCHEMA_VERSION, read_schema_marker, unwrap_cache_entry
+from cache_migrate import migrate_cache
+
+GAME_DATE = "2024-10-22"
+
+
+def player_logs(n_games):
+    return pd.DataFrame({"SEASON_ID": "22023", "Player_ID": 1628369, "PTS": range(n_games)})
+
+
+def write_legacy_cache(cache_dir):
+    """
+    Writes unversioned files under the older names: the same player's logs for two games,
+    a doubled extension and the older matchup rollup name.
+    """
+    files = {
+        f"{GAME_DATE}/game_22400061_player_1628369_logs.joblib": player_logs(40),
+        f"{GAME_DATE}/game_22400062_player_1628369_logs.joblib.joblib": player_logs(41),
+        f"{GAME_DATE}/game_22400061_home_team_BOS_prev_team_stats.joblib.joblib": pd.DataFrame({"E_PACE": [98.5]}),
+        "matchups_rollup_2023_24.joblib": pd.DataFrame({"DEF_PLAYER_ID": [1, 2]}),
+    }
+    for relpath, data in files.items():
+        os.makedirs(os.path.dirname(os.path.join(cache_dir, relpath)), exist_ok=True)
+        joblib.dump(data, os.path.join(cache_dir, relpath))
+    return files
+
+
+def test_dry_run_changes_nothing(tmp_path):
+    files = write_legacy_cache(tmp_path)
+    summary = migrate_cache(str(tmp_path), workers=1, dry_run=True)
+    assert (summary["rewritten"], summary["removed"]) == (3, 4)
+    assert all(os.path.exists(tmp_path / relpath) for relpath in files)
+
+
+def test_legacy_files_move_to_canonical_paths(tmp_path):
+    write_legacy_cache(tmp_path)
+    before = {key: CacheManager(str(tmp_path)).load(key) for key in (
+        CacheKey.team_stats(GAME_DATE, "22400061", "home", "BOS", "prev"),
+        CacheKey.matchup_rollup("2023-24"),
+    )}
+
+    summary = migrate_cache(str(tmp_path), workers=1)
+    assert (summary["rewritten"], summary["removed"], summary["unrecognized"]) == (3, 4, 0)
+    assert read_schema_marker(str(tmp_path)) == SCHEMA_VERSION
+
+    cache_manager = CacheManager(str(tmp_path))
+    for key, data in before.items():
+        version, stored = unwrap_cache_entry(joblib.load(tmp_path / key.relpath()))
+        assert version == SCHEMA_VERSION
+        pd.testing.assert_frame_equal(cache_manager.load(key), data)
+        pd.testing.assert_frame_equal(stored, data)
+
+    # The player's two copies are merged into the season key, keeping the longer one
+    logs = cache_manager.load(CacheKey.player_logs(1628369, "2023-24"))
+    pd.testing.assert_frame_equal(logs, player_logs(41))
+    assert os.listdir(tmp_path / GAME_DATE) == ["game_22400061_home_team_BOS_prev_team_stats.joblib"]
+
+
+def test_second_migration_is_a_no_op(tmp_path):
+    write_legacy_cache(tmp_path)
+    migrate_cache(str(tmp_path), workers=1)
+    summary = migrate_cache(str(tmp_path), workers=1)
+    assert (summary["rewritten"], summary["removed"]) == (0, 0)
@@ -0,0 +1,82 @@
+# test_feature_store.py
+"""
+The incremental feature store must match a full pandas recomputation of the same logs.
+
+Usage:
+    python -m pytest test_feature_store.py
+"""
+
+import pandas as pd
+import pytest
+from feature_store import EWMA_SPAN, WINDOWS, PlayerFeatureStore
+
+STATS = ["PTS", "REB", "AST"]
+
+
+def expected_features(logs, stat):
+    """
+    The features of one stat, computed from the full logs with pandas.
+    """
+    logs = logs.iloc[::-1].reset_index(drop=True)
+    values = logs[stat].astype(float)
+    home = logs["MATCHUP"].str.contains(" vs. ", regex=False)
+    expected = {
+        f"{stat}_SEASON_MEAN": values.mean(),
+        f"{stat}_SEASON_SD": values.std(),
+        f"{stat}_SEASON_MEDIAN": values.median(),
+        f"{stat}_SEASON_MODE": values.mode()[0],
+        f"{stat}_EWMA": values.ewm(span=EWMA_SPAN, adjust=False).mean().iloc[-1],
+        f"{stat}_HOME_MEAN": values[home].mean(),
+        f"{stat}_AWAY_MEAN": values[~home].mean(),
+    }
+    for window in WINDOWS:
+        expected[f"{stat}_L{window}"] = values.tail(window).mean()
+    return expected
+
+
+@pytest.mark.parametrize("stat", STATS)
+def test_full_build_matches_pandas(tmp_path, make_game_logs, stat):
+    logs = make_game_logs()
+    store = PlayerFeatureStore("2023-24", cache_dir=str(tmp_path))
+    assert store.update(1, logs) == len(logs)
+
+    row = store.player(1)
+    for feature, value in expected_features(logs, stat).items():
+        assert row[feature] == pytest.approx(value), feature
+
+
+def test_incremental_build_matches_full_build(tmp_path, make_game_logs):
+    logs = make_game_logs(n_games=41, seed=1)
+    full = PlayerFeatureStore("2023-24", cache_dir=str(tmp_path / "full"))
+    full.update(1, logs)
+
+    # Oldest games first, in three chunks, as daily pulls would add them
+    incremental = PlayerFeatureStore("2023-24", cache_dir=str(tmp_path / "incremental"))
+    oldest_first = logs.iloc[::-1]
+    for chunk in (oldest_first.iloc[:10], oldest_first.iloc[:25], oldest_first):
+        incremental.update(1, chunk.iloc[::-1])
+
+    pd.testing.assert_frame_equal(incremental.features(), full.features())
+
+
+def test_late_row_rebuilds_the_player(tmp_path, make_game_logs):
+    logs = make_game_logs(n_games=20, seed=2)
+    missing = logs.index[10]
+    store = PlayerFeatureStore("2023-24", cache_dir=str(tmp_path))
+    store.update(1, logs.drop(index=missing))
+    assert store.update(1, logs) == len(logs)
+
+    full = PlayerFeatureStore("2023-24", cache_dir=str(tmp_path / "full"))
+    full.update(1, logs)
+    pd.testing.assert_frame_equal(store.features(), full.features())
+
+
+def test_saved_store_reloads(tmp_path, make_game_logs):
+    logs = make_game_logs()
+    store = PlayerFeatureStore("2023-24", cache_dir=str(tmp_path))
+    store.update(1, logs)
+    store.save()
+
+    reloaded = PlayerFeatureStore("2023-24", cache_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(reloaded.features(), store.features())
+    assert reloaded.update(1, logs) == 0
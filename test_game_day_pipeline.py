@@ -0,0 +1,110 @@
+# test_game_day_pipeline.py
+"""
+A delta refresh must carry current-season stats forward only for teams that have not
+played since their last pull, and watermarks must never move back to an earlier date.
+
+Usage:
+    python -m pytest test_game_day_pipeline.py
+"""
+
+from types import SimpleNamespace
+import pandas as pd
+import pytest
+from cache_keys import CacheKey, PLAYER_STATS, TEAM_STATS
+from cache_manager import CacheManager
+from game_day_pipeline import Watermarks, _save_per_game_stats, build_game_day_pipeline, has_new_games
+from schedule_store import ScheduleStore
+
+# Boston is idle from its last pull on the 20th until the 25th, Miami plays on the 22nd
+GAMES = pd.DataFrame({
+    "Game Date": ["2024-10-22", "2024-10-25"],
+    "Game ID": ["0022400070", "0022400090"],
+    "Home Team Abbreviation": ["NYK", "BOS"],
+    "Visiting Team Abbreviation": ["MIA", "MIA"],
+})
+LAST_PULL = "2024-10-20"
+
+
+@pytest.fixture
+def schedule(tmp_path):
+    GAMES.to_csv(tmp_path / "nbaSchedule2425.csv", index=False)
+    return ScheduleStore(str(tmp_path / "nbaSchedule2425.csv"), snapshot_dir=str(tmp_path / "schedule"))
+
+
+def last_pull_keys(team_abbr, side, game_date=LAST_PULL):
+    return [CacheKey.player_stats(game_date, "22400050", side, team_abbr, "curr", "2024-25"),
+            CacheKey.team_stats(game_date, "22400050", side, team_abbr, "curr", "2024-25")]
+
+
+@pytest.fixture
+def pulled(tmp_path):
+    """
+    A cache and watermarks holding Boston's and Miami's current-season stats pulled on the 20th.
+    """
+    cache_manager = CacheManager(str(tmp_path / "cache"))
+    watermarks = Watermarks(str(tmp_path / "watermarks.joblib"))
+    for team_abbr, side in (("BOS", "home"), ("MIA", "away")):
+        for key in last_pull_keys(team_abbr, side):
+            _save_per_game_stats(cache_manager, key, pd.DataFrame({"TEAM": [team_abbr], "MIN": [30.0]}), watermarks)
+    return cache_manager, watermarks
+
+
+def build(schedule, cache_manager, watermarks, delta=True):
+    todays_games = schedule.games_on("2024-10-25")
+    return build_game_day_pipeline(SimpleNamespace(schedule_store=schedule), cache_manager, todays_games,
+                                   watermarks=watermarks, delta=delta)
+
+
+def test_watermarks_never_move_back(tmp_path):
+    watermarks = Watermarks(str(tmp_path / "watermarks.joblib"))
+    later, earlier = last_pull_keys("BOS", "home", "2024-10-25")[0], last_pull_keys("BOS", "home")[0]
+    watermarks.update("BOS", PLAYER_STATS, "2024-10-25", later)
+    watermarks.update("BOS", PLAYER_STATS, LAST_PULL, earlier)
+    watermarks.save()
+    assert Watermarks(watermarks.path).get("BOS", PLAYER_STATS) == {"date": "2024-10-25", "key": later}
+
+
+def test_only_current_season_saves_move_watermarks(tmp_path):
+    cache_manager = CacheManager(str(tmp_path / "cache"))
+    watermarks = Watermarks(str(tmp_path / "watermarks.joblib"))
+    stats = pd.DataFrame({"TEAM": ["BOS"]})
+    _save_per_game_stats(cache_manager, CacheKey.team_stats(LAST_PULL, "22400050", "home", "BOS", "prev", "2023-24"), stats, watermarks)
+    # Empty pulls are not cached, so they do not count as pulled either
+    assert _save_per_game_stats(cache_manager, last_pull_keys("BOS", "home")[1], pd.DataFrame(), watermarks) is None
+    assert watermarks.get("BOS", TEAM_STATS) is None
+
+
+def test_new_games_since_the_last_pull(schedule):
+    assert not has_new_games(schedule, "BOS", LAST_PULL, "2024-10-25")
+    assert has_new_games(schedule, "MIA", LAST_PULL, "2024-10-25")
+    # A pull only covers games before its own date, so a game on that date is new
+    assert has_new_games(schedule, "MIA", "2024-10-22", "2024-10-25")
+    assert not has_new_games(schedule, "MIA", "2024-10-25", "2024-10-25")
+
+
+def test_idle_teams_are_carried_forward(schedule, pulled):
+    cache_manager, watermarks = pulled
+    pipeline = build(schedule, cache_manager, watermarks)
+    assert "merge_player_stats(BOS, 2024-25)" not in pipeline.tasks
+    assert "team_dashboard(BOS, 2024-25)" not in pipeline.tasks
+    assert "merge_player_stats(MIA, 2024-25)" in pipeline.tasks
+    # Previous-season stats are still pulled for both teams
+    assert "merge_player_stats(BOS, 2023-24)" in pipeline.tasks
+
+    for entity, previous_key in zip((PLAYER_STATS, TEAM_STATS), last_pull_keys("BOS", "home")):
+        pipeline.tasks[f"save(22400090, home, {entity}, curr)"].run({})
+        key = CacheKey(entity, season="2024-25", season_type="curr", game_id="22400090",
+                       game_date="2024-10-25", team_abbr="BOS", side="home")
+        pd.testing.assert_frame_equal(cache_manager.load(key), cache_manager.load(previous_key))
+
+
+def test_later_pulls_are_not_carried_back(schedule, pulled):
+    cache_manager, watermarks = pulled
+    for key in last_pull_keys("BOS", "home", "2024-10-30"):
+        _save_per_game_stats(cache_manager, key, pd.DataFrame({"TEAM": ["BOS"]}), watermarks)
+    assert "merge_player_stats(BOS, 2024-25)" in build(schedule, cache_manager, watermarks).tasks
+
+
+def test_full_refresh_refetches_every_team(schedule, pulled):
+    cache_manager, watermarks = pulled
+    assert "merge_player_stats(BOS, 2024-25)" in build(schedule, cache_manager, watermarks, delta=False).tasks
@@ -0,0 +1,157 @@
+# test_pipeline.py
+"""
+The pipeline must run each task after its inputs with their outputs, skip or load tasks
+whose outputs are already persisted, and stop only the tasks downstream of a failure.
+A resumed run must redo only what the interrupted run did not finish.
+
+Usage:
+    python -m pytest test_pipeline.py
+"""
+
+import os
+import time
+import joblib
+import pytest
+from pipeline import (CACHED, COMPLETED, FAILED, NOT_NEEDED, RESUMED, UPSTREAM_FAILED, Checkpoint, Pipeline,
+                      RateLimiter)
+
+
+def diamond(pipeline):
+    """
+    roster -> (team_stats, player_stats) -> merge, recording the order tasks ran in.
+    """
+    calls = []
+
+    def task(name, value):
+        def run(inputs):
+            calls.append(name)
+            return value + sum(inputs.values())
+        return run
+
+    pipeline.add("roster", task("roster", 1))
+    pipeline.add("team_stats", task("team_stats", 10), inputs=["roster"])
+    pipeline.add("player_stats", task("player_stats", 100), inputs=["roster"])
+    pipeline.add("merge", task("merge", 1000), inputs=["team_stats", "player_stats"])
+    return calls
+
+
+def test_tasks_run_after_their_inputs():
+    pipeline = Pipeline(max_workers=4)
+    calls = diamond(pipeline)
+    result = pipeline.run()
+    assert set(result["statuses"].values()) == {COMPLETED}
+    assert calls[0] == "roster" and calls[-1] == "merge"
+    assert result["critical_path"][0] == "roster" and result["critical_path"][-1] == "merge"
+
+
+def test_duplicate_tasks_keep_the_first_definition():
+    pipeline = Pipeline()
+    pipeline.add("roster", lambda inputs: 1)
+    pipeline.add("roster", lambda inputs: 2)
+    assert pipeline.tasks["roster"].run({}) == 1
+
+
+@pytest.mark.parametrize("edges", [{"a": ["missing"]}, {"a": ["b"], "b": ["a"]}])
+def test_unknown_inputs_and_cycles_raise(edges):
+    pipeline = Pipeline()
+    for name, inputs in edges.items():
+        pipeline.add(name, lambda inputs: None, inputs=inputs)
+    with pytest.raises(ValueError):
+        pipeline.plan()
+
+
+def test_persisted_outputs_are_skipped_or_loaded():
+    pipeline = Pipeline()
+    pipeline.add("roster", lambda inputs: "fetched", is_complete=lambda: True, load=lambda: "loaded")
+    pipeline.add("team_stats", lambda inputs: inputs["roster"], inputs=["roster"], is_complete=lambda: True)
+    pipeline.add("player_stats", lambda inputs: inputs["roster"], inputs=["roster"], is_complete=lambda: False)
+    assert pipeline.plan() == {"player_stats": "run", "team_stats": "skip", "roster": "load"}
+
+    result = pipeline.run()
+    assert result["statuses"] == {"roster": CACHED, "team_stats": NOT_NEEDED, "player_stats": COMPLETED}
+
+
+def test_intermediate_tasks_run_only_when_needed():
+    pipeline = Pipeline()
+    pipeline.add("roster", lambda inputs: 1)
+    pipeline.add("team_stats", lambda inputs: 2, inputs=["roster"], is_complete=lambda: True)
+    assert pipeline.plan() == {"team_stats": "skip", "roster": "skip"}
+
+
+def test_failure_stops_only_downstream_tasks():
+    pipeline = Pipeline()
+    diamond(pipeline)
+
+    def fail(inputs):
+        raise RuntimeError("API timeout")
+
+    pipeline.tasks["team_stats"].run = fail
+    reported = []
+    result = pipeline.run(on_task_done=lambda name, status, actions: reported.append((name, status)))
+    assert result["statuses"] == {"roster": COMPLETED, "team_stats": FAILED,
+                                  "player_stats": COMPLETED, "merge": UPSTREAM_FAILED}
+    assert isinstance(result["errors"]["team_stats"], RuntimeError)
+    assert ("merge", UPSTREAM_FAILED) in reported and len(reported) == 4
+
+
+def test_rate_limiter_spaces_calls_across_threads():
+    limiter = RateLimiter(calls_per_minute=600)
+    start = time.monotonic()
+    for endpoint in ("CommonTeamRoster", "CommonTeamRoster", "PlayerGameLog"):
+        limiter.acquire(endpoint)
+    assert time.monotonic() - start >= limiter.estimate_seconds(3) - 0.01
+    assert limiter.estimate_seconds(3) == pytest.approx(0.2)
+    assert dict(limiter.calls) == {"CommonTeamRoster": 2, "PlayerGameLog": 1}
+
+
+def test_resumed_run_redoes_only_unfinished_tasks(tmp_path):
+    def fail(inputs):
+        raise RuntimeError("Interrupted")
+
+    pipeline = Pipeline(checkpoint=Checkpoint("game_day_2024-10-22", checkpoint_dir=str(tmp_path)))
+    diamond(pipeline)
+    pipeline.tasks["merge"].run = fail
+    pipeline.run()
+
+    resumed = Pipeline(checkpoint=Checkpoint("game_day_2024-10-22", checkpoint_dir=str(tmp_path), resume=True))
+    calls = diamond(resumed)
+    result = resumed.run()
+    assert calls == ["merge"]
+    assert result["statuses"] == {"roster": RESUMED, "team_stats": RESUMED, "player_stats": RESUMED, "merge": COMPLETED}
+
+
+def test_checkpoint_ignores_a_half_written_line(tmp_path):
+    checkpoint = Checkpoint("run", checkpoint_dir=str(tmp_path))
+    checkpoint.record("roster(BOS)", [1, 2, 3])
+    with open(checkpoint.log_path, "a") as f:
+        f.write('{"task": "roster(NY')
+
+    resumed = Checkpoint("run", checkpoint_dir=str(tmp_path), resume=True)
+    assert list(resumed.entries) == ["roster(BOS)"]
+    assert resumed.load("roster(BOS)") == [1, 2, 3]
+
+
+def test_tampered_output_is_rerun(tmp_path):
+    checkpoint = Checkpoint("run", checkpoint_dir=str(tmp_path))
+    checkpoint.record("roster", 1)
+    joblib.dump(2, checkpoint._output_path("roster"))
+    with pytest.raises(ValueError):
+        Checkpoint("run", checkpoint_dir=str(tmp_path), resume=True).load("roster")
+
+    resumed = Pipeline(checkpoint=Checkpoint("run", checkpoint_dir=str(tmp_path), resume=True))
+    calls = diamond(resumed)
+    resumed.run()
+    assert calls[0] == "roster"
+
+
+def test_new_run_discards_the_previous_checkpoint(tmp_path):
+    Checkpoint("run", checkpoint_dir=str(tmp_path)).record("roster", 1)
+    assert not Checkpoint("run", checkpoint_dir=str(tmp_path)).has("roster")
+    assert os.listdir(tmp_path / "run") == []
+
+
+def test_read_only_checkpoint_writes_nothing(tmp_path):
+    checkpoint = Checkpoint("run", checkpoint_dir=str(tmp_path), read_only=True)
+    assert not os.path.exists(tmp_path / "run")
+    with pytest.raises(ValueError):
+        checkpoint.record("roster", 1)
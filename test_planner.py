@@ -0,0 +1,62 @@
+# test_planner.py
+"""
+The dry-run plan must count career stats calls from a team's cached roster when there is
+one, and label the counts it had to estimate.
+
+Usage:
+    python -m pytest test_planner.py
+"""
+
+from types import SimpleNamespace
+import pandas as pd
+from cache_keys import CacheKey, PLAYER_STATS
+from cache_manager import CacheManager
+from game_day_pipeline import ESTIMATED_ROSTER_SIZE, Watermarks, build_game_day_pipeline
+from pipeline import Checkpoint, Pipeline, RateLimiter
+from planner import plan_calls, print_plan
+
+TODAYS_GAMES = pd.DataFrame({"Game Date": ["2024-10-25"], "Game ID": ["22400090"],
+                             "Home Team Abbreviation": ["BOS"], "Visiting Team Abbreviation": ["MIA"]})
+
+
+def roster(n_players):
+    return pd.DataFrame({"PLAYER_ID": range(1000, 1000 + n_players)})
+
+
+def plan(tmp_path, pipeline):
+    """
+    Plans today's game with Boston's roster known from its last current-season pull.
+    """
+    cache_manager = CacheManager(str(tmp_path / "cache"))
+    watermarks = Watermarks(str(tmp_path / "watermarks.joblib"))
+    key = CacheKey.player_stats("2024-10-20", "22400050", "home", "BOS", "curr", "2024-25")
+    cache_manager.save(key, roster(15))
+    watermarks.update("BOS", PLAYER_STATS, "2024-10-20", key)
+    build_game_day_pipeline(SimpleNamespace(schedule_store=None), cache_manager, TODAYS_GAMES,
+                            pipeline=pipeline, watermarks=watermarks)
+    return plan_calls(pipeline)
+
+
+def test_career_calls_come_from_cached_rosters(tmp_path):
+    pipeline = Pipeline()
+    result = plan(tmp_path, pipeline)
+    assert pipeline.tasks["career(BOS)"].calls == {"PlayerCareerStats": 15}
+    assert not pipeline.tasks["career(BOS)"].estimated
+    assert pipeline.tasks["career(MIA)"].calls == {"PlayerCareerStats": ESTIMATED_ROSTER_SIZE}
+    assert result["calls"]["PlayerCareerStats"] == 15 + ESTIMATED_ROSTER_SIZE
+    assert result["estimated_calls"] == {"PlayerCareerStats": ESTIMATED_ROSTER_SIZE}
+
+
+def test_checkpointed_roster_is_counted(tmp_path):
+    Checkpoint("game_day_2024-10-25", checkpoint_dir=str(tmp_path)).record("roster(MIA)", roster(14))
+    pipeline = Pipeline(checkpoint=Checkpoint("game_day_2024-10-25", checkpoint_dir=str(tmp_path), resume=True))
+    result = plan(tmp_path, pipeline)
+    assert pipeline.tasks["career(MIA)"].calls == {"PlayerCareerStats": 14}
+    assert result["estimated_calls"] == {}
+
+
+def test_estimates_are_labeled(tmp_path, capsys):
+    print_plan(plan(tmp_path, Pipeline()), RateLimiter(6))
+    output = capsys.readouterr().out
+    assert f"({ESTIMATED_ROSTER_SIZE} estimated, roster not cached)" in output
+    assert "calls (estimated)" in output
@@ -0,0 +1,94 @@
+# test_player_tags.py
+"""
+The stacked, league-wide normalization must give every frame what the per-frame
+consolidate_traded_players and tag_top_players_with_manual_override cells of modeling.py
+gave it, and cached frames must be normalized once and then left alone.
+
+Usage:
+    python -m pytest test_player_tags.py
+"""
+
+import pandas as pd
+import pytest
+from cache_keys import CacheKey, PLAYER_STATS
+from cache_manager import CacheManager
+from data_loader import load_slate
+from player_tags import TAG_COLUMNS, normalize_cached_player_stats, normalize_player_stats
+
+MANUAL_TAGS = {1003: 1, 2011: 2}
+
+
+@pytest.fixture
+def make_players(make_player_stats):
+    """
+    Player stats frames in the older 'MIN_x' layout, two traded players on each team.
+    """
+    def _make_players(team_abbr, first_id, seed=0):
+        return make_player_stats(team_abbr, first_id, n_players=14, n_traded=2, minutes_column="MIN_x", seed=seed)
+    return _make_players
+
+
+def old_consolidate_traded_players(df):
+    player_counts = df["PLAYER_ID"].value_counts()
+    traded_players = player_counts[player_counts > 1].index
+    df = df[~((df["PLAYER_ID"].isin(traded_players)) & (df["TEAM_ABBREVIATION"] != "TOT"))]
+    return df.reset_index(drop=True)
+
+
+def old_tag_top_players_with_manual_override(player_df, manual_tags):
+    player_df = player_df.sort_values(by=["MIN_x", "E_USG_PCT"], ascending=False)
+    player_df["PLAYER_TAG"] = 0
+    player_df.iloc[:6, player_df.columns.get_loc("PLAYER_TAG")] = 1
+    player_df.iloc[6:10, player_df.columns.get_loc("PLAYER_TAG")] = 2
+    for index, row in player_df.iterrows():
+        if row["PLAYER_ID"] in manual_tags:
+            player_df.at[index, "PLAYER_TAG"] = manual_tags[row["PLAYER_ID"]]
+    return player_df
+
+
+def manual_tags_frame():
+    return pd.DataFrame({"PLAYER_ID": list(MANUAL_TAGS), "MANUAL_TAG": list(MANUAL_TAGS.values())})
+
+
+def test_stacked_normalization_matches_per_frame_cells(make_players):
+    frames = {f"frame_{index}": make_players(team_abbr, 1000 * (index + 1), seed=index)
+              for index, team_abbr in enumerate(["BOS", "NYK", "LAL", "MIN"])}
+    league = pd.concat(frames, names=["_frame", None]).reset_index(level="_frame")
+    stacked = normalize_player_stats(league, ["_frame"], manual_tags_frame())
+
+    for name, frame in frames.items():
+        expected = old_tag_top_players_with_manual_override(old_consolidate_traded_players(frame), MANUAL_TAGS)
+        actual = stacked[stacked["_frame"] == name].drop(columns=["_frame", "PLAYER_RANK"])
+        pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False)
+
+
+def test_single_frame_matches_stacked(make_players):
+    frame = make_players("BOS", 1000)
+    single = normalize_player_stats(frame, manual_tags=manual_tags_frame())
+    stacked = normalize_player_stats(frame.assign(_frame="a"), ["_frame"], manual_tags_frame())
+    pd.testing.assert_frame_equal(single, stacked.drop(columns="_frame"))
+
+
+@pytest.fixture
+def untagged_slate(tmp_path, make_players):
+    """
+    A cache holding one game's untagged player stats frames.
+    """
+    cache_manager = CacheManager(str(tmp_path))
+    for index, (side, team_abbr) in enumerate((("home", "BOS"), ("away", "NYK"))):
+        key = CacheKey.player_stats("2024-10-22", "22400061", side, team_abbr, "prev")
+        cache_manager.save(key, make_players(team_abbr, 1000 * (index + 1), seed=index))
+    return str(tmp_path)
+
+
+def test_untagged_frames_are_tagged_on_load(untagged_slate):
+    slate = load_slate("2024-10-22", cache_dir=untagged_slate)
+    for side in ("home", "away"):
+        players = slate.player_stats("22400061", side, "prev")
+        assert set(TAG_COLUMNS) <= set(players.columns)
+        assert not players["PLAYER_ID"].duplicated().any()
+
+
+def test_cached_frames_are_normalized_once(tmp_path, untagged_slate):
+    assert normalize_cached_player_stats(untagged_slate, manual_tags_file=str(tmp_path / "none.csv")) == 2
+    assert normalize_cached_player_stats(untagged_slate, manual_tags_file=str(tmp_path / "none.csv")) == 0
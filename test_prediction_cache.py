@@ -0,0 +1,102 @@
+# test_prediction_cache.py
+"""
+Cached projections must equal uncached ones, only the games whose inputs changed may be
+recomputed, and a change to the model code must invalidate every stored output.
+
+Usage:
+    python -m pytest test_prediction_cache.py
+"""
+
+import pandas as pd
+import pytest
+import prediction_cache
+from prediction_cache import (PREDICTION_CACHE_TABLE, PredictionCache, cached_player_points, cached_simulate_slate,
+                              cached_team_totals)
+from cache_keys import CacheKey
+from cache_manager import CacheManager
+from projections import project_player_points, project_team_totals
+from simulation import simulate_slate
+
+GAME_IDS = ["22400061", "22400062", "22400063"]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PredictionCache(CacheManager(str(tmp_path)), CacheKey.derived(PREDICTION_CACHE_TABLE, "test"))
+
+
+def test_cached_team_totals_equal_uncached(cache, make_matchups):
+    matchups = make_matchups(GAME_IDS)
+    expected = project_team_totals(matchups).reset_index(drop=True)
+    pd.testing.assert_frame_equal(cached_team_totals(matchups, cache), expected)
+    assert (cache.hits, cache.misses) == (0, 3)
+    pd.testing.assert_frame_equal(cached_team_totals(matchups, cache), expected)
+    assert (cache.hits, cache.misses) == (3, 3)
+
+
+def test_only_changed_games_are_recomputed(cache, make_matchups, monkeypatch):
+    matchups = make_matchups(GAME_IDS)
+    cached_team_totals(matchups, cache)
+
+    changed = matchups.copy()
+    changed.loc[changed["Game ID"] == "22400062", "HOME_PTS"] += 5
+    recomputed = []
+
+    def project(rows):
+        recomputed.extend(rows["Game ID"])
+        return project_team_totals(rows)
+
+    monkeypatch.setattr(prediction_cache, "project_team_totals", project)
+    result = cached_team_totals(changed, cache)
+    assert recomputed == ["22400062"]
+    pd.testing.assert_frame_equal(result, project_team_totals(changed).reset_index(drop=True))
+
+
+def test_cached_player_points_equal_uncached(cache, make_players_table, make_player_logs):
+    players = make_players_table(GAME_IDS)
+    player_logs = make_player_logs(players["PLAYER_ID"])
+    expected = project_player_points(players, player_logs).reset_index(drop=True)
+    pd.testing.assert_frame_equal(cached_player_points(players, cache, player_logs=player_logs), expected)
+
+    # New logs of one game's players recompute only that game
+    changed_logs = player_logs.copy()
+    changed_logs.loc[changed_logs["Player_ID"] == 1000, "PTS"] += 3
+    misses = cache.misses
+    result = cached_player_points(players, cache, player_logs=changed_logs)
+    assert cache.misses - misses == 1
+    pd.testing.assert_frame_equal(result, project_player_points(players, changed_logs).reset_index(drop=True))
+
+
+def test_cached_simulation_equals_a_full_run(cache, make_players_table, make_player_logs):
+    players = make_players_table(GAME_IDS)
+    player_logs = make_player_logs(players["PLAYER_ID"])
+    expected = simulate_slate(players, player_logs, n_sims=500, seed=4)
+    result = cached_simulate_slate(players, player_logs, cache, n_sims=500, seed=4)
+    pd.testing.assert_frame_equal(result["games"], expected["games"])
+    pd.testing.assert_frame_equal(result["players"], expected["players"])
+
+    # Games are seeded on their own, so the one recomputed game matches a fresh run of the slate
+    changed_logs = player_logs.copy()
+    changed_logs.loc[changed_logs["Player_ID"] == 1000, "PTS"] += 3
+    misses = cache.misses
+    result = cached_simulate_slate(players, changed_logs, cache, n_sims=500, seed=4)
+    assert cache.misses - misses == 1
+    expected = simulate_slate(players, changed_logs, n_sims=500, seed=4)
+    pd.testing.assert_frame_equal(result["games"], expected["games"])
+    pd.testing.assert_frame_equal(result["players"], expected["players"])
+
+
+def test_model_code_change_invalidates_outputs(cache, make_matchups, monkeypatch):
+    matchups = make_matchups(GAME_IDS)
+    cached_team_totals(matchups, cache)
+    monkeypatch.setattr(prediction_cache, "MODEL_CODE_VERSION", "edited")
+    cached_team_totals(matchups, cache)
+    assert (cache.hits, cache.misses) == (0, 6)
+
+
+def test_saved_cache_reloads(cache, make_matchups, tmp_path):
+    matchups = make_matchups(GAME_IDS)
+    cached_team_totals(matchups, cache)
+    reloaded = PredictionCache(CacheManager(str(tmp_path)), cache.key)
+    pd.testing.assert_frame_equal(cached_team_totals(matchups, reloaded), project_team_totals(matchups).reset_index(drop=True))
+    assert (reloaded.hits, reloaded.misses) == (3, 0)
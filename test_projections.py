@@ -0,0 +1,182 @@
+# test_projections.py
+"""
+The vectorized team totals must equal modeling.py's per-game calculate_team_total_with_ppp,
+the batched player projection must match the per-player loop it replaced, and untagged
+player frames must be consolidated and tagged before players are selected.
+
+Usage:
+    python -m pytest test_projections.py
+"""
+
+import os
+import ast
+import numpy as np
+import pandas as pd
+import pytest
+from cache_keys import CacheKey, PLAYER_STATS, TEAM_STATS
+from player_tags import normalize_player_stats
+from projections import (matchup_table_from_stats_dict, matchup_table_from_team_table,
+                         project_player_points, project_team_totals, projections_to_dict, tagged_players_table)
+from slate import GameSlate
+
+GAME_DATE = "2024-10-22"
+GAMES = {"22400061": {"home": "BOS", "away": "NYK"}, "22400062": {"home": "LAL", "away": "MIN"}}
+
+
+def modeling_functions(*names):
+    """
+    Compiles the named functions of modeling.py, which is a notebook export and cannot be
+    imported, so the per-game functions can serve as the reference.
+    """
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "modeling.py")) as f:
+        tree = ast.parse(f.read())
+    functions = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name in names]
+    namespace = {"np": np, "pd": pd}
+    exec(compile(ast.Module(body=functions, type_ignores=[]), "modeling.py", "exec"), namespace)
+    return namespace
+
+
+def make_team_stats(seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "TEAM_ABBREVIATION": "",
+        "FGA": [rng.uniform(82, 92)], "FTA": [rng.uniform(16, 26)], "OREB": [rng.uniform(8, 13)],
+        "TOV": [rng.uniform(11, 16)], "PTS": [rng.uniform(104, 122)], "E_OFF_RATING": [rng.uniform(106, 120)],
+        "E_DEF_RATING": [rng.uniform(106, 120)], "E_PACE": [rng.uniform(96, 103)],
+    })
+
+
+def make_team_stats_dict():
+    """
+    Team stats frames keyed like modeling.py's team_stats_dict. Minnesota has no recorded
+    possessions, so its PPP is 0.
+    """
+    team_stats = {}
+    for game_index, (game_id, sides) in enumerate(GAMES.items()):
+        for side_index, (side, team_abbr) in enumerate(sides.items()):
+            stats = make_team_stats(2 * game_index + side_index).assign(TEAM_ABBREVIATION=team_abbr)
+            if team_abbr == "MIN":
+                stats[["FGA", "FTA", "OREB", "TOV"]] = 0.0
+            team_stats[f"game_{game_id}_{side}_team_{team_abbr}_prev_team_stats"] = stats
+    return team_stats
+
+
+def per_game_totals(team_stats_dict):
+    """
+    The per-game loop of the original predict_team_totals_with_ppp.
+    """
+    calculate_team_total_with_ppp = modeling_functions(
+        "calculate_possessions", "calculate_ppp", "calculate_team_total_with_ppp")["calculate_team_total_with_ppp"]
+    predictions = {}
+    for game_id, sides in GAMES.items():
+        home_stats = team_stats_dict[f"game_{game_id}_home_team_{sides['home']}_prev_team_stats"]
+        away_stats = team_stats_dict[f"game_{game_id}_away_team_{sides['away']}_prev_team_stats"]
+        predictions[game_id] = {
+            "home_team": sides["home"],
+            "home_team_total": calculate_team_total_with_ppp(home_stats, away_stats),
+            "away_team": sides["away"],
+            "away_team_total": calculate_team_total_with_ppp(away_stats, home_stats),
+        }
+    return predictions
+
+
+def todays_games():
+    return pd.DataFrame([(game_id, sides["home"], sides["away"]) for game_id, sides in GAMES.items()],
+                        columns=["Game ID", "Home Team Abbreviation", "Visiting Team Abbreviation"])
+
+
+def test_team_totals_equal_the_per_game_functions():
+    team_stats = make_team_stats_dict()
+    projections = project_team_totals(matchup_table_from_stats_dict(todays_games(), team_stats))
+    assert projections_to_dict(projections) == per_game_totals(team_stats)
+    # No possessions give a PPP of 0 instead of a division by zero
+    assert projections.loc[projections["Visiting Team Abbreviation"] == "MIN", "Away Team Total"].item() == 0
+
+
+def test_team_table_path_equals_the_per_game_functions():
+    team_stats = make_team_stats_dict()
+    team_table = pd.concat(team_stats.values(), ignore_index=True)
+    projections = project_team_totals(matchup_table_from_team_table(todays_games(), team_table))
+    assert projections_to_dict(projections) == per_game_totals(team_stats)
+
+
+def test_missing_team_gives_nan_only_for_its_game():
+    team_stats = make_team_stats_dict()
+    team_table = pd.concat(team_stats.values(), ignore_index=True)
+    projections = project_team_totals(matchup_table_from_team_table(todays_games(), team_table[team_table["TEAM_ABBREVIATION"] != "NYK"]))
+    totals = projections.set_index("Game ID")[["Home Team Total", "Away Team Total"]]
+    assert totals.loc["22400061"].isna().all()
+
+    expected = per_game_totals(team_stats)["22400062"]
+    assert (totals.loc["22400062", "Home Team Total"], totals.loc["22400062", "Away Team Total"]) == (
+        expected["home_team_total"], expected["away_team_total"])
+
+
+@pytest.fixture
+def make_slate(make_player_stats):
+    def make(tagged=True):
+        slate = GameSlate(GAME_DATE)
+        for game_index, (game_id, sides) in enumerate(GAMES.items()):
+            for side_index, (side, team_abbr) in enumerate(sides.items()):
+                seed = 2 * game_index + side_index
+                players = make_player_stats(team_abbr, 1000 * (seed + 1), seed=seed)
+                if tagged:
+                    players = normalize_player_stats(players)
+                team_stats = pd.DataFrame({"E_DEF_RATING": [108.0 + seed], "E_PACE": [97.0 + seed]})
+                for entity, data in ((PLAYER_STATS, players), (TEAM_STATS, team_stats)):
+                    slate.add(CacheKey(entity, season_type="prev", game_id=game_id, game_date=GAME_DATE,
+                                       team_abbr=team_abbr, side=side), data)
+        return slate
+    return make
+
+
+def per_player_loop(slate, player_logs):
+    """
+    The per-player loop of the original calculate_expected_points_for_tagged_players.
+    """
+    rows = []
+    for game_id in slate.game_ids():
+        for side, opp_side in (("home", "away"), ("away", "home")):
+            player_stats_df = slate.player_stats(game_id, side, "prev")
+            opp_def_stats = slate.team_stats(game_id, opp_side, "prev")
+            tagged = player_stats_df[player_stats_df["PLAYER_TAG"].isin([1, 2])]
+            for _, player in tagged.iterrows():
+                logs = player_logs[player_logs["Player_ID"] == player["PLAYER_ID"]]
+                avg_points_per_game = logs["PTS"].mean() if not logs.empty else 0
+                opp_def_rating = opp_def_stats["E_DEF_RATING"].values[0]
+                opp_pace = opp_def_stats["E_PACE"].values[0]
+                rows.append({
+                    "Player_ID": player["PLAYER_ID"],
+                    "Player_Tag": player["PLAYER_TAG"],
+                    "Expected_Points": avg_points_per_game * (opp_pace / 100) * (100 / opp_def_rating),
+                })
+    return pd.DataFrame(rows)
+
+
+def test_batched_projection_matches_per_player_loop(make_slate, make_player_logs):
+    slate = make_slate()
+    players = tagged_players_table(slate)
+    # Every third player has no logs and is projected 0 points
+    player_logs = make_player_logs([player_id for index, player_id in enumerate(players["PLAYER_ID"]) if index % 3], n_games=12)
+
+    batched = project_player_points(players, player_logs)
+    expected = per_player_loop(slate, player_logs)
+    assert len(batched) == len(expected) == 40
+    np.testing.assert_array_equal(batched["Player_ID"], expected["Player_ID"])
+    np.testing.assert_array_equal(batched["Player_Tag"], expected["Player_Tag"])
+    np.testing.assert_allclose(batched["Expected_Points"], expected["Expected_Points"])
+
+
+def test_untagged_frames_are_tagged_before_selection(make_slate):
+    untagged = tagged_players_table(make_slate(tagged=False))
+    pd.testing.assert_frame_equal(untagged, tagged_players_table(make_slate()))
+    # The traded player appears once per team, not once per team row
+    assert not untagged.duplicated(["Game ID", "Side", "PLAYER_ID"]).any()
+
+
+def test_untaggable_frame_raises(make_slate):
+    slate = make_slate(tagged=False)
+    players = slate.player_stats("22400061", "home", "prev")
+    slate.games["22400061"]["home"][PLAYER_STATS]["prev"] = players.drop(columns=["MIN", "E_USG_PCT"])
+    with pytest.raises(ValueError):
+        tagged_players_table(slate)
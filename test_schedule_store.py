@@ -0,0 +1,157 @@
+# test_schedule_store.py
+"""
+The schedule must be parsed once into typed columns, served from its snapshot until the
+CSV changes, and answer date, team and game ID lookups like the CSV it replaces.
+
+Usage:
+    python -m pytest test_schedule_store.py
+"""
+
+import os
+import pandas as pd
+import pytest
+import schedule_store
+from schedule_store import ScheduleStore, ScheduleTable, get_schedule_store
+
+COLUMNS = ["Game Date", "Game ID", "Arena", "Home Team Abbreviation", "Visiting Team Abbreviation"]
+# Boston plays back-to-backs on the 23rd and 26th and three games in four days twice
+GAMES = [
+    ("2024-10-22", "0022400061", "TD Garden", "BOS", "NYK"),
+    ("2024-10-23", "0022400062", "Kaseya Center", "MIA", "BOS"),
+    ("2024-10-25", "0022400063", "TD Garden", "BOS", "LAL"),
+    ("2024-10-26", "0022400064", "TD Garden", "BOS", "MIA"),
+    ("2024-10-30", "0022400065", "Madison Square Garden", "NYK", "BOS"),
+]
+
+
+# An older CSV: the end of 2023-24 plus an opening night game without the team ID columns
+OLDER_GAMES = [
+    ("2024-04-12", "0022301190", "TD Garden", "BOS", "CHA"),
+    ("2024-04-14", "0022301200", "TD Garden", "BOS", "WAS"),
+    ("2024-10-22", "0022400061", "TD Garden", "BOS", "NYK"),
+]
+
+
+def write_schedule(path, games=GAMES, columns=COLUMNS):
+    pd.DataFrame(games, columns=columns).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ScheduleStore(write_schedule(tmp_path / "nbaSchedule2425.csv"), snapshot_dir=str(tmp_path / "schedule"))
+
+
+def test_columns_are_typed(store):
+    games = store.games
+    assert pd.api.types.is_datetime64_any_dtype(games["Game Date"])
+    assert games["Game ID"].dtype == "int64"
+    assert isinstance(games["Home Team Abbreviation"].dtype, pd.CategoricalDtype)
+    # Both team columns share categories, so they compare directly
+    assert (games["Home Team Abbreviation"] == games["Visiting Team Abbreviation"]).sum() == 0
+
+
+def test_lookups_match_the_csv(store):
+    csv = pd.read_csv(store.csv_path, dtype={"Game ID": str})
+    assert store.games_on("2024-10-23")["Game ID"].tolist() == [22400062]
+    assert store.games_on("2024-10-24").empty
+    assert store.games_between("2024-10-23", "2024-10-26")["Game ID"].tolist() == [22400062, 22400063, 22400064]
+    assert store.games_for_team("NYK")["Game ID"].tolist() == [22400061, 22400065]
+    assert store.games_for_team("BOS", start_date="2024-10-25", end_date="2024-10-26")["Game ID"].tolist() == [22400063, 22400064]
+    assert store.full_schedule()["Game Date"].tolist() == csv["Game Date"].tolist()
+
+    game = store.game("0022400063")
+    assert (game["Game Date"], game["Visiting Team Abbreviation"]) == ("2024-10-25", "LAL")
+    assert store.game(22400063)["Game ID"] == 22400063
+    assert store.game("0022400099") is None
+
+
+def test_snapshot_is_reused_until_the_csv_changes(store, monkeypatch):
+    def parse_schedule_csv(csv_path):
+        raise AssertionError("The CSV was parsed again")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(schedule_store, "parse_schedule_csv", parse_schedule_csv)
+        reloaded = ScheduleStore(store.csv_path, snapshot_dir=store.snapshot_dir)
+    pd.testing.assert_frame_equal(reloaded.games, store.games)
+    assert not reloaded.is_stale()
+
+    write_schedule(store.csv_path, GAMES[:3])
+    assert reloaded.is_stale()
+    assert len(ScheduleStore(store.csv_path, snapshot_dir=store.snapshot_dir).games) == 3
+
+
+def test_shared_store_reloads_a_changed_csv(tmp_path):
+    csv_path = write_schedule(tmp_path / "nbaSchedule2425.csv")
+    snapshot_dir = str(tmp_path / "schedule")
+    shared = get_schedule_store(csv_path, snapshot_dir=snapshot_dir)
+    assert get_schedule_store(csv_path, snapshot_dir=snapshot_dir) is shared
+
+    write_schedule(csv_path, GAMES[:2])
+    assert len(get_schedule_store(csv_path, snapshot_dir=snapshot_dir).games) == 2
+
+
+def test_schedule_context_of_one_team(store):
+    boston = store.team_games[store.team_games["Team Abbreviation"] == "BOS"]
+    assert boston["Game ID"].tolist() == [22400061, 22400062, 22400063, 22400064, 22400065]
+    assert boston["Rest Days"].tolist()[1:] == [0, 1, 0, 3] and pd.isna(boston["Rest Days"].iloc[0])
+    assert boston["Back To Back"].tolist() == [False, True, False, True, False]
+    assert boston["Games Last 4 Days"].tolist() == [1, 2, 3, 3, 1]
+    assert boston["Games Last 7 Days"].tolist() == [1, 2, 3, 4, 3]
+    assert boston["Three In Four"].tolist() == [False, False, True, True, False]
+    assert boston["Venue Streak"].tolist() == [1, 1, 1, 2, 1]
+
+
+def test_game_context_of_both_teams(store):
+    context = store.game_context("0022400064")
+    assert context["home"]["Is Home"] and not context["away"]["Is Home"]
+    assert context["home"]["Back To Back"] and context["home"]["Venue Streak"] == 2
+    # Miami's only other game was three days before
+    assert context["away"]["Rest Days"] == 2 and context["away"]["Opponent Abbreviation"] == "BOS"
+    assert store.context("0022400064", "NYK") is None
+    assert store.game_context("0022400099") is None
+
+
+@pytest.fixture
+def table(tmp_path):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    write_schedule(project_dir / "nbaSchedule2324.csv", OLDER_GAMES)
+    games = [game + (1610612738 + index, 1610612752 + index) for index, game in enumerate(GAMES)]
+    write_schedule(project_dir / "nbaSchedule2425.csv", games, COLUMNS + ["Home Team ID", "Visiting Team ID"])
+    return ScheduleTable(str(project_dir), snapshot_dir=str(tmp_path / "schedule"))
+
+
+def test_table_spans_seasons_without_duplicates(table):
+    assert table.seasons() == ["2023-24", "2024-25"]
+    games = table.query(team_abbr="BOS", start_date="2024-04-13", end_date="2024-10-23")
+    assert games["Game ID"].tolist() == [22301200, 22400061, 22400062]
+    assert games["Season"].tolist() == ["2023-24", "2024-25", "2024-25"]
+    # The opening night game is listed in both CSVs and kept from the one with team IDs
+    assert games["Home Team ID"].notna().tolist() == [False, True, True]
+    assert len(table.context(["2024-25"])) == 2 * len(GAMES)
+
+
+def test_partitions_are_read_lazily(table):
+    assert table._loaded == {}
+    table.query(seasons=["2023-24"])
+    assert set(table._loaded) == {("2023-24", "games")}
+
+
+def test_only_changed_seasons_are_rebuilt(table):
+    reopened = ScheduleTable(table.project_dir, snapshot_dir=table.snapshot_dir)
+    assert reopened.seasons() == table.seasons()
+    assert reopened.refresh() == []
+
+    write_schedule(os.path.join(table.project_dir, "nbaSchedule2425.csv"), GAMES[:2])
+    assert table.is_stale()
+    assert table.refresh() == ["2024-25"]
+    assert table.query(seasons=["2024-25"])["Game ID"].tolist() == [22400061, 22400062]
+
+
+def test_removed_csv_drops_its_seasons(table):
+    os.remove(os.path.join(table.project_dir, "nbaSchedule2324.csv"))
+    assert table.is_stale()
+    table.refresh()
+    assert table.seasons() == ["2024-25"]
+    assert not os.path.exists(table._partition_path("2023-24", "games"))
@@ -0,0 +1,41 @@
+# test_simulation.py
+"""
+A seeded simulation of a game must not depend on the other games on the slate, and the
+simulated means must agree with the point projections they are scaled like.
+
+Usage:
+    python -m pytest test_simulation.py
+"""
+
+import numpy as np
+import pandas as pd
+from projections import project_player_points
+from simulation import simulate_slate
+
+GAME_IDS = ["22400061", "22400062", "22400063"]
+
+
+def test_game_results_do_not_depend_on_the_slate(make_players_table, make_player_logs):
+    players = make_players_table(GAME_IDS)
+    player_logs = make_player_logs(players["PLAYER_ID"])
+    full = simulate_slate(players, player_logs, n_sims=2000, seed=1)
+    for game_id in GAME_IDS:
+        alone = simulate_slate(players[players["Game ID"] == game_id], player_logs, n_sims=2000, seed=1)
+        pd.testing.assert_frame_equal(alone["games"], full["games"][full["games"]["Game ID"] == game_id].reset_index(drop=True))
+        pd.testing.assert_frame_equal(alone["players"], full["players"][full["players"]["Game ID"] == game_id].reset_index(drop=True))
+
+
+def test_seeds_reproduce_runs(make_players_table, make_player_logs):
+    players = make_players_table(GAME_IDS)
+    player_logs = make_player_logs(players["PLAYER_ID"])
+    first = simulate_slate(players, player_logs, n_sims=500, seed=7)
+    pd.testing.assert_frame_equal(simulate_slate(players, player_logs, n_sims=500, seed=7)["games"], first["games"])
+    assert not simulate_slate(players, player_logs, n_sims=500, seed=8)["games"].equals(first["games"])
+
+
+def test_simulated_means_match_the_projections(make_players_table, make_player_logs):
+    players = make_players_table(GAME_IDS)
+    player_logs = make_player_logs(players["PLAYER_ID"], n_games=40)
+    simulated = simulate_slate(players, player_logs, n_sims=20000, seed=3)["players"]
+    projected = project_player_points(players, player_logs)
+    np.testing.assert_allclose(simulated["Mean"], projected["Expected_Points"], rtol=0.05)